@@ -0,0 +1,11 @@
+"""
+Pacote sped_converter - motor de conversão de arquivos SPED EFD ICMS/IPI para Excel.
+
+Pode ser importado sem Tkinter, o que permite rodar conversões em servidores sem
+display e em lotes. A interface gráfica (sped-converter-fixed-v23.py) e a linha de
+comando (sped-convert) usam o mesmo motor.
+"""
+
+from .conversor import SpedConverter
+
+__all__ = ['SpedConverter']
@@ -0,0 +1,7 @@
+"""Permite executar o conversor com `python -m sped_converter`"""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
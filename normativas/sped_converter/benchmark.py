@@ -0,0 +1,236 @@
+"""
+Benchmark do conversor sobre arquivos SPED sintéticos (`sintetico`).
+
+Cada cenário define as quantidades de registros do arquivo gerado; o arquivo é gerado
+uma vez e reaproveitado enquanto os parâmetros não mudarem. Cada execução roda em um
+processo novo (memória medida sem resíduos da anterior) com a `Instrumentacao` ativa,
+de modo que o resultado traz o tempo, as linhas/s e o pico de RSS da leitura
+(`ler_arquivo_sped`) e de cada etapa do `gerar_excel`. Com várias repetições vale o
+menor tempo de cada etapa.
+
+Os resultados são comparados com uma referência gravada (benchmarks/referencia.json):
+etapas mais lentas ou com pico de memória maior que a tolerância são listadas como
+regressões e o comando termina com código 1.
+
+Uso:
+    python -m sped_converter.benchmark
+    python -m sped_converter.benchmark --cenario grande --modo-leitura colunar -n 3
+    python -m sped_converter.benchmark --gravar-referencia
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from .conversor import MODOS_LEITURA, SpedConverter
+from .instrumentacao import Instrumentacao
+from .sintetico import gerar_sped
+
+VERSAO_REFERENCIA = 1
+
+CENARIOS = {
+    'pequeno': dict(c100=2000, c170=10000, c190=3000, produtos_0200=1000, e111=20, c197=200),
+    'medio': dict(c100=20000, c170=160000, c190=30000, produtos_0200=10000, e111=50, c197=2000),
+    'grande': dict(c100=200000, c170=1600000, c190=300000, produtos_0200=50000, e111=100,
+                   c197=20000),
+    'muito_grande': dict(c100=1000000, c170=10000000, c190=1500000, produtos_0200=200000,
+                         e111=200, c197=100000),
+}
+CENARIOS_PADRAO = ('pequeno', 'medio')
+
+REFERENCIA_PADRAO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 'benchmarks', 'referencia.json')
+
+TOLERANCIA_PADRAO = 0.25
+# Etapas mais rápidas que isso na referência não entram na comparação de tempo (ruído)
+SEGUNDOS_MINIMOS = 0.05
+
+
+def arquivo_cenario(nome, diretorio):
+    """Retorna o arquivo sintético do cenário, gerando-o se ainda não existir"""
+    parametros = CENARIOS[nome]
+    assinatura = hashlib.sha1(json.dumps(parametros, sort_keys=True).encode()).hexdigest()[:10]
+    caminho = os.path.join(diretorio, f'sped_{nome}_{assinatura}.txt')
+    if not os.path.exists(caminho):
+        os.makedirs(diretorio, exist_ok=True)
+        temporario = caminho + '.parcial'
+        gerar_sped(temporario, **parametros)
+        os.replace(temporario, caminho)
+    return caminho
+
+
+def converter_instrumentado(arquivo, modo_leitura, memoria_constante):
+    """Converte o arquivo para um xlsx temporário e retorna o relatório das etapas"""
+    logging.disable(logging.CRITICAL)
+    instrumentacao = Instrumentacao()
+    conversor = SpedConverter(modo_leitura=modo_leitura, memoria_constante=memoria_constante,
+                              instrumentacao=instrumentacao)
+    with tempfile.TemporaryDirectory() as diretorio:
+        conversor.processar_sped(arquivo, os.path.join(diretorio, 'benchmark.xlsx'))
+    return instrumentacao.relatorio()
+
+
+def medir(arquivo, modo_leitura='padrao', memoria_constante=False, repeticoes=1):
+    """Executa a conversão `repeticoes` vezes, cada uma em um processo novo.
+
+    Retorna {'linhas', 'bytes', 'etapas': {etapa: {segundos, linhas_por_segundo, pico_rss_mb}}}
+    com o menor tempo e o menor pico de cada etapa entre as repetições.
+    """
+    etapas = {}
+    relatorio = None
+    for _ in range(repeticoes):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            relatorio = executor.submit(converter_instrumentado, arquivo, modo_leitura,
+                                        memoria_constante).result()
+        for etapa in relatorio['etapas']:
+            atual = etapas.setdefault(etapa['nome'], {
+                'segundos': etapa['segundos'],
+                'linhas_por_segundo': etapa['linhas_por_segundo'],
+                'pico_rss_mb': etapa['pico_rss_mb'],
+            })
+            if etapa['segundos'] < atual['segundos']:
+                atual['segundos'] = etapa['segundos']
+                atual['linhas_por_segundo'] = etapa['linhas_por_segundo']
+            if etapa['pico_rss_mb'] is not None:
+                atual['pico_rss_mb'] = min(etapa['pico_rss_mb'],
+                                           atual['pico_rss_mb'] or etapa['pico_rss_mb'])
+
+    linhas = next((etapa['linhas'] for etapa in relatorio['etapas'] if etapa['nome'] == 'conversao'), None)
+    return {'linhas': linhas, 'bytes': relatorio.get('bytes'),
+            'segundos_total': etapas.get('conversao', {}).get('segundos'), 'etapas': etapas}
+
+
+def comparar(resultados, referencia, tolerancia=TOLERANCIA_PADRAO):
+    """Lista as regressões em relação à referência: (chave, etapa, métrica, referência, atual)"""
+    regressoes = []
+    for chave, resultado in resultados.items():
+        anterior = referencia.get(chave)
+        if anterior is None:
+            continue
+        for nome, etapa in resultado['etapas'].items():
+            base = anterior['etapas'].get(nome)
+            if base is None:
+                continue
+            if (base['segundos'] >= SEGUNDOS_MINIMOS and
+                    etapa['segundos'] > base['segundos'] * (1 + tolerancia)):
+                regressoes.append((chave, nome, 'segundos', base['segundos'], etapa['segundos']))
+            if (base['pico_rss_mb'] is not None and etapa['pico_rss_mb'] is not None and
+                    etapa['pico_rss_mb'] > base['pico_rss_mb'] * (1 + tolerancia)):
+                regressoes.append((chave, nome, 'pico_rss_mb', base['pico_rss_mb'],
+                                   etapa['pico_rss_mb']))
+    return regressoes
+
+
+def carregar_referencia(caminho):
+    """Lê os resultados da referência, ou {} se o arquivo não existir"""
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f).get('resultados', {})
+
+
+def gravar_referencia(caminho, resultados):
+    """Grava os resultados como nova referência, mantendo os cenários não medidos agora"""
+    combinados = carregar_referencia(caminho)
+    combinados.update(resultados)
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump({
+            'versao_referencia': VERSAO_REFERENCIA,
+            'gerada_em': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'processador': platform.processor() or platform.machine(),
+            'cpus': os.cpu_count(),
+            'resultados': dict(sorted(combinados.items())),
+        }, f, ensure_ascii=False, indent=2)
+
+
+def formatar_resultado(chave, resultado, referencia):
+    """Monta a tabela de etapas de um cenário, com a variação sobre a referência"""
+    anterior = referencia.get(chave, {}).get('etapas', {})
+    linhas = [f"{chave}: {resultado['linhas']} linhas, {resultado['bytes'] / (1024 * 1024):.1f} MB",
+              f"  {'etapa':<24}{'segundos':>10}{'linhas/s':>12}{'pico MB':>10}{'vs ref':>9}"]
+    for nome, etapa in resultado['etapas'].items():
+        variacao = ''
+        base = anterior.get(nome)
+        if base and base['segundos'] >= SEGUNDOS_MINIMOS:
+            variacao = f"{(etapa['segundos'] / base['segundos'] - 1) * 100:+.0f}%"
+        linhas_por_segundo = etapa['linhas_por_segundo']
+        linhas.append(f"  {nome:<24}{etapa['segundos']:>10.3f}"
+                      f"{linhas_por_segundo if linhas_por_segundo is not None else '':>12}"
+                      f"{etapa['pico_rss_mb'] if etapa['pico_rss_mb'] is not None else '':>10}"
+                      f"{variacao:>9}")
+    return '\n'.join(linhas)
+
+
+def criar_parser():
+    """Cria o parser de argumentos do benchmark"""
+    parser = argparse.ArgumentParser(
+        prog='python -m sped_converter.benchmark',
+        description='Mede tempo e memória do conversor sobre arquivos SPED sintéticos e '
+                    'compara com a referência gravada.'
+    )
+    parser.add_argument('--cenario', action='append', choices=sorted(CENARIOS),
+                        help=f"cenário a medir; pode ser repetido (padrão: {', '.join(CENARIOS_PADRAO)})")
+    parser.add_argument('--modo-leitura', action='append', choices=MODOS_LEITURA,
+                        help='modo de leitura a medir; pode ser repetido (padrão: padrao)')
+    parser.add_argument('--memoria-constante', action='store_true',
+                        help='grava o Excel no modo constant_memory do xlsxwriter')
+    parser.add_argument('-n', '--repeticoes', type=int, default=1,
+                        help='execuções por cenário; vale o menor tempo (padrão: %(default)s)')
+    parser.add_argument('--diretorio-arquivos',
+                        default=os.path.join(tempfile.gettempdir(), 'sped_converter_benchmark'),
+                        help='onde os arquivos sintéticos são gerados e reaproveitados '
+                             '(padrão: %(default)s)')
+    parser.add_argument('--referencia', default=REFERENCIA_PADRAO,
+                        help='arquivo JSON da referência (padrão: benchmarks/referencia.json)')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO,
+                        help='aumento relativo aceito de tempo e memória (padrão: %(default)s)')
+    parser.add_argument('--gravar-referencia', action='store_true',
+                        help='grava os resultados como nova referência em vez de comparar')
+    parser.add_argument('--saida', help='grava também os resultados desta execução em JSON')
+    return parser
+
+
+def main(argv=None):
+    """Ponto de entrada do benchmark"""
+    args = criar_parser().parse_args(argv)
+    cenarios = args.cenario or CENARIOS_PADRAO
+    modos = args.modo_leitura or ['padrao']
+    referencia = carregar_referencia(args.referencia)
+
+    resultados = {}
+    for nome in cenarios:
+        arquivo = arquivo_cenario(nome, args.diretorio_arquivos)
+        for modo in modos:
+            chave = f'{nome}/{modo}' + ('/memoria_constante' if args.memoria_constante else '')
+            resultados[chave] = medir(arquivo, modo, args.memoria_constante, args.repeticoes)
+            print(formatar_resultado(chave, resultados[chave], referencia), flush=True)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+    if args.gravar_referencia:
+        gravar_referencia(args.referencia, resultados)
+        print(f"Referência gravada em {args.referencia}")
+        return 0
+
+    regressoes = comparar(resultados, referencia, args.tolerancia)
+    for chave, etapa, metrica, anterior, atual in regressoes:
+        print(f"REGRESSÃO {chave} {etapa}: {metrica} {anterior} -> {atual}")
+    if not referencia:
+        print(f"Sem referência em {args.referencia}; use --gravar-referencia para criá-la")
+    return 1 if regressoes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Cache em disco dos registros lidos de arquivos SPED.
+
+A chave de cada entrada é o hash do conteúdo do arquivo mais a versão do leitor, de
+modo que um arquivo renomeado continua sendo encontrado e uma mudança na leitura
+invalida as entradas antigas. A entrada guarda o encoding detectado, os registros
+(tipo -> linhas divididas ou TabelaRegistro, conforme o modo que gravou a entrada) e
+o índice da hierarquia pai/filho, serializados com pickle e comprimidos com zlib;
+uma conversão repetida vai direto à geração das saídas, sem `detectar_encoding` nem
+`ler_arquivo_sped`.
+
+O tamanho total do diretório é limitado: ao gravar, as entradas usadas há mais tempo
+(data de modificação, atualizada a cada acerto) são removidas primeiro.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import zlib
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Aumentar sempre que a leitura mudar os registros obtidos de um arquivo ou que o
+# formato da entrada mudar; as entradas de versões anteriores deixam de ser encontradas.
+# 3: UTF-16/UTF-32 lidos em modo texto e TabelaRegistro gravadas como estão
+VERSAO_LEITOR = 3
+
+ASSINATURA = b'SPEDCACHE1\n'
+EXTENSAO = '.cache'
+TAMANHO_MAXIMO_PADRAO = 512 * 1024 * 1024
+TAMANHO_LEITURA_HASH = 1024 * 1024
+
+
+def diretorio_cache_padrao():
+    """Diretório padrão do cache ($XDG_CACHE_HOME/sped_converter ou ~/.cache/sped_converter)"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'sped_converter')
+
+
+def hash_arquivo(arquivo):
+    """Hash BLAKE2b do conteúdo do arquivo"""
+    resumo = hashlib.blake2b(digest_size=20)
+    with open(arquivo, 'rb') as f:
+        for bloco in iter(lambda: f.read(TAMANHO_LEITURA_HASH), b''):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+class CacheLeitura:
+    """Cache LRU, limitado por tamanho, dos registros lidos de arquivos SPED"""
+
+    def __init__(self, diretorio=None, tamanho_maximo=TAMANHO_MAXIMO_PADRAO):
+        self.diretorio = diretorio or diretorio_cache_padrao()
+        self.tamanho_maximo = tamanho_maximo
+        self.acertos = 0
+        self.falhas = 0
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def chave(self, arquivo):
+        """Chave da entrada de um arquivo: hash do conteúdo + versão do leitor"""
+        return f'{hash_arquivo(arquivo)}-v{VERSAO_LEITOR}'
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, chave + EXTENSAO)
+
+    def obter(self, chave):
+        """Retorna (encoding, registros, hierarquia) da entrada, ou None se não estiver no cache"""
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, 'rb') as f:
+                if f.read(len(ASSINATURA)) != ASSINATURA:
+                    raise ValueError('assinatura inválida')
+                encoding, registros, hierarquia = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            self.falhas += 1
+            logger.info(f"Cache: falha para {chave}")
+            return None
+        except Exception as e:
+            # Entrada corrompida ou de formato antigo: descartar e ler o arquivo novamente
+            self.falhas += 1
+            logger.warning(f"Cache: entrada inválida {caminho} descartada: {str(e)}")
+            self._remover(caminho)
+            return None
+
+        # Marca a entrada como usada recentemente
+        os.utime(caminho)
+        self.acertos += 1
+        logger.info(f"Cache: acerto para {chave}")
+        return encoding, defaultdict(list, registros), hierarquia
+
+    def gravar(self, chave, encoding, registros, hierarquia):
+        """Grava os registros (tipo -> linhas divididas) e aplica o limite de tamanho.
+
+        As listas do modo padrão e as TabelaRegistro do modo colunar são gravadas como
+        estão, sem refazer as linhas.
+        """
+        dados = dict(registros)
+        conteudo = zlib.compress(pickle.dumps((encoding, dados, hierarquia),
+                                              protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+        caminho = self._caminho(chave)
+        temporario = f'{caminho}.{os.getpid()}.tmp'
+        with open(temporario, 'wb') as f:
+            f.write(ASSINATURA)
+            f.write(conteudo)
+        # Substituição atômica: processos de um lote podem gravar ao mesmo tempo
+        os.replace(temporario, caminho)
+        logger.info(f"Cache: gravada entrada {chave} ({len(conteudo) / 1024:.0f} KB)")
+
+        self.limitar_tamanho()
+
+    def limitar_tamanho(self):
+        """Remove as entradas usadas há mais tempo até o cache caber no tamanho máximo"""
+        entradas = []
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith(EXTENSAO):
+                continue
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                estado = os.stat(caminho)
+            except FileNotFoundError:
+                continue
+            entradas.append((estado.st_mtime, estado.st_size, caminho))
+
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        for _, tamanho, caminho in sorted(entradas):
+            if total <= self.tamanho_maximo:
+                break
+            self._remover(caminho)
+            total -= tamanho
+            logger.info(f"Cache: entrada {os.path.basename(caminho)} removida (limite de tamanho)")
+
+    def _remover(self, caminho):
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
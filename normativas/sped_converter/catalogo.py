@@ -0,0 +1,108 @@
+"""
+Catálogo persistente de produtos (registro 0200) por CNPJ, entre períodos.
+
+Muitos arquivos mensais trazem apenas parte do cadastro 0200, e itens já informados
+em meses anteriores ficariam sem NCM na aba C170_com_NCM. O catálogo guarda, em um
+banco SQLite local, o último cadastro de cada (CNPJ, COD_ITEM) visto nas conversões:
+cada arquivo convertido atualiza o catálogo com o seu 0200 (um cadastro de período
+anterior não sobrescreve um mais recente) e os itens não encontrados no 0200 do
+próprio arquivo são buscados nele pela chave primária, sem carregar os outros meses
+em memória.
+
+O objeto guarda apenas o caminho do banco e abre uma conexão por operação, de modo
+que pode ser repassado aos processos de uma conversão em lote.
+"""
+
+import logging
+import os
+import sqlite3
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+NOME_ARQUIVO = 'catalogo_0200.sqlite'
+
+# Parâmetros por consulta IN (abaixo do limite de variáveis do SQLite)
+TAMANHO_CONSULTA = 500
+
+# Espera pelo bloqueio de escrita de outro processo do lote
+TEMPO_ESPERA = 30
+
+SQL_CRIACAO = '''
+CREATE TABLE IF NOT EXISTS produtos (
+    CNPJ TEXT NOT NULL,
+    COD_ITEM TEXT NOT NULL,
+    DESCR_ITEM TEXT,
+    TIPO_ITEM TEXT,
+    COD_NCM TEXT,
+    PERIODO TEXT NOT NULL,
+    PRIMARY KEY (CNPJ, COD_ITEM)
+) WITHOUT ROWID
+'''
+
+SQL_ATUALIZACAO = '''
+INSERT INTO produtos (CNPJ, COD_ITEM, DESCR_ITEM, TIPO_ITEM, COD_NCM, PERIODO)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (CNPJ, COD_ITEM) DO UPDATE SET
+    DESCR_ITEM = excluded.DESCR_ITEM,
+    TIPO_ITEM = excluded.TIPO_ITEM,
+    COD_NCM = excluded.COD_NCM,
+    PERIODO = excluded.PERIODO
+WHERE excluded.PERIODO >= produtos.PERIODO
+'''
+
+
+def caminho_catalogo_padrao():
+    """Caminho padrão do catálogo ($XDG_DATA_HOME/sped_converter ou ~/.local/share/sped_converter)"""
+    base = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(base, 'sped_converter', NOME_ARQUIVO)
+
+
+class CatalogoProdutos:
+    """Catálogo (CNPJ, COD_ITEM) -> descrição, tipo e NCM, atualizado a cada conversão"""
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho or caminho_catalogo_padrao()
+        diretorio = os.path.dirname(os.path.abspath(self.caminho))
+        os.makedirs(diretorio, exist_ok=True)
+        with closing(self._conectar()) as conexao:
+            # WAL: conversões de um lote consultam o catálogo enquanto outra o atualiza
+            conexao.execute('PRAGMA journal_mode = WAL')
+            with conexao:
+                conexao.execute(SQL_CRIACAO)
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho, timeout=TEMPO_ESPERA)
+
+    def atualizar(self, cnpj, periodo, itens):
+        """Grava os itens (COD_ITEM, DESCR_ITEM, TIPO_ITEM, COD_NCM) do 0200 de um período.
+
+        `periodo` é a data inicial do arquivo (AAAA-MM-DD); cadastros já gravados de um
+        período mais recente são mantidos. Retorna a quantidade de itens enviados.
+        """
+        linhas = [(cnpj, codigo, descricao, tipo, ncm, periodo)
+                  for codigo, descricao, tipo, ncm in itens]
+        with closing(self._conectar()) as conexao:
+            with conexao:
+                conexao.executemany(SQL_ATUALIZACAO, linhas)
+        logger.info(f"Catálogo 0200: {len(linhas)} item(ns) do CNPJ {cnpj} ({periodo}) atualizado(s)")
+        return len(linhas)
+
+    def buscar(self, cnpj, codigos):
+        """Retorna {COD_ITEM: (COD_NCM, DESCR_ITEM, TIPO_ITEM)} dos códigos presentes no catálogo"""
+        codigos = list(codigos)
+        encontrados = {}
+        with closing(self._conectar()) as conexao:
+            for inicio in range(0, len(codigos), TAMANHO_CONSULTA):
+                bloco = codigos[inicio:inicio + TAMANHO_CONSULTA]
+                cursor = conexao.execute(
+                    f'SELECT COD_ITEM, COD_NCM, DESCR_ITEM, TIPO_ITEM FROM produtos '
+                    f'WHERE CNPJ = ? AND COD_ITEM IN ({", ".join("?" * len(bloco))})',
+                    [cnpj] + bloco)
+                for codigo, ncm, descricao, tipo in cursor:
+                    encontrados[codigo] = (ncm or '', descricao or '', tipo or '')
+        return encontrados
+
+    def __len__(self):
+        with closing(self._conectar()) as conexao:
+            return conexao.execute('SELECT COUNT(*) FROM produtos').fetchone()[0]
@@ -0,0 +1,316 @@
+"""
+Linha de comando do conversor SPED.
+
+Uso:
+    sped-convert entrada.txt -o saida.xlsx
+    sped-convert entrada.txt -f parquet -f csv --diretorio-tabelas tabelas/
+    sped-convert entrada.txt -f sqlite --banco sped.sqlite
+    sped-convert pasta_com_speds/ -o planilhas/ -j 8
+    sped-convert pasta_com_speds/ -o saidas/ -f xlsx -f sqlite
+    sped-convert "speds/*_2025*.txt" -o planilhas/
+    sped-convert entrada.txt --relatorio desempenho.json --perfil conversao.prof
+    sped-convert "speds/*_2025*.txt" --periodos -o periodos_2025.xlsx
+    sped-convert entrada.txt --registros E110,E111,C197
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+from .cache import TAMANHO_MAXIMO_PADRAO, CacheLeitura
+from .catalogo import CatalogoProdutos
+from .conversor import MODOS_LEITURA, SpedConverter
+from .exportador import FORMATOS_TABELA
+from .instrumentacao import Instrumentacao, perfilar
+from .leitor import criar_selecao
+from .lote import converter_lote, listar_arquivos, resumir_lote
+from .periodos import SAIDA_PADRAO, consolidar_periodos
+
+FORMATOS_SAIDA = ('xlsx',) + FORMATOS_TABELA + ('sqlite',)
+
+
+def inteiro_positivo(texto):
+    """Tipo argparse para inteiros maiores que zero"""
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"valor inteiro inválido: {texto!r}")
+    if valor < 1:
+        raise argparse.ArgumentTypeError(f"deve ser maior que zero: {valor}")
+    return valor
+
+
+def criar_parser():
+    """Cria o parser de argumentos da linha de comando"""
+    parser = argparse.ArgumentParser(
+        prog='sped-convert',
+        description='Converte um arquivo SPED EFD ICMS/IPI em planilha Excel, tabelas '
+                    'Parquet/CSV por registro e/ou banco SQLite indexado.'
+    )
+    parser.add_argument('entrada',
+                        help='arquivo SPED (.txt) a converter, ou diretório / padrão glob para '
+                             'conversão em lote')
+    parser.add_argument('-o', '--saida',
+                        help='arquivo Excel de saída (padrão: nome da entrada com extensão .xlsx); '
+                             'em lote, o diretório das planilhas (padrão: o de cada entrada)')
+    parser.add_argument('-j', '--processos', type=inteiro_positivo, default=None,
+                        help='processos usados na conversão em lote (padrão: número de CPUs)')
+    parser.add_argument('--periodos', action='store_true',
+                        help='com diretório / padrão glob: gera uma única planilha com a série de '
+                             'períodos (Consolidado_Fiscal por CST/CFOP/alíquota, E110 com a '
+                             'verificação do saldo credor e E111) em vez de uma por arquivo')
+    parser.add_argument('-f', '--formato', action='append', choices=FORMATOS_SAIDA,
+                        help='formato de saída; pode ser repetido. Sem xlsx a planilha não é '
+                             'gerada (padrão: xlsx)')
+    parser.add_argument('--diretorio-tabelas',
+                        help='diretório das tabelas Parquet/CSV (padrão: nome da entrada '
+                             'com sufixo _tabelas); em lote, sempre o padrão de cada arquivo')
+    parser.add_argument('--banco',
+                        help='arquivo do banco SQLite (padrão: nome da entrada com extensão '
+                             '.sqlite); em lote, sempre o padrão de cada arquivo')
+    parser.add_argument('--registros', metavar='LISTA',
+                        help='converte apenas estes registros e/ou blocos, separados por vírgula '
+                             '(ex.: E110,E111,C197 ou E,C197); as demais linhas são descartadas '
+                             'na leitura e não geram abas')
+    parser.add_argument('--modo-leitura', choices=MODOS_LEITURA, default='padrao',
+                        help="'mmap' mapeia o arquivo em memória e decodifica os campos sob demanda; "
+                             "'colunar' guarda cada campo em uma coluna tipada. Ambos reduzem o "
+                             "pico de memória em arquivos grandes")
+    parser.add_argument('--memoria-constante', action='store_true',
+                        help='grava o Excel linha a linha (modo constant_memory do xlsxwriter), '
+                             'mantendo a memória de saída estável em arquivos grandes')
+    parser.add_argument('--orcamento-memoria', type=float, default=None, metavar='MB',
+                        help='memória (MB) para os registros lidos no modo padrão; acima dela os '
+                             'maiores registros vão para arquivos temporários e são lidos em '
+                             'blocos na escrita. Ativa --memoria-constante')
+    parser.add_argument('--diretorio-temporario',
+                        help='diretório dos arquivos temporários do --orcamento-memoria '
+                             '(padrão: o temporário do sistema)')
+    parser.add_argument('--linhas-por-aba', type=int, default=None,
+                        help='máximo de linhas por aba antes de dividir o registro em abas '
+                             '_1, _2, ... (padrão: limite do Excel, 1.048.576)')
+    parser.add_argument('--cache', action='store_true',
+                        help='reutiliza a leitura de conversões anteriores do mesmo arquivo '
+                             '(cache em disco indexado pelo hash do conteúdo)')
+    parser.add_argument('--diretorio-cache',
+                        help='diretório do cache de leitura (padrão: ~/.cache/sped_converter)')
+    parser.add_argument('--tamanho-cache', type=int, default=TAMANHO_MAXIMO_PADRAO // (1024 * 1024),
+                        help='tamanho máximo do cache em MB; as entradas usadas há mais tempo '
+                             'são removidas primeiro (padrão: %(default)s)')
+    parser.add_argument('--catalogo', action='store_true',
+                        help='mantém um catálogo persistente do 0200 por CNPJ, atualizado a cada '
+                             'conversão e usado para o NCM de itens ausentes no 0200 do arquivo')
+    parser.add_argument('--arquivo-catalogo',
+                        help='banco SQLite do catálogo de produtos '
+                             '(padrão: ~/.local/share/sped_converter/catalogo_0200.sqlite)')
+    parser.add_argument('--relatorio',
+                        help='grava em JSON o tempo, as linhas/s e o pico de memória de cada etapa '
+                             '(em lote, um relatório por arquivo)')
+    parser.add_argument('--perfil',
+                        help='grava o perfil cProfile da conversão neste arquivo (pstats); '
+                             'apenas na conversão individual')
+    parser.add_argument('--log', help='grava o log neste arquivo em vez da saída de erro')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='exibe mensagens informativas do processamento')
+    return parser
+
+
+def configurar_logging(args):
+    """Configura o logging conforme as opções da linha de comando"""
+    nivel = logging.INFO if args.verbose or args.log else logging.WARNING
+    logging.basicConfig(
+        filename=args.log,
+        level=nivel,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+
+def caminho_saida_padrao(entrada):
+    """Retorna o caminho de saída padrão para um arquivo de entrada"""
+    base, _ = os.path.splitext(entrada)
+    return base + '.xlsx'
+
+
+def banco_padrao(entrada):
+    """Retorna o caminho padrão do banco SQLite de um arquivo de entrada"""
+    base, _ = os.path.splitext(entrada)
+    return base + '.sqlite'
+
+
+def diretorio_tabelas_padrao(entrada):
+    """Retorna o diretório padrão das tabelas Parquet/CSV de um arquivo de entrada"""
+    base, _ = os.path.splitext(entrada)
+    return base + '_tabelas'
+
+
+def criar_cache(args):
+    """Cria o cache de leitura, se habilitado na linha de comando"""
+    if not args.cache and not args.diretorio_cache:
+        return None
+    return CacheLeitura(args.diretorio_cache, args.tamanho_cache * 1024 * 1024)
+
+
+def criar_catalogo(args):
+    """Cria o catálogo persistente de produtos, se habilitado na linha de comando"""
+    if not args.catalogo and not args.arquivo_catalogo:
+        return None
+    return CatalogoProdutos(args.arquivo_catalogo)
+
+
+def criar_instrumentacao(args):
+    """Cria a instrumentação das etapas, se o relatório de desempenho foi pedido"""
+    if not args.relatorio:
+        return None
+    return Instrumentacao()
+
+
+def eh_lote(entrada):
+    """Indica se a entrada é um diretório ou padrão glob (conversão em lote)"""
+    return os.path.isdir(entrada) or any(caractere in entrada for caractere in '*?[')
+
+
+def informar_arquivo(resultado, concluidos, total):
+    """Imprime a conclusão de um arquivo do lote"""
+    situacao = 'OK' if resultado['sucesso'] else 'FALHA'
+    detalhe = (f"{resultado['segundos']:.1f}s, {resultado['linhas']} linhas"
+               if resultado['sucesso'] else resultado['erro'])
+    print(f"[{concluidos}/{total}] {situacao} {resultado['arquivo']} ({detalhe})", flush=True)
+
+
+def executar_lote(args):
+    """Converte em paralelo os arquivos de um diretório ou padrão glob"""
+    arquivos = listar_arquivos(args.entrada)
+    if not arquivos:
+        print(f"Nenhum arquivo SPED encontrado em: {args.entrada}", file=sys.stderr)
+        return 2
+
+    opcoes = {'modo_leitura': args.modo_leitura,
+              'memoria_constante': args.memoria_constante,
+              'linhas_por_aba': args.linhas_por_aba,
+              'orcamento_memoria': args.orcamento_memoria,
+              'diretorio_temporario': args.diretorio_temporario,
+              'selecao': args.registros,
+              'cache': criar_cache(args),
+              'catalogo': criar_catalogo(args),
+              'instrumentacao': criar_instrumentacao(args)}
+    if args.perfil:
+        print("Aviso: --perfil é ignorado na conversão em lote", file=sys.stderr)
+
+    inicio = time.perf_counter()
+    resultados = converter_lote(arquivos, args.saida, args.processos, opcoes,
+                                informar_arquivo, args.formato)
+    segundos_total = time.perf_counter() - inicio
+    print(resumir_lote(resultados, segundos_total))
+
+    if args.relatorio:
+        opcoes['instrumentacao'].gravar_relatorio(args.relatorio, {
+            'processos': args.processos or os.cpu_count(),
+            'segundos_total': round(segundos_total, 4),
+            'arquivos': [r.get('relatorio', {'arquivo': r['arquivo'], 'erro': r['erro']})
+                         for r in resultados],
+        })
+
+    return 0 if all(r['sucesso'] for r in resultados) else 1
+
+
+def executar_periodos(args):
+    """Lê em paralelo os arquivos de um diretório ou padrão glob e grava a planilha multiperíodo"""
+    arquivos = listar_arquivos(args.entrada)
+    if not arquivos:
+        print(f"Nenhum arquivo SPED encontrado em: {args.entrada}", file=sys.stderr)
+        return 2
+
+    saida = args.saida or os.path.join(args.entrada if os.path.isdir(args.entrada) else '.', SAIDA_PADRAO)
+    if not saida.endswith('.xlsx'):
+        saida += '.xlsx'
+
+    try:
+        resultados = consolidar_periodos(arquivos, saida, args.processos, informar_arquivo)
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Erro na consolidação de períodos: {str(e)}")
+        print(f"Erro na consolidação de períodos: {e}", file=sys.stderr)
+        return 1
+
+    print(saida)
+    return 0 if all(r['sucesso'] for r in resultados) else 1
+
+
+def main(argv=None):
+    """Ponto de entrada do comando sped-convert"""
+    parser = criar_parser()
+    args = parser.parse_args(argv)
+    configurar_logging(args)
+
+    if args.registros:
+        try:
+            criar_selecao(args.registros)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.periodos:
+        if not eh_lote(args.entrada):
+            print("--periodos requer um diretório ou padrão glob com os arquivos mensais",
+                  file=sys.stderr)
+            return 2
+        return executar_periodos(args)
+
+    if eh_lote(args.entrada):
+        # Em lote, banco e tabelas de cada arquivo ficam ao lado do seu xlsx
+        if args.banco:
+            parser.error('--banco não se aplica à conversão em lote (cada arquivo gera '
+                         'o seu .sqlite no diretório de saída)')
+        if args.diretorio_tabelas:
+            parser.error('--diretorio-tabelas não se aplica à conversão em lote (cada arquivo '
+                         'gera o seu diretório _tabelas no diretório de saída)')
+        return executar_lote(args)
+
+    if not os.path.exists(args.entrada):
+        print(f"Arquivo SPED não encontrado: {args.entrada}", file=sys.stderr)
+        return 2
+
+    formatos = args.formato or ['xlsx']
+    formatos_tabelas = [f for f in FORMATOS_TABELA if f in formatos]
+    diretorio_tabelas = args.diretorio_tabelas or diretorio_tabelas_padrao(args.entrada)
+
+    banco = (args.banco or banco_padrao(args.entrada)) if 'sqlite' in formatos else None
+
+    saida = None
+    if 'xlsx' in formatos:
+        saida = args.saida or caminho_saida_padrao(args.entrada)
+        if not saida.endswith('.xlsx'):
+            saida += '.xlsx'
+
+    instrumentacao = criar_instrumentacao(args)
+    try:
+        conversor = SpedConverter(modo_leitura=args.modo_leitura,
+                                  memoria_constante=args.memoria_constante,
+                                  linhas_por_aba=args.linhas_por_aba,
+                                  orcamento_memoria=args.orcamento_memoria,
+                                  diretorio_temporario=args.diretorio_temporario,
+                                  selecao=args.registros,
+                                  cache=criar_cache(args),
+                                  catalogo=criar_catalogo(args),
+                                  instrumentacao=instrumentacao)
+        with perfilar(args.perfil):
+            conversor.processar_sped(args.entrada, saida, diretorio_tabelas, formatos_tabelas, banco)
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Erro durante a conversão: {str(e)}")
+        print(f"Erro durante a conversão: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if instrumentacao is not None:
+            instrumentacao.gravar_relatorio(args.relatorio)
+
+    if saida:
+        print(saida)
+    if formatos_tabelas:
+        print(diretorio_tabelas)
+    if banco:
+        print(banco)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Detecção rápida do encoding de arquivos SPED.
+
+O `chardet` é lento e, em arquivos EFD em Latin-1 com poucos acentos, costuma errar,
+o que empurra a correção para a leitura (linhas decodificadas com o encoding
+alternativo). A detecção segue, em ordem:
+
+1. BOM no início do arquivo (UTF-8, UTF-16 ou UTF-32). Em UTF-16 e UTF-32 o '|' e
+   o fim de linha não são bytes ASCII isolados: todas as leituras (registros,
+   abertura 0000, SQLite, períodos) decodificam esses arquivos em modo texto
+   (`leitor.abrir_texto`), e o modo mmap recorre à leitura padrão;
+2. UTF-8 estrito numa amostra (uma amostra só com ASCII também é tratada como UTF-8:
+   linhas em Latin-1 mais adiante não decodificam em UTF-8 e caem no encoding
+   alternativo da leitura, enquanto linhas UTF-8 ficam corretas);
+3. os encodings usuais da EFD: ISO-8859-1 (o do leiaute) e, se a amostra tiver
+   caracteres de 0x80 a 0x9F, cp1252;
+4. o `chardet`, apenas se nenhum dos anteriores servir.
+
+A amostra termina no registro 9999, pois depois dele vêm os bytes da assinatura
+digital. O resultado é memorizado por caminho, tamanho e data de modificação, de modo
+que a seleção do arquivo e a conversão detectam o encoding uma única vez.
+"""
+
+import codecs
+import logging
+import os
+from functools import lru_cache
+
+import chardet
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_AMOSTRA = 50 * 1024
+
+# BOMs reconhecidos; os de UTF-32 vêm antes porque o de UTF-32-LE começa com o de
+# UTF-16-LE. UTF-16 e UTF-32 são lidos em modo texto (ver `leitor.compativel_ascii`)
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+ENCODING_EFD = 'iso-8859-1'
+ENCODING_EFD_WINDOWS = 'cp1252'
+
+# Bytes de controle C1 em Latin-1 que no cp1252 são caracteres imprimíveis (€, “, ”, ...)
+BYTES_C1 = bytes(range(0x80, 0xA0))
+
+INICIO_ENCERRAMENTO = b'\n|9999|'
+
+ENTRADAS_MEMORIZADAS = 256
+
+
+def ler_amostra(arquivo, tamanho=TAMANHO_AMOSTRA):
+    """Lê o início do arquivo até o registro 9999 e sem a última linha incompleta"""
+    with open(arquivo, 'rb') as f:
+        amostra = f.read(tamanho)
+        completo = len(amostra) < tamanho
+    encerramento = amostra.find(INICIO_ENCERRAMENTO)
+    if encerramento >= 0:
+        return amostra[:encerramento + 1]
+    if not completo:
+        # Evita cortar um caractere multibyte no meio
+        ultima_linha = amostra.rfind(b'\n')
+        if ultima_linha >= 0:
+            amostra = amostra[:ultima_linha + 1]
+    return amostra
+
+
+def encoding_por_bom(amostra):
+    """Encoding indicado pelo BOM da amostra, ou None"""
+    for bom, encoding in BOMS:
+        if amostra.startswith(bom):
+            return encoding
+    return None
+
+
+def encoding_da_amostra(amostra):
+    """Escolhe o encoding da amostra: BOM, UTF-8 estrito, encodings da EFD e, por fim, chardet"""
+    encoding = encoding_por_bom(amostra)
+    if encoding:
+        return encoding
+
+    try:
+        amostra.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    if len(amostra.translate(None, BYTES_C1)) == len(amostra):
+        return ENCODING_EFD
+    try:
+        amostra.decode(ENCODING_EFD_WINDOWS)
+        return ENCODING_EFD_WINDOWS
+    except UnicodeDecodeError:
+        pass
+
+    encoding = chardet.detect(amostra)['encoding']
+    logger.info(f"Encoding não reconhecido pela amostra; chardet indicou {encoding}")
+    return encoding or ENCODING_EFD
+
+
+@lru_cache(maxsize=ENTRADAS_MEMORIZADAS)
+def _detectar_memorizado(caminho, tamanho, modificacao):
+    return encoding_da_amostra(ler_amostra(caminho))
+
+
+def detectar_encoding_arquivo(arquivo):
+    """Detecta o encoding do arquivo, memorizado por (caminho, tamanho, modificação)"""
+    caminho = os.path.abspath(arquivo)
+    estado = os.stat(caminho)
+    return _detectar_memorizado(caminho, estado.st_size, estado.st_mtime_ns)
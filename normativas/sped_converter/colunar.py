@@ -0,0 +1,293 @@
+"""
+Armazenamento colunar e tipado dos registros do SPED.
+
+Cada tipo de registro vira uma TabelaRegistro com uma coluna por campo do layout
+(`obter_layout_registro`):
+
+- campos decimais do layout do Guia Prático (VL_*, ALIQ_*, QTD...) em `array('d')`,
+  com o número de casas decimais guardado à parte para reproduzir o texto original;
+- códigos de baixa cardinalidade (REG, CFOP, CST_ICMS, UNID, IND_*...) codificados em
+  dicionário: um `array('i')` de códigos mais a lista de valores distintos;
+- demais campos como listas de `str`.
+
+As colunas podem ser lidas diretamente como arrays NumPy / Categorical do pandas sem
+cópia, e a tabela continua se comportando como a lista de linhas divididas
+(`['', 'C170', ..., '']`) usada pelas abas existentes.
+"""
+
+import math
+import re
+from array import array
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+
+from .hierarquia import registrar_hierarquia
+from .layouts import DECIMAL, obter_layout, tipo_por_nome
+from .leitor import iterar_registros
+from .resumo_fiscal import registrar_resumo
+
+NUMERICO = 'numerico'
+CATEGORICO = 'categorico'
+TEXTO = 'texto'
+
+CAMPOS_CATEGORICOS = {
+    'REG', 'CFOP', 'CST_ICMS', 'CST_IPI', 'CST_PIS', 'CST_COFINS', 'UNID', 'UF',
+    'COD_MOD', 'COD_SIT', 'SER', 'COD_FIN', 'COD_VER', 'COD_OBS'
+}
+
+# Decimal no formato brasileiro que pode ser reconstruído exatamente a partir do float
+# (até 15 dígitos significativos)
+PADRAO_DECIMAL = re.compile(r'-?(?:0|[1-9]\d*)(?:,(\d+))?')
+TAMANHO_MAXIMO_DECIMAL = 16
+
+
+def tipo_campo(nome, tipo_registro=None):
+    """Retorna o tipo de armazenamento (numerico, categorico ou texto) de um campo.
+
+    Nos registros do Guia Prático o tipo decimal vem do layout; nos demais, das mesmas
+    regras de nome do layout (`tipo_por_nome`), para que colunar e padrão tipem igual.
+    """
+    layout = obter_layout(tipo_registro)
+    if layout is not None and nome in layout.posicoes:
+        tipo = layout.campos[layout.posicoes[nome] - 1].tipo
+    else:
+        tipo = tipo_por_nome(nome)
+    if tipo == DECIMAL:
+        return NUMERICO
+    if nome in CAMPOS_CATEGORICOS or nome.startswith('IND_'):
+        return CATEGORICO
+    return TEXTO
+
+
+class ColunaNumerica:
+    """Coluna de decimais em float64; valores fora do padrão são guardados como texto"""
+
+    __slots__ = ('valores', 'casas', 'excecoes')
+
+    def __init__(self):
+        self.valores = array('d')
+        self.casas = array('b')
+        self.excecoes = {}
+
+    def adicionar(self, texto):
+        if not texto:
+            self.valores.append(math.nan)
+            self.casas.append(0)
+            return
+
+        combinacao = PADRAO_DECIMAL.fullmatch(texto)
+        if combinacao is None or len(texto) > TAMANHO_MAXIMO_DECIMAL:
+            self.excecoes[len(self.valores)] = texto
+            self.valores.append(math.nan)
+            self.casas.append(0)
+            return
+
+        decimais = combinacao.group(1)
+        self.valores.append(float(texto.replace(',', '.')) if decimais else float(texto))
+        self.casas.append(len(decimais) if decimais else 0)
+
+    def texto(self, indice):
+        """Reconstrói o valor no formato original do SPED"""
+        valor = self.valores[indice]
+        if valor != valor:  # NaN: vazio ou valor fora do padrão
+            return self.excecoes.get(indice, '')
+        return f'{valor:.{self.casas[indice]}f}'.replace('.', ',')
+
+    def textos(self):
+        """Reconstrói a coluna inteira no formato original, formatando por número de casas"""
+        valores = self.para_numpy()
+        casas = np.frombuffer(self.casas, dtype=np.int8)
+        textos = np.full(len(valores), '', dtype=object)
+        preenchidos = ~np.isnan(valores)
+        for quantidade in np.unique(casas[preenchidos]):
+            selecao = preenchidos & (casas == quantidade)
+            formatar = f'{{:.{quantidade}f}}'.format
+            textos[selecao] = [formatar(valor).replace('.', ',') for valor in valores[selecao].tolist()]
+        for indice, texto in self.excecoes.items():
+            textos[indice] = texto
+        return textos
+
+    def para_numpy(self):
+        return np.frombuffer(self.valores, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.valores)
+
+
+class ColunaCategorica:
+    """Coluna codificada em dicionário, para códigos de baixa cardinalidade"""
+
+    __slots__ = ('codigos', 'categorias', 'indice')
+
+    def __init__(self):
+        self.codigos = array('i')
+        self.categorias = []
+        self.indice = {}
+
+    def adicionar(self, texto):
+        codigo = self.indice.get(texto)
+        if codigo is None:
+            codigo = self.indice[texto] = len(self.categorias)
+            self.categorias.append(texto)
+        self.codigos.append(codigo)
+
+    def texto(self, indice):
+        return self.categorias[self.codigos[indice]]
+
+    def textos(self):
+        return np.array(self.categorias, dtype=object)[self.para_numpy()]
+
+    def para_numpy(self):
+        return np.frombuffer(self.codigos, dtype=np.int32)
+
+    def para_pandas(self):
+        return pd.Categorical.from_codes(self.para_numpy(), categories=self.categorias)
+
+    def __len__(self):
+        return len(self.codigos)
+
+
+class ColunaTexto:
+    """Coluna de texto livre"""
+
+    __slots__ = ('valores',)
+
+    def __init__(self):
+        self.valores = []
+
+    def adicionar(self, texto):
+        self.valores.append(texto)
+
+    def texto(self, indice):
+        return self.valores[indice]
+
+    def textos(self):
+        return self.valores
+
+    def __len__(self):
+        return len(self.valores)
+
+
+CLASSES_COLUNA = {NUMERICO: ColunaNumerica, CATEGORICO: ColunaCategorica, TEXTO: ColunaTexto}
+
+
+class TabelaRegistro(Sequence):
+    """Registros de um tipo armazenados por coluna.
+
+    Como sequência, devolve cada linha no formato de `linha.split('|')`.
+    """
+
+    def __init__(self, tipo_registro, layout):
+        self.tipo_registro = tipo_registro
+        self.nomes = []
+        self.colunas = []
+        self.tamanhos = array('H')  # quantidade de campos de cada linha
+        for nome in layout or []:
+            self._nova_coluna(nome, tipo_campo(nome, tipo_registro))
+
+    def _nova_coluna(self, nome, tipo):
+        coluna = CLASSES_COLUNA[tipo]()
+        # Linhas anteriores não tinham este campo
+        for _ in range(len(self.tamanhos)):
+            coluna.adicionar('')
+        self.nomes.append(nome)
+        self.colunas.append(coluna)
+        return coluna
+
+    def adicionar(self, campos):
+        """Adiciona uma linha dividida (`['', 'REG', ..., '']`)"""
+        quantidade = len(campos) - 2
+        while quantidade > len(self.colunas):
+            self._nova_coluna(f'Campo_{len(self.colunas) + 1}', TEXTO)
+
+        colunas = self.colunas
+        for j in range(quantidade):
+            colunas[j].adicionar(campos[j + 1])
+        for j in range(quantidade, len(colunas)):
+            colunas[j].adicionar('')
+        self.tamanhos.append(quantidade)
+
+    def coluna(self, nome):
+        """Retorna a coluna sem cópia: ndarray (numérica), Categorical (código) ou lista (texto)"""
+        coluna = self.colunas[self.nomes.index(nome)]
+        if isinstance(coluna, ColunaNumerica):
+            return coluna.para_numpy()
+        if isinstance(coluna, ColunaCategorica):
+            return coluna.para_pandas()
+        return coluna.valores
+
+    def para_dataframe(self):
+        """Monta um DataFrame tipado a partir das colunas, sem passar por listas de linhas"""
+        largura = max(self.tamanhos, default=0)
+        dados = {nome: self.coluna(nome) for nome in self.nomes[:largura]}
+        return pd.DataFrame(dados, copy=False)
+
+    def colunas_texto(self, posicoes):
+        """Textos dos campos nas `posicoes` de `linha.split('|')`, coluna a coluna, sem montar as linhas"""
+        vazia = [''] * len(self)
+        return [self.colunas[posicao - 1].textos() if 0 < posicao <= len(self.colunas) else vazia
+                for posicao in posicoes]
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError('índice fora do intervalo')
+        quantidade = self.tamanhos[indice]
+        return [''] + [self.colunas[j].texto(indice) for j in range(quantidade)] + ['']
+
+    def __len__(self):
+        return len(self.tamanhos)
+
+
+class ArmazemColunar(dict):
+    """Dicionário tipo de registro -> TabelaRegistro"""
+
+    def __init__(self, obter_layout):
+        super().__init__()
+        self.obter_layout = obter_layout
+
+    def adicionar(self, tipo_registro, campos):
+        tabela = self.get(tipo_registro)
+        if tabela is None:
+            tabela = self[tipo_registro] = TabelaRegistro(tipo_registro,
+                                                          self.obter_layout(tipo_registro))
+        tabela.adicionar(campos)
+
+
+def montar_armazem_colunar(pares, obter_layout):
+    """Monta um ArmazemColunar a partir de pares (tipo_registro, campos)"""
+    armazem = ArmazemColunar(obter_layout)
+    for tipo_registro, campos in pares:
+        armazem.adicionar(tipo_registro, campos)
+    return armazem
+
+
+def armazem_colunar_de_registros(registros, obter_layout):
+    """Monta um ArmazemColunar de registros já lidos (ex.: entrada do cache).
+
+    TabelaRegistro são reaproveitadas como estão; listas de linhas divididas são convertidas.
+    """
+    armazem = ArmazemColunar(obter_layout)
+    for tipo_registro, linhas in registros.items():
+        if isinstance(linhas, TabelaRegistro):
+            armazem[tipo_registro] = linhas
+        else:
+            for campos in linhas:
+                armazem.adicionar(tipo_registro, campos)
+    return armazem
+
+
+def ler_arquivo_sped_colunar(arquivo, encoding, obter_layout, hierarquia=None, progresso=None,
+                            selecao=None, resumo=None):
+    """Lê o arquivo em passada única diretamente para um ArmazemColunar"""
+    pares = iterar_registros(arquivo, encoding, progresso, selecao)
+    if hierarquia is not None:
+        pares = registrar_hierarquia(pares, hierarquia)
+    if resumo is not None:
+        pares = registrar_resumo(pares, resumo)
+    return montar_armazem_colunar(pares, obter_layout)
@@ -0,0 +1,1195 @@
+"""
+SPED Converter - Motor de conversão
+Lê arquivos SPED EFD ICMS/IPI e gera a planilha Excel, sem depender de interface gráfica.
+
+Usado pela interface Tkinter (sped-converter-fixed-v23.py) e pela linha de comando
+(sped-convert), de modo que ambas produzem exatamente a mesma saída.
+"""
+
+import numpy as np
+import pandas as pd
+from collections import Counter, defaultdict
+from itertools import zip_longest
+import logging
+import os
+import sqlite3
+
+from .leitor import (compativel_ascii, criar_selecao, dividir_linha, iterar_registros,
+                     ler_registro_abertura)
+from .leitor_mmap import ler_arquivo_sped_mmap
+from .codificacao import detectar_encoding_arquivo
+from .colunar import armazem_colunar_de_registros, ler_arquivo_sped_colunar
+from .escritor import LIMITE_LINHAS_EXCEL, EscritorPlanilhas, descartar_workbook
+from .exportador import exportar_tabelas
+from .exportador_sqlite import exportar_sqlite
+from .hierarquia import IndiceHierarquia, registrar_hierarquia
+from .instrumentacao import Instrumentacao
+from .progresso import ConversaoCancelada
+from .resumo_fiscal import ABAS_RESUMO, VALORES_RESUMO, ResumoFiscal, registrar_resumo
+from .transbordo import ArmazemTransbordo
+from .layouts import converter_data_texto, nomes_campos, obter_layout
+from .tipos import converter_datas, converter_decimais, converter_tipos
+
+# Modos de leitura: 'padrao' gera listas de str; 'mmap' mapeia o arquivo e decodifica
+# os campos apenas quando acessados; 'colunar' guarda uma coluna tipada por campo
+MODOS_LEITURA = ('padrao', 'mmap', 'colunar')
+
+# Colunas do 0200 na aba C170_com_NCM: (valor se vazio no cadastro, valor se o item não está no 0200)
+VALORES_CATALOGO_0200 = {
+    'NCM_PRODUTO': ('NCM VAZIO', 'NCM NÃO LOCALIZADO'),
+    'DESCR_CADASTRAL': ('DESCRIÇÃO VAZIA', 'DESCRIÇÃO NÃO LOCALIZADA'),
+    'TIPO_ITEM': ('TIPO VAZIO', 'TIPO NÃO LOCALIZADO'),
+}
+
+
+class SpedConverter:
+    """Motor de conversão SPED -> Excel, independente de interface gráfica"""
+
+    def __init__(self, modo_leitura='padrao', memoria_constante=False, linhas_por_aba=None,
+                 cache=None, catalogo=None, instrumentacao=None, progresso=None,
+                 orcamento_memoria=None, diretorio_temporario=None, selecao=None):
+        if modo_leitura not in MODOS_LEITURA:
+            raise ValueError(f"Modo de leitura inválido: {modo_leitura}")
+        self.logger = logging.getLogger(__name__)
+        self.modo_leitura = modo_leitura
+        # Orçamento (MB) dos registros em memória no modo padrão: acima dele os maiores
+        # registros vão para arquivos temporários em `diretorio_temporario` (transbordo)
+        self.orcamento_memoria = orcamento_memoria
+        self.diretorio_temporario = diretorio_temporario
+        if orcamento_memoria is not None and modo_leitura != 'padrao':
+            self.logger.warning(f"Orçamento de memória ignorado no modo de leitura {modo_leitura}")
+            self.orcamento_memoria = None
+        if self.orcamento_memoria is not None and not memoria_constante:
+            # Sem o modo de memória constante o xlsxwriter manteria todas as células em memória
+            self.logger.info("Orçamento de memória: ativando memória constante no Excel")
+            memoria_constante = True
+        # Com memoria_constante o xlsxwriter grava cada linha assim que a próxima é
+        # iniciada, então todas as abas precisam ser escritas em ordem de linha
+        self.memoria_constante = memoria_constante
+        # SelecaoRegistros opcional (ou texto "E110,E111,C197"): só esses registros e blocos
+        # são lidos e ganham abas; as demais linhas são descartadas ainda em bytes
+        self.selecao = criar_selecao(selecao)
+        # Máximo de linhas por aba (inclui cabeçalhos); None usa o limite do Excel
+        self.linhas_por_aba = linhas_por_aba or LIMITE_LINHAS_EXCEL
+        # CacheLeitura opcional: conversões repetidas do mesmo arquivo não o releem
+        self.cache = cache
+        # CatalogoProdutos opcional: 0200 de conversões anteriores, por CNPJ, para itens sem NCM
+        self.catalogo = catalogo
+        # Instrumentacao opcional: tempo, linhas/s e pico de memória de cada etapa
+        self.instrumentacao = instrumentacao if instrumentacao is not None else Instrumentacao(ativa=False)
+        # Progresso opcional: eventos de bytes lidos/linhas gravadas e pedido de cancelamento
+        self.progresso = progresso
+        self.registros = None
+        # Vínculos pai/filho (C100 -> C170, E110 -> E111, ...) da última leitura
+        self.hierarquia = None
+        # Totais de C190/C590/D190/D590 por direção, CFOP, CST e alíquota da última leitura
+        self.resumo_fiscal = None
+        # Quantidade de linhas lidas por registro na última conversão
+        self.linhas_por_registro = {}
+        self.escritor = None
+
+    def extrair_informacoes_header(self, registros):
+        """Extrai informações do cabeçalho do SPED"""
+        nome_empresa = ""
+        periodo = ""
+
+        if '0000' in registros and registros['0000']:
+            reg_0000 = registros['0000'][0]
+            nome_empresa = reg_0000[6] if len(reg_0000) > 6 else "Empresa"  # NOME está na posição 6
+            data_inicial = reg_0000[4] if len(reg_0000) > 4 else ""  # DT_INI está na posição 4
+            if len(data_inicial) == 8:
+                periodo = f"{data_inicial[:2]}/{data_inicial[2:4]}/{data_inicial[4:8]}"
+
+        return nome_empresa, periodo
+
+    def ler_cabecalho(self, arquivo):
+        """Lê só o registro 0000 (primeiras linhas do arquivo), sem a leitura completa.
+
+        Retorna (nome_empresa, periodo, CNPJ ou CPF); sem 0000, ('', '', None).
+        """
+        encoding = self.detectar_encoding(arquivo)
+        campos = ler_registro_abertura(arquivo, encoding)
+        if campos is None:
+            self.logger.warning(f"Registro 0000 não encontrado no início de {arquivo}")
+            return '', '', None
+        registros = {'0000': [campos]}
+        nome_empresa, periodo = self.extrair_informacoes_header(registros)
+        documento, _ = self._contribuinte(registros)
+        return nome_empresa, periodo, documento
+
+    def processar_nome_arquivo(self, nome_empresa, periodo):
+        """Processa o nome do arquivo Excel baseado no nome da empresa e período"""
+        try:
+            # Extrai o primeiro nome da empresa
+            primeiro_nome = nome_empresa.split()[0].strip()
+
+            # Processa o período para extrair mês e ano
+            if periodo:
+                partes_data = periodo.split('/')
+                if len(partes_data) == 3:
+                    mes = partes_data[1]  # Mês está no formato MM
+                    ano = partes_data[2]  # Ano está no formato YYYY
+                    nome_sugerido = f"{primeiro_nome}_SPED_{mes}_{ano}.xlsx"
+                    return nome_sugerido
+
+            # Fallback se não conseguir processar o período
+            return f"{primeiro_nome}_SPED.xlsx"
+        except Exception as e:
+            self.logger.error(f"Erro ao processar nome do arquivo: {str(e)}")
+            return "SPED_convertido.xlsx"
+
+    def processar_sped_para_excel(self, caminho_arquivo_sped, caminho_saida_excel):
+        """Processa o arquivo SPED e gera o Excel"""
+        self.processar_sped(caminho_arquivo_sped, caminho_saida_excel)
+
+    def processar_sped(self, caminho_arquivo_sped, caminho_saida_excel=None,
+                       diretorio_tabelas=None, formatos_tabelas=(), caminho_sqlite=None):
+        """Lê o arquivo SPED e gera o Excel, as tabelas Parquet/CSV e/ou o banco SQLite.
+
+        Sem `caminho_saida_excel` o xlsx não é gerado; com `formatos_tabelas` as tabelas
+        são gravadas em `diretorio_tabelas`; com `caminho_sqlite` o arquivo é carregado
+        nesse banco. Retorna os caminhos das tabelas gravadas.
+        """
+        instrumentacao = self.instrumentacao
+        instrumentacao.informacoes.update({
+            'arquivo': caminho_arquivo_sped,
+            'bytes': os.path.getsize(caminho_arquivo_sped) if os.path.exists(caminho_arquivo_sped) else None,
+            'modo_leitura': self.modo_leitura,
+            'memoria_constante': self.memoria_constante,
+            'orcamento_memoria_mb': self.orcamento_memoria,
+            'selecao': repr(self.selecao) if self.selecao is not None else None,
+        })
+        self.linhas_por_registro = {}
+        try:
+            with instrumentacao.etapa('conversao') as total:
+                precisa_registros = bool(caminho_saida_excel or formatos_tabelas)
+                if precisa_registros:
+                    # Armazena os registros como atributo da classe
+                    encoding, self.registros = self.carregar_registros(caminho_arquivo_sped)
+                    if not any(len(linhas) for linhas in self.registros.values()):
+                        # Arquivo sem nenhuma linha |REG|...|: não gera uma planilha vazia
+                        raise ValueError(f"Nenhuma linha SPED válida encontrada em "
+                                         f"{caminho_arquivo_sped}")
+                    with instrumentacao.etapa('catalogo_0200'):
+                        self.atualizar_catalogo(self.registros)
+                else:
+                    encoding = self.detectar_encoding(caminho_arquivo_sped)
+
+                # O banco SQLite é carregado direto do arquivo, na ordem original das linhas
+                if caminho_sqlite:
+                    with instrumentacao.etapa('sqlite'):
+                        contagens = exportar_sqlite(caminho_arquivo_sped, encoding, caminho_sqlite)
+
+                if not precisa_registros:
+                    self.linhas_por_registro = contagens
+                    return []
+
+                self.linhas_por_registro = {tipo: len(linhas) for tipo, linhas in self.registros.items()}
+                total.linhas = sum(self.linhas_por_registro.values())
+                nome_empresa, periodo = self.extrair_informacoes_header(self.registros)
+
+                if caminho_saida_excel:
+                    self.gerar_excel(self.registros, nome_empresa, periodo, caminho_saida_excel)
+
+                if formatos_tabelas:
+                    with instrumentacao.etapa('tabelas'):
+                        return exportar_tabelas(self, self.registros, diretorio_tabelas, formatos_tabelas)
+                return []
+
+        except Exception as e:
+            instrumentacao.informacoes['erro'] = str(e)
+            self.logger.error(f"Erro no processamento: {str(e)}")
+            raise
+        finally:
+            self.liberar_registros()
+
+    def carregar_registros(self, arquivo):
+        """Detecta o encoding e lê os registros, passando pelo cache quando configurado.
+
+        Retorna (encoding, registros). O modo mmap não usa o cache, pois não lê as linhas.
+        """
+        chave = None
+        # Com orçamento de memória o cache não é usado: a entrada em cache é carregada
+        # inteira na memória
+        if self.cache is not None and self.modo_leitura != 'mmap' and self.orcamento_memoria is None:
+            with self.instrumentacao.etapa('cache_leitura'):
+                chave = self.cache.chave(arquivo)
+                entrada = self.cache.obter(chave)
+            if entrada is not None:
+                encoding, registros, self.hierarquia = entrada
+                if self.selecao is not None:
+                    # A entrada tem o arquivo inteiro; as listas mantidas continuam completas,
+                    # então os índices da hierarquia seguem válidos
+                    registros = {tipo: linhas for tipo, linhas in registros.items()
+                                 if self.selecao.contem(tipo)}
+                self.resumo_fiscal = ResumoFiscal.de_registros(registros)
+                if self.modo_leitura == 'colunar':
+                    registros = armazem_colunar_de_registros(registros, self.obter_layout_registro)
+                return encoding, registros
+
+        encoding = self.detectar_encoding(arquivo)
+        with self.instrumentacao.etapa('leitura') as etapa:
+            registros = self.ler_arquivo_sped(arquivo, encoding)
+            etapa.linhas = sum(len(linhas) for linhas in registros.values())
+        if self.progresso is not None:
+            tamanho = os.path.getsize(arquivo)
+            self.progresso.leitura(tamanho, tamanho)
+        # Uma leitura parcial (com seleção) não serve para o cache
+        if chave is not None and self.selecao is None:
+            with self.instrumentacao.etapa('cache_gravacao'):
+                self.cache.gravar(chave, encoding, registros, self.hierarquia)
+        return encoding, registros
+
+    def liberar_registros(self):
+        """Libera recursos do armazém de registros (ex.: o mapeamento do modo mmap)"""
+        if hasattr(self.registros, 'fechar'):
+            self.registros.fechar()
+            self.registros = None
+
+    def detectar_encoding(self, arquivo):
+        """Detecta o encoding do arquivo, ignorando possíveis caracteres de assinatura"""
+        try:
+            # BOM, UTF-8 estrito e encodings da EFD antes do chardet; memorizado por arquivo
+            with self.instrumentacao.etapa('deteccao_encoding'):
+                return detectar_encoding_arquivo(arquivo)
+        except Exception as e:
+            self.logger.error(f"Erro ao detectar encoding: {str(e)}")
+            return 'utf-8'
+
+    def is_linha_valida(self, linha):
+        """Verifica se a linha é uma linha válida do SPED"""
+        return dividir_linha(linha) is not None
+
+    def ler_arquivo_sped(self, arquivo, encoding):
+        """Lê o arquivo SPED e retorna os registros, ignorando caracteres ilegíveis de assinatura.
+
+        O índice pai/filho das linhas lidas fica em `self.hierarquia` e os totais dos
+        registros analíticos (C190/C590/D190/D590), em `self.resumo_fiscal`.
+        """
+        self.hierarquia = IndiceHierarquia()
+        self.resumo_fiscal = ResumoFiscal()
+        if self.modo_leitura == 'mmap' and not compativel_ascii(encoding or 'utf-8'):
+            # UTF-16/UTF-32: as linhas não podem ser localizadas nos bytes mapeados
+            self.logger.warning(f"Encoding {encoding} não suportado pela leitura mmap; "
+                                f"usando a leitura padrão")
+        elif self.modo_leitura == 'mmap':
+            return ler_arquivo_sped_mmap(arquivo, encoding, self.hierarquia, self.progresso,
+                                         self.selecao, self.resumo_fiscal)
+        if self.modo_leitura == 'colunar':
+            return ler_arquivo_sped_colunar(arquivo, encoding, self.obter_layout_registro,
+                                            self.hierarquia, self.progresso, self.selecao,
+                                            self.resumo_fiscal)
+
+        if self.orcamento_memoria is not None:
+            return self._ler_com_transbordo(arquivo, encoding)
+
+        registros = defaultdict(list)
+
+        try:
+            pares = registrar_resumo(iterar_registros(arquivo, encoding, self.progresso, self.selecao),
+                                     self.resumo_fiscal)
+            for tipo_registro, campos in registrar_hierarquia(pares, self.hierarquia):
+                registros[tipo_registro].append(campos)
+        except OSError as e:
+            self.logger.error(f"Erro na leitura do arquivo {arquivo}: {str(e)}")
+            raise Exception(f"Não foi possível ler o arquivo: {str(e)}")
+
+        return registros
+
+    def _ler_com_transbordo(self, arquivo, encoding):
+        """Lê os registros em um ArmazemTransbordo limitado ao orçamento de memória"""
+        registros = ArmazemTransbordo(int(self.orcamento_memoria * 1024 * 1024),
+                                      self.diretorio_temporario)
+        adicionar = registros.adicionar
+        try:
+            pares = registrar_resumo(iterar_registros(arquivo, encoding, self.progresso, self.selecao),
+                                     self.resumo_fiscal)
+            for tipo_registro, campos in registrar_hierarquia(pares, self.hierarquia):
+                adicionar(tipo_registro, campos)
+        except OSError as e:
+            registros.fechar()
+            self.logger.error(f"Erro na leitura do arquivo {arquivo}: {str(e)}")
+            raise Exception(f"Não foi possível ler o arquivo: {str(e)}")
+        except BaseException:
+            registros.fechar()
+            raise
+
+        if registros.transbordados:
+            self.logger.info(f"Registros lidos do disco em blocos: {', '.join(registros.transbordados)}")
+        return registros
+
+    def gerar_excel(self, registros, nome_empresa, periodo, caminho_saida):
+        """Gera o arquivo Excel com os registros processados"""
+        if self.resumo_fiscal is None:
+            self.resumo_fiscal = ResumoFiscal.de_registros(registros)
+
+        def formatar_data(data_str):
+            if isinstance(data_str, str) and len(data_str) >= 8:
+                return f"{data_str[:2]}/{data_str[2:4]}/{data_str[4:8]}"
+            return data_str
+
+        opcoes = {'constant_memory': True} if self.memoria_constante else {}
+        instrumentacao = self.instrumentacao
+        progresso = self.progresso
+        if progresso is not None:
+            progresso.iniciar_escrita(self._estimar_linhas_excel(registros))
+
+        # O arquivo é aberto aqui (e não pelo pandas) para que, no cancelamento ou em um
+        # erro, possa ser fechado sem gravar o workbook e removido
+        arquivo_excel = open(caminho_saida, 'wb')
+        writer = None
+        concluido = False
+        try:
+            writer = pd.ExcelWriter(arquivo_excel, engine='xlsxwriter',
+                                    engine_kwargs={'options': opcoes})
+            self.escritor = EscritorPlanilhas(writer.book, self.linhas_por_aba, progresso)
+            with instrumentacao.etapa('abas_registros') as etapa:
+                self._processar_registros(registros, writer, formatar_data)
+                etapa.linhas = sum(len(linhas) for linhas in registros.values())
+            self._verificar_cancelamento()
+            with instrumentacao.etapa('aba_consolidado') as etapa:
+                self._criar_aba_consolidada(writer, nome_empresa)
+                etapa.linhas = self.resumo_fiscal.linhas
+            with instrumentacao.etapa('abas_resumo_fiscal'):
+                self._criar_abas_resumo_fiscal(writer)
+            self._verificar_cancelamento()
+            with instrumentacao.etapa('aba_outras_obrigacoes'):
+                self._processar_outras_obrigacoes(registros, writer)
+            # E110/E111 já são gerados junto com o E100; aqui apenas se não houver E100
+            if 'E110' not in writer.sheets and 'E111' not in writer.sheets:
+                with instrumentacao.etapa('abas_e110_e111'):
+                    self._processar_registros_e110_e111(registros, writer)
+            self._verificar_cancelamento()
+            with instrumentacao.etapa('aba_c170_com_ncm') as etapa:
+                self._criar_aba_c170_com_ncm(writer, registros)
+                etapa.linhas = len(registros.get('C170', ()))
+            self._verificar_cancelamento()
+
+            # O xlsxwriter monta e compacta o arquivo apenas ao fechar o workbook
+            with instrumentacao.etapa('gravacao_excel'):
+                if progresso is not None:
+                    progresso.gravacao()
+                writer.close()
+            # Cancelamento pedido durante a gravação: a saída também é descartada
+            self._verificar_cancelamento()
+            concluido = True
+        except (ConversaoCancelada, KeyboardInterrupt):
+            self.logger.info(f"Conversão cancelada; saída parcial removida: {caminho_saida}")
+            raise
+        except Exception:
+            self.logger.info(f"Erro na geração do Excel; saída parcial removida: {caminho_saida}")
+            raise
+        finally:
+            arquivo_excel.close()
+            if not concluido:
+                # O workbook não é gravado, mas seus temporários (memória constante) são removidos
+                if writer is not None:
+                    descartar_workbook(writer.book)
+                os.remove(caminho_saida)
+
+    def _verificar_cancelamento(self):
+        """Levanta ConversaoCancelada se o cancelamento da conversão foi pedido"""
+        if self.progresso is not None:
+            self.progresso.verificar()
+
+    def _estimar_linhas_excel(self, registros):
+        """Estima as linhas de dados do xlsx: abas de registros, consolidado, 197 e C170_com_NCM"""
+        total = sum(len(linhas) for linhas in registros.values())
+        for tipo in ('C190', 'C590', 'D190', 'D590', 'C197', 'D197', 'C170'):
+            total += len(registros.get(tipo, ()))
+        return total
+
+    def _processar_registros(self, registros, writer, formatar_data):
+        """Processa os registros e cria as abas do Excel"""
+        # Define a ordem desejada dos blocos, incluindo todos os possíveis
+        ordem_blocos = ['0', 'B', 'C', 'D', 'E', 'G', 'H', 'K', '1', '9']
+        registros_ordenados = []
+
+        # Agrupa os registros por bloco e ordena dentro de cada bloco
+        for bloco in ordem_blocos:
+            registros_bloco = [(k, v) for k, v in registros.items() if k.startswith(bloco)]
+            registros_bloco.sort(key=lambda x: x[0])  # Ordena por código do registro
+            registros_ordenados.extend(registros_bloco)
+
+        # Adiciona quaisquer outros registros que não começam com os blocos definidos
+        outros_registros = [(k, v) for k, v in registros.items()
+                            if not any(k.startswith(b) for b in ordem_blocos)]
+        if outros_registros:
+            outros_registros.sort(key=lambda x: x[0])
+            registros_ordenados.extend(outros_registros)
+
+        e110_e111_processado = False  # Flag para controlar processamento do E110/E111
+
+        # Processa os registros na ordem correta
+        for tipo_registro, linhas in registros_ordenados:
+            # Pula o processamento inicial de E110 e E111
+            if tipo_registro in ['E110', 'E111']:
+                continue
+
+            # Registros auxiliares da seleção (0000, C100/0200 do C170) não ganham aba
+            if self.selecao is not None and not self.selecao.escolhido(tipo_registro):
+                continue
+
+            if not linhas:
+                continue
+
+            try:
+                if hasattr(linhas, 'iterar_blocos'):
+                    escrito = self._escrever_registro_em_blocos(writer, tipo_registro, linhas)
+                else:
+                    escrito = self._escrever_registro(writer, tipo_registro, linhas)
+
+                # Se encontrou E100 e ainda não processou E110/E111
+                if escrito and tipo_registro == 'E100' and not e110_e111_processado:
+                    with self.instrumentacao.etapa('abas_e110_e111'):
+                        self._processar_registros_e110_e111(registros, writer)
+                    e110_e111_processado = True  # Marca como processado
+
+            except Exception as e:
+                self.logger.error(f"Erro ao processar registro {tipo_registro}: {str(e)}")
+                continue
+
+        # Log para debug
+        self.logger.info(f"Registros processados: {[reg[0] for reg in registros_ordenados]}")
+
+    def _escrever_registro(self, writer, tipo_registro, linhas):
+        """Cria as abas de um registro em memória; retorna False se o registro estiver vazio"""
+        with self.instrumentacao.etapa('conversao_tipos') as etapa:
+            df = self._dataframe_registro(tipo_registro, linhas)
+            etapa.linhas = len(linhas)
+        if df is None:
+            return False
+        formatos = self._formatos_registro(df)
+
+        # Registros acima do limite de linhas do Excel são divididos em
+        # abas C170_1, C170_2, ..., cada uma com cabeçalho e larguras próprios
+        for sheet_name, inicio, fim in self.escritor.particoes(tipo_registro, len(df)):
+            worksheet = writer.book.add_worksheet(sheet_name)
+            parte = df.iloc[inicio:fim]
+
+            # Escrever cabeçalhos e dados (datas com formato de data)
+            self.escritor.escrever_cabecalho(worksheet, 0, df.columns)
+            self.escritor.escrever_dataframe(worksheet, 1, parte, formatos)
+
+            self._formatar_planilha(writer, sheet_name, parte)
+        return True
+
+    def _escrever_registro_em_blocos(self, writer, tipo_registro, linhas):
+        """Cria as abas de um registro transferido para o disco, lendo-o bloco a bloco.
+
+        Cada bloco é convertido e gravado antes da leitura do seguinte; as larguras das
+        colunas consideram todos os blocos da aba.
+        """
+        escrito = False
+        for sheet_name, inicio, fim in self.escritor.particoes(tipo_registro, len(linhas)):
+            worksheet = None
+            linha_atual = 1
+            comprimentos = None
+            for bloco in linhas.iterar_blocos(inicio, fim):
+                with self.instrumentacao.etapa('conversao_tipos') as etapa:
+                    df = self._dataframe_registro(tipo_registro, bloco)
+                    etapa.linhas = len(bloco)
+                if df is None:
+                    continue
+                if worksheet is None:
+                    worksheet = writer.book.add_worksheet(sheet_name)
+                    self.escritor.escrever_cabecalho(worksheet, 0, df.columns)
+                linha_atual = self.escritor.escrever_dataframe(worksheet, linha_atual, df,
+                                                               self._formatos_registro(df))
+                comprimentos = self._maiores_comprimentos(comprimentos, self._comprimentos_colunas(df))
+
+            if worksheet is not None:
+                self._formatar_planilha(writer, sheet_name, None, comprimentos)
+                escrito = True
+        return escrito
+
+    def _formatos_registro(self, df):
+        """Formato de cada coluna de uma aba de registro (datas com formato de data)"""
+        return ['data' if pd.api.types.is_datetime64_any_dtype(df[coluna]) else None
+                for coluna in df.columns]
+
+    def _blocos(self, linhas):
+        """Gera as linhas de um registro em blocos: a lista inteira ou os segmentos em disco"""
+        if hasattr(linhas, 'iterar_blocos'):
+            yield from linhas.iterar_blocos()
+        else:
+            yield linhas
+
+    def _dataframe_registro(self, tipo_registro, linhas):
+        """Monta o DataFrame de um registro, com as colunas do layout, ou None se vazio"""
+        if hasattr(linhas, 'iterar_blocos'):
+            # Registro em disco lido inteiro (tabelas Parquet/CSV): um DataFrame por bloco
+            partes = [df for df in (self._dataframe_registro(tipo_registro, bloco)
+                                    for bloco in linhas.iterar_blocos()) if df is not None]
+            return pd.concat(partes, ignore_index=True) if partes else None
+        if hasattr(linhas, 'para_dataframe'):
+            # Armazém colunar: as colunas já estão nomeadas e os números tipados
+            df = linhas.para_dataframe()
+            if df.empty:
+                return None
+        else:
+            if hasattr(linhas, 'colunas_texto'):
+                # Armazém mapeado: colunas decodificadas direto do arquivo, sem LinhaMapeada
+                df = pd.DataFrame({indice: pd.Series(coluna, dtype=object) for indice, coluna
+                                   in enumerate(linhas.colunas_texto(vazio=None))})
+            else:
+                df = pd.DataFrame(linhas)
+            if df.empty or df.shape[1] <= 2:
+                return None
+            df = df.iloc[:, 1:-1]
+            df.columns = self._ajustar_colunas(tipo_registro, len(df.columns))
+
+        layout = obter_layout(tipo_registro)
+        return layout.converter_dataframe(df) if layout is not None else converter_tipos(df)
+
+    def _ajustar_colunas(self, tipo_registro, quantidade):
+        """Retorna os nomes das colunas do registro (campos além do layout viram Campo_N)"""
+        layout = obter_layout(tipo_registro)
+        if layout is None:
+            return [f'Campo_{i}' for i in range(1, quantidade + 1)]
+        return layout.colunas(quantidade)
+
+    def _formatar_planilha(self, writer, sheet_name, df, comprimentos=None):
+        """Formata as colunas da planilha Excel (larguras de `df` ou de `comprimentos`)"""
+        worksheet = writer.sheets[sheet_name]
+        if comprimentos is None:
+            comprimentos = self._comprimentos_colunas(df)
+        for i, max_length in enumerate(comprimentos):
+            if max_length is None:
+                worksheet.set_column(i, i, 15)
+            else:
+                worksheet.set_column(i, i, min(max_length + 2, 50))
+
+    def _comprimentos_colunas(self, df):
+        """Maior comprimento de texto de cada coluna, incluindo o cabeçalho (None se falhar)"""
+        comprimentos = []
+        for col in df.columns:
+            try:
+                col_length = df[col].astype(str).str.len().max()
+                header_length = len(str(col))
+                comprimentos.append(max(col_length if pd.notnull(col_length) else 0,
+                                        header_length))
+            except Exception:
+                comprimentos.append(None)
+        return comprimentos
+
+    def _maiores_comprimentos(self, anteriores, atuais):
+        """Combina os comprimentos de colunas de dois blocos da mesma aba"""
+        if anteriores is None:
+            return atuais
+        combinados = []
+        for anterior, atual in zip_longest(anteriores, atuais, fillvalue=0):
+            combinados.append(None if anterior is None or atual is None else max(anterior, atual))
+        return combinados
+
+    def _criar_aba_consolidada(self, writer, nome_empresa):
+        """Cria a aba consolidada com os registros fiscais"""
+        try:
+            # O resumo, somado durante a leitura, indica se há C190/C590/D190/D590
+            if self.resumo_fiscal.linhas:
+                self._processar_consolidado(writer, nome_empresa)
+
+        except Exception as e:
+            self.logger.error(f"Erro ao criar aba consolidada: {str(e)}")
+            raise
+
+    def _criar_abas_resumo_fiscal(self, writer):
+        """Cria as abas de totais por direção, CFOP, CST e alíquota a partir do resumo da leitura"""
+        try:
+            if not self.resumo_fiscal.totais:
+                return
+            for nome_aba, chaves in ABAS_RESUMO:
+                df_resumo = self.resumo_fiscal.tabela(chaves)
+                worksheet = writer.book.add_worksheet(nome_aba)
+
+                # Escrever cabeçalhos e dados
+                self.escritor.escrever_cabecalho(worksheet, 0, df_resumo.columns)
+                formatos = [None] * (len(chaves) + 1) + ['numero'] * len(VALORES_RESUMO)
+                self.escritor.escrever_dataframe(worksheet, 1, df_resumo, formatos)
+
+                # Ajustar largura das colunas
+                for i, col in enumerate(df_resumo.columns):
+                    worksheet.set_column(i, i, max(len(str(col)), 15))
+
+        except Exception as e:
+            self.logger.error(f"Erro ao criar abas de resumo fiscal: {str(e)}")
+            raise
+
+    def _montar_outras_obrigacoes(self, registros):
+        """Monta o DataFrame dos registros C197 e D197, ou None se não houver registros"""
+        # Definir o layout para C197/D197
+        layout_197 = ['REG', 'COD_AJ', 'DESCR_COMPL_AJ', 'COD_ITEM',
+                      'VL_BC_ICMS', 'ALIQ_ICMS', 'VL_ICMS', 'VL_OUTROS']
+
+        # Campos lidos por posição (REG na posição 1), campos ausentes vazios
+        posicoes_197 = {nome: posicao for posicao, nome in enumerate(layout_197, 1)}
+        partes = [self._colunas_por_posicao(registros[tipo], layout_197, posicoes_197)
+                  for tipo in ('C197', 'D197') if tipo in registros and registros[tipo]]
+
+        if not partes:
+            return None
+
+        # Criar DataFrame com todos os registros
+        df_197 = pd.concat(partes, ignore_index=True)
+
+        # Converter campos numéricos
+        campos_numericos = ['VL_BC_ICMS', 'ALIQ_ICMS', 'VL_ICMS', 'VL_OUTROS']
+        for campo in campos_numericos:
+            df_197[campo] = np.nan_to_num(converter_decimais(df_197[campo].tolist()))
+
+        return df_197
+
+    def _montar_resumo_197(self, df_197):
+        """Agrupa os registros 197 por REG, COD_AJ e DESCR_COMPL_AJ, somando o VL_ICMS"""
+        return df_197.groupby(['REG', 'COD_AJ', 'DESCR_COMPL_AJ'])['VL_ICMS'].sum().reset_index()
+
+    def _processar_outras_obrigacoes(self, registros, writer):
+        """Processa os registros C197 e D197 e cria a aba de Outras Obrigações"""
+        try:
+            df_197 = self._montar_outras_obrigacoes(registros)
+            if df_197 is not None:
+                layout_197 = list(df_197.columns)
+
+                # Criar aba Outras_Obrigações_197 (dividida se passar do limite do Excel)
+                formatos = [None] * 4 + ['numero'] * 4  # campos numéricos nos índices 4 a 7
+                for nome_aba, inicio, fim in self.escritor.particoes('Outras_Obrigacoes_197',
+                                                                     len(df_197)):
+                    worksheet = writer.book.add_worksheet(nome_aba)
+
+                    # Escrever cabeçalhos e dados
+                    self.escritor.escrever_cabecalho(worksheet, 0, layout_197)
+                    self.escritor.escrever_dataframe(worksheet, 1, df_197.iloc[inicio:fim], formatos)
+
+                    # Ajustar largura das colunas
+                    for i, col in enumerate(layout_197):
+                        worksheet.set_column(i, i, max(len(str(col)), 15))
+
+                # Criar tabela resumo
+                self._criar_tabela_resumo_197(df_197, writer)
+
+        except Exception as e:
+            self.logger.error(f"Erro ao processar outras obrigações: {str(e)}")
+            raise
+
+    def _criar_tabela_resumo_197(self, df_197, writer):
+        """Cria a tabela resumo dos registros 197"""
+        try:
+            # Agrupar dados por REG, COD_AJ e DESCR_COMPL_AJ
+            resumo = self._montar_resumo_197(df_197)
+
+            # Criar nova worksheet para o resumo
+            worksheet = writer.book.add_worksheet('Resumo_Outras_Obrigacoes')
+
+            # Escrever cabeçalhos e dados
+            headers = ['REG', 'COD_AJ', 'DESCR_COMPL_AJ', 'VL_ICMS']
+            self.escritor.escrever_cabecalho(worksheet, 0, headers)
+            self.escritor.escrever_dataframe(worksheet, 1, resumo[headers], [None, None, None, 'numero'])
+
+            # Ajustar largura das colunas
+            worksheet.set_column(0, 0, 15)  # REG
+            worksheet.set_column(1, 1, 20)  # COD_AJ
+            worksheet.set_column(2, 2, 50)  # DESCR_COMPL_AJ
+            worksheet.set_column(3, 3, 15)  # VL_ICMS
+
+        except Exception as e:
+            self.logger.error(f"Erro ao criar tabela resumo: {str(e)}")
+            raise
+
+    def _processar_registros_e110_e111(self, registros, writer):
+        """Processa os registros E110 e E111, convertendo campos numéricos"""
+        try:
+            # Definir os layouts
+            layout_e110 = ['REG', 'VL_TOT_DEBITOS', 'VL_AJ_DEBITOS', 'VL_TOT_AJ_DEBITOS',
+                           'VL_ESTORNOS_CRED', 'VL_TOT_CREDITOS', 'VL_AJ_CREDITOS',
+                           'VL_TOT_AJ_CREDITOS', 'VL_ESTORNOS_DEB', 'VL_SLD_CREDOR_ANT',
+                           'VL_SLD_APURADO', 'VL_TOT_DED', 'VL_ICMS_RECOLHER',
+                           'VL_SLD_CREDOR_TRANSPORTAR', 'DEB_ESP']
+
+            layout_e111 = ['REG', 'COD_AJ_APUR', 'DESCR_COMPL_AJ', 'VL_AJ_APUR']
+
+            # Processar E110
+            if 'E110' in registros and registros['E110']:
+                posicoes = {nome: posicao for posicao, nome in enumerate(layout_e110, 1)}
+                df_e110 = self._colunas_por_posicao(registros['E110'], layout_e110, posicoes)
+
+                # Converter todos os campos que começam com VL_ ou DEB_
+                for col in df_e110.columns:
+                    if col.startswith('VL_') or col.startswith('DEB_'):
+                        df_e110[col] = np.nan_to_num(converter_decimais(df_e110[col].tolist()))
+
+                # Se a aba E110 já existe, usá-la; caso contrário, criar nova
+                if 'E110' in writer.sheets:
+                    worksheet = writer.sheets['E110']
+                else:
+                    worksheet = writer.book.add_worksheet('E110')
+                    # Escrever cabeçalhos apenas se for uma nova planilha
+                    self.escritor.escrever_cabecalho(worksheet, 0, layout_e110)
+                    for col, header in enumerate(layout_e110):
+                        worksheet.set_column(col, col, max(len(header), 15))
+
+                # Escrever dados
+                formatos = ['numero' if col.startswith(('VL_', 'DEB_')) else None for col in layout_e110]
+                self.escritor.escrever_dataframe(worksheet, 1, df_e110, formatos)
+
+            # Processar E111
+            if 'E111' in registros and registros['E111']:
+                posicoes = {nome: posicao for posicao, nome in enumerate(layout_e111, 1)}
+                df_e111 = self._colunas_por_posicao(registros['E111'], layout_e111, posicoes)
+
+                # Converter o campo VL_AJ_APUR para numérico
+                df_e111['VL_AJ_APUR'] = np.nan_to_num(converter_decimais(df_e111['VL_AJ_APUR'].tolist()))
+
+                # Se a aba E111 já existe, usá-la; caso contrário, criar nova
+                if 'E111' in writer.sheets:
+                    worksheet = writer.sheets['E111']
+                else:
+                    worksheet = writer.book.add_worksheet('E111')
+                    # Escrever cabeçalhos apenas se for uma nova planilha
+                    self.escritor.escrever_cabecalho(worksheet, 0, layout_e111)
+                    for col, header in enumerate(layout_e111):
+                        worksheet.set_column(col, col, max(len(header), 20))
+
+                # Escrever dados
+                formatos = ['numero' if col == 'VL_AJ_APUR' else None for col in layout_e111]
+                self.escritor.escrever_dataframe(worksheet, 1, df_e111, formatos)
+
+        except Exception as e:
+            self.logger.error(f"Erro ao processar registros E110/E111: {str(e)}")
+            raise
+
+    def _criar_aba_c170_com_ncm(self, writer, registros):
+        """Cria aba C170 integrada com NCM do registro 0200 - VERSÃO FINAL CORRIGIDA"""
+        try:
+            if hasattr(registros.get('C170'), 'iterar_blocos'):
+                # C170 em disco: contagens em uma primeira passada, dados bloco a bloco
+                resultado = self._montar_c170_com_ncm_em_blocos(registros)
+            else:
+                resultado = self._montar_c170_com_ncm(registros)
+                if resultado is not None:
+                    df_c170, encontrados, nao_encontrados = resultado
+                    resultado = (list(df_c170.columns), lambda inicio, fim: [df_c170.iloc[inicio:fim]],
+                                 encontrados, nao_encontrados, len(df_c170))
+            if resultado is None:
+                return False
+            todas_colunas, partes, contador_encontrados, contador_nao_encontrados, total = resultado
+
+            # PASSO 3: Criar Excel
+            self.logger.info("Passo 3: Gerando Excel...")
+
+            # Título com estatísticas do total de linhas
+            percentual = (contador_encontrados / total * 100) if total else 0
+            titulo = f'C170 + NCM (Campo 8 do 0200) - Encontrados: {contador_encontrados} | Não Encontrados: {contador_nao_encontrados} | Taxa: {percentual:.1f}%'
+
+            # Título e cabeçalho ocupam 2 linhas de cada aba; acima do limite do Excel os
+            # dados são divididos em C170_com_NCM_1, C170_com_NCM_2, ...
+            for nome_aba, inicio, fim in self.escritor.particoes('C170_com_NCM', total,
+                                                                 linhas_reservadas=2):
+                worksheet = writer.book.add_worksheet(nome_aba)
+
+                # Título (linha 0), escrito antes dos dados para manter a ordem de linhas
+                # exigida pelo modo de memória constante
+                worksheet.merge_range(0, 0, 0, len(todas_colunas)-1, titulo, self.escritor.formato('titulo'))
+
+                # Cabeçalho na linha 1, dados a partir da linha 2
+                self.escritor.escrever_cabecalho(worksheet, 1, todas_colunas, formato=None)
+                linha_atual = 2
+                for parte in partes(inicio, fim):
+                    linha_atual = self.escritor.escrever_dataframe(worksheet, linha_atual, parte)
+
+                # Ajustar colunas
+                for col, cabecalho in enumerate(todas_colunas):
+                    if cabecalho == 'COD_ITEM':
+                        worksheet.set_column(col, col, 15)
+                    elif cabecalho in ['DESCR_COMPL', 'DESCR_CADASTRAL']:
+                        worksheet.set_column(col, col, 35)
+                    elif cabecalho == 'NCM_PRODUTO':
+                        worksheet.set_column(col, col, 12)
+                    elif cabecalho == 'STATUS_VINCULACAO':
+                        worksheet.set_column(col, col, 18)
+                    else:
+                        worksheet.set_column(col, col, 12)
+
+            # Log final
+            self.logger.info(f"=== CONCLUÍDO ===")
+            self.logger.info(f"Processados: {total}")
+            self.logger.info(f"Encontrados: {contador_encontrados}")
+            self.logger.info(f"Não encontrados: {contador_nao_encontrados}")
+            self.logger.info(f"Taxa de sucesso: {percentual:.1f}%")
+
+            return True
+
+        except Exception as e:
+            self.logger.error(f"ERRO CRÍTICO: {str(e)}")
+            import traceback
+            self.logger.error(traceback.format_exc())
+            return False
+
+    def _montar_c170_com_ncm(self, registros):
+        """Monta o C170 com os campos do C100 e o NCM do 0200, por junção em COD_ITEM.
+
+        Retorna (DataFrame, encontrados, não encontrados) ou None se não houver dados.
+        """
+        contexto = self._contexto_c170_com_ncm(registros)
+        if contexto is None:
+            return None
+        df, encontrado, no_catalogo = self._juncao_c170_com_ncm(registros, registros['C170'], 0, contexto)
+
+        contador_catalogo = int(no_catalogo.sum())
+        contador_encontrados = int(encontrado.sum()) + contador_catalogo
+        contador_nao_encontrados = len(df) - contador_encontrados
+        self.logger.info(f"C170_com_NCM: {len(contexto['produtos'])} produtos no 0200, "
+                         f"{contador_encontrados} itens encontrados "
+                         f"({contador_catalogo} pelo catálogo), "
+                         f"{contador_nao_encontrados} não encontrados")
+        return df, contador_encontrados, contador_nao_encontrados
+
+    def _montar_c170_com_ncm_em_blocos(self, registros):
+        """Prepara o C170_com_NCM de um C170 em disco, sem montá-lo inteiro na memória.
+
+        As contagens do título vêm de uma primeira leitura, só do COD_ITEM; a segunda
+        leitura faz a junção bloco a bloco. Retorna (colunas, partes(inicio, fim),
+        encontrados, não encontrados, total) ou None se não houver dados.
+        """
+        contexto = self._contexto_c170_com_ncm(registros)
+        if contexto is None:
+            return None
+        linhas_c170 = registros['C170']
+        posicao = contexto['layout'].posicoes['COD_ITEM']
+        quantidades = Counter()
+        for bloco in linhas_c170.iterar_blocos():
+            quantidades.update(campos[posicao].strip() if len(campos) > posicao else ''
+                               for campos in bloco)
+
+        chaves_0200 = set(contexto['produtos']['CHAVE'])
+        contador_encontrados = sum(quantidade for chave, quantidade in quantidades.items()
+                                   if chave in chaves_0200)
+        contador_catalogo = 0
+        if self.catalogo is not None:
+            # Uma única consulta ao catálogo, reaproveitada por todos os blocos
+            ausentes = [chave for chave in quantidades if chave not in chaves_0200]
+            contexto['catalogo'] = self._buscar_catalogo(registros, ausentes)
+            contador_catalogo = sum(quantidades[chave] for chave in contexto['catalogo']
+                                    if chave in quantidades and chave not in chaves_0200)
+        contador_encontrados += contador_catalogo
+        contador_nao_encontrados = len(linhas_c170) - contador_encontrados
+        self.logger.info(f"C170_com_NCM: {len(contexto['produtos'])} produtos no 0200, "
+                         f"{contador_encontrados} itens encontrados "
+                         f"({contador_catalogo} pelo catálogo), "
+                         f"{contador_nao_encontrados} não encontrados")
+
+        def partes(inicio, fim):
+            posicao_bloco = inicio
+            for bloco in linhas_c170.iterar_blocos(inicio, fim):
+                df, _, _ = self._juncao_c170_com_ncm(registros, bloco, posicao_bloco, contexto)
+                posicao_bloco += len(bloco)
+                yield df
+
+        colunas = (list(contexto['layout'].nomes) + contexto['colunas_c100'] +
+                   list(VALORES_CATALOGO_0200) + ['STATUS_VINCULACAO'])
+        return colunas, partes, contador_encontrados, contador_nao_encontrados, len(linhas_c170)
+
+    def _contexto_c170_com_ncm(self, registros):
+        """Dados comuns a todas as linhas do C170_com_NCM (0200, campos do C100, pais), ou None"""
+        # Verificar se existem os registros necessários
+        if 'C170' not in registros or not registros['C170']:
+            self.logger.info("Registro C170 não encontrado")
+            return None
+
+        # Sem 0200 no arquivo, os NCM ainda podem vir do catálogo de períodos anteriores
+        if not registros.get('0200') and self.catalogo is None:
+            self.logger.info("Registro 0200 não encontrado")
+            return None
+
+        # Campos do documento C100 de cada item, obtidos pelo índice da hierarquia
+        colunas_c100 = ['DT_DOC', 'NUM_DOC', 'CHV_NFE', 'COD_PART']
+        df_c100 = None
+        pais = self.hierarquia.indices_pai('C170') if self.hierarquia is not None else None
+        if pais is not None and len(pais) == len(registros['C170']) and registros.get('C100'):
+            df_c100 = self._colunas_por_posicao(registros['C100'], colunas_c100,
+                                                obter_layout('C100').posicoes)
+            # Itens sem C100 aberto (-1) apontam para uma linha vazia no fim
+            df_c100.loc[len(df_c100)] = ''
+
+        return {
+            'layout': obter_layout('C170'),
+            'colunas_c100': colunas_c100,
+            'pais': pais,
+            'c100': df_c100,
+            'produtos': self._produtos_0200(registros),
+            # {COD_ITEM: (NCM, descrição, tipo)} já consultado no catálogo, se houver
+            'catalogo': None,
+        }
+
+    def _juncao_c170_com_ncm(self, registros, linhas, inicio, contexto):
+        """Junta as `linhas` do C170 (a partir da linha `inicio`) com o C100 e o 0200.
+
+        Retorna (DataFrame, encontrado no 0200, encontrado no catálogo) com as máscaras por linha.
+        """
+        # Campos do C170 nas posições fixas do layout
+        layout_c170 = contexto['layout']
+        df = self._colunas_por_posicao(linhas, layout_c170.nomes, layout_c170.posicoes)
+
+        df_c100 = contexto['c100']
+        if df_c100 is not None:
+            pais = contexto['pais'][inicio:inicio + len(df)]
+            indices = np.where(pais >= 0, pais, len(df_c100) - 1)
+            for coluna in contexto['colunas_c100']:
+                df[coluna] = df_c100[coluna].to_numpy()[indices]
+        else:
+            for coluna in contexto['colunas_c100']:
+                df[coluna] = ''
+
+        juncao = pd.merge(df['COD_ITEM'].str.strip().to_frame('CHAVE'), contexto['produtos'],
+                          on='CHAVE', how='left', sort=False, indicator=True)
+        encontrado = (juncao['_merge'] == 'both').to_numpy()
+
+        # Itens fora do 0200 do arquivo: busca no catálogo persistente do CNPJ
+        no_catalogo = np.zeros(len(juncao), dtype=bool)
+        if self.catalogo is not None and not encontrado.all():
+            chaves = juncao['CHAVE']
+            encontrados_catalogo = contexto['catalogo']
+            if encontrados_catalogo is None:
+                encontrados_catalogo = self._buscar_catalogo(registros, chaves[~encontrado].unique())
+            if encontrados_catalogo:
+                no_catalogo = ~encontrado & chaves.isin(list(encontrados_catalogo)).to_numpy()
+                for k, coluna in enumerate(VALORES_CATALOGO_0200):
+                    juncao.loc[no_catalogo, coluna] = [encontrados_catalogo[chave][k]
+                                                       for chave in chaves[no_catalogo]]
+
+        for coluna, (vazio, nao_localizado) in VALORES_CATALOGO_0200.items():
+            valores = juncao[coluna]
+            df[coluna] = valores.where(valores.str.strip() != '', vazio).fillna(nao_localizado).to_numpy()
+        df['STATUS_VINCULACAO'] = np.select([encontrado, no_catalogo],
+                                            ['ENCONTRADO', 'ENCONTRADO NO CATÁLOGO'], 'NÃO ENCONTRADO')
+        return df, encontrado, no_catalogo
+
+    def _produtos_0200(self, registros):
+        """Retorna CHAVE (COD_ITEM), NCM_PRODUTO, DESCR_CADASTRAL e TIPO_ITEM do 0200 do arquivo.
+
+        Os campos são lidos nas posições do layout; o último cadastro de cada código prevalece.
+        """
+        produtos = self._colunas_por_posicao(
+            registros.get('0200') or [], ['COD_ITEM', 'COD_NCM', 'DESCR_ITEM', 'TIPO_ITEM'],
+            obter_layout('0200').posicoes)
+        produtos.columns = ['CHAVE'] + list(VALORES_CATALOGO_0200)
+        produtos['CHAVE'] = produtos['CHAVE'].str.strip()
+        return produtos[produtos['CHAVE'] != ''].drop_duplicates('CHAVE', keep='last')
+
+    def _contribuinte(self, registros):
+        """Retorna (CNPJ ou CPF, data inicial AAAA-MM-DD) do registro 0000, ou (None, None)"""
+        if not registros.get('0000'):
+            return None, None
+        campos = registros['0000'][0]
+        posicoes = obter_layout('0000').posicoes
+        documento = next((campos[posicoes[nome]] for nome in ('CNPJ', 'CPF')
+                          if len(campos) > posicoes[nome] and campos[posicoes[nome]]), None)
+        data_inicial = campos[posicoes['DT_INI']] if len(campos) > posicoes['DT_INI'] else ''
+        return documento, converter_data_texto(data_inicial)
+
+    def atualizar_catalogo(self, registros):
+        """Grava o 0200 do arquivo no catálogo persistente de produtos, se configurado"""
+        if self.catalogo is None or not registros.get('0200'):
+            return
+        documento, periodo = self._contribuinte(registros)
+        if not documento or not periodo:
+            self.logger.warning("Catálogo 0200 não atualizado: registro 0000 sem CNPJ/CPF ou DT_INI")
+            return
+        produtos = self._produtos_0200(registros)
+        try:
+            self.catalogo.atualizar(documento, periodo, produtos[
+                ['CHAVE', 'DESCR_CADASTRAL', 'TIPO_ITEM', 'NCM_PRODUTO']].itertuples(index=False, name=None))
+        except sqlite3.Error as e:
+            # O catálogo é um complemento: a conversão segue sem ele
+            self.logger.warning(f"Erro ao atualizar o catálogo 0200: {str(e)}")
+
+    def _buscar_catalogo(self, registros, codigos):
+        """Busca os códigos no catálogo do CNPJ do arquivo; retorna {COD_ITEM: (NCM, descrição, tipo)}"""
+        documento, _ = self._contribuinte(registros)
+        if not documento or not len(codigos):
+            return {}
+        try:
+            return self.catalogo.buscar(documento, codigos)
+        except sqlite3.Error as e:
+            self.logger.warning(f"Erro ao consultar o catálogo 0200: {str(e)}")
+            return {}
+
+    def _colunas_por_posicao(self, linhas, nomes, posicoes):
+        """Monta um DataFrame de texto com os campos `nomes`, lidos nas `posicoes` do layout"""
+        if hasattr(linhas, 'iterar_blocos'):
+            # Registro em disco: transposição por bloco, mantendo apenas as colunas pedidas
+            partes = [self._colunas_por_posicao(bloco, nomes, posicoes)
+                      for bloco in linhas.iterar_blocos()]
+            if not partes:
+                return self._colunas_por_posicao([], nomes, posicoes)
+            return pd.concat(partes, ignore_index=True)
+        if hasattr(linhas, 'colunas_texto'):
+            # Armazém colunar ou mapeado: só os campos pedidos, lidos coluna a coluna
+            colunas = linhas.colunas_texto([posicoes[nome] for nome in nomes])
+            return pd.DataFrame({nome: pd.Series(coluna, dtype=object)
+                                 for nome, coluna in zip(nomes, colunas)})
+        # Transposição das linhas em colunas (campos ausentes em linhas curtas viram '')
+        colunas = list(zip_longest(*linhas, fillvalue=''))
+        vazia = ('',) * len(linhas)
+        return pd.DataFrame({
+            nome: pd.Series(colunas[posicoes[nome]] if posicoes[nome] < len(colunas) else vazia,
+                            dtype=object)
+            for nome in nomes
+        })
+
+    def _processar_consolidado(self, writer, nome_empresa):
+        try:
+            header_format = self.escritor.formato('cabecalho')
+
+            # Get company info
+            cnpj = self.registros.get('0000', [[]])[0][7] if self.registros.get('0000') else ""
+            empresa_cnpj = f"{nome_empresa} - CNPJ: {cnpj}" if cnpj else nome_empresa
+
+            df_consolidado = self._montar_consolidado(self.registros)
+            verificacao = self.resumo_fiscal.verificacao()
+
+            if not df_consolidado.empty:
+                # Title, blank row and header take 3 rows of each sheet; above the Excel row
+                # limit the data is split into Consolidado_Fiscal_1, Consolidado_Fiscal_2, ...
+                particoes = self.escritor.particoes('Consolidado_Fiscal', len(df_consolidado),
+                                                    linhas_reservadas=3)
+                for numero, (nome_aba, inicio, fim) in enumerate(particoes):
+                    worksheet = writer.book.add_worksheet(nome_aba)
+                    worksheet.merge_range('A1:L1', empresa_cnpj, header_format)
+
+                    # Write consolidated data, with the verification table beside it (first sheet)
+                    self._escrever_dados_consolidados(worksheet, df_consolidado.iloc[inicio:fim],
+                                                      header_format, writer,
+                                                      verificacao if numero == 0 else None)
+
+                return df_consolidado
+
+            worksheet = writer.book.add_worksheet('Consolidado_Fiscal')
+            worksheet.merge_range('A1:L1', empresa_cnpj, header_format)
+            return df_consolidado
+
+        except Exception as e:
+            self.logger.error(f"Erro ao processar aba consolidada: {str(e)}")
+            raise
+
+    def _montar_consolidado(self, registros):
+        """Monta o DataFrame consolidado (detalhe) de C190/C590/D190/D590"""
+        # Get SPED date
+        data_sped = np.datetime64('NaT', 'D')
+        if '0000' in registros and registros['0000']:
+            data_sped = converter_datas([registros['0000'][0][4]])[0]
+
+        # Process records: each register type is converted column by column
+        partes = []
+        for tipo_reg in ['C190', 'C590', 'D190', 'D590']:
+            if tipo_reg in registros and registros[tipo_reg]:
+                # Registros em disco são convertidos bloco a bloco; só os campos fiscais ficam
+                for bloco in self._blocos(registros[tipo_reg]):
+                    df_registro = self._dataframe_registro(tipo_reg, bloco)
+                    if df_registro is None:
+                        continue
+                    df_fiscal = self._converter_registro_fiscal(tipo_reg, df_registro, data_sped)
+                    partes.append(df_fiscal)
+
+        # Create consolidated DataFrame
+        if partes:
+            df_consolidado = pd.concat(partes, ignore_index=True)
+
+            # Define column order
+            colunas_ordem = ['Data', 'CST_ICMS', 'CFOP', 'ALIQ_ICMS', 'VL_OPR', 'VL_BC_ICMS',
+                             'VL_ICMS', 'VL_BC_ICMS_ST', 'VL_ICMS_ST', 'VL_RED_BC', 'VL_IPI',
+                             'COD_OBS', 'Tipo_Registro']
+
+            df_consolidado = df_consolidado[colunas_ordem]
+
+            return df_consolidado
+
+        return pd.DataFrame()
+
+    def _converter_registro_fiscal(self, tipo_reg, df_registro, data_sped):
+        """Convert all rows of one fiscal record type (C190/C590/D190/D590) at once.
+
+        Empty values become 0; rows with non-numeric values are logged and skipped.
+        """
+        quantidade = len(df_registro)
+        invalidos = np.zeros(quantidade, dtype=bool)
+
+        def numerico(campo):
+            # Only C190 carries VL_IPI; D190 has no ST fields
+            if campo not in df_registro.columns or (campo == 'VL_IPI' and tipo_reg != 'C190'):
+                return np.zeros(quantidade)
+            serie = df_registro[campo]
+            if pd.api.types.is_numeric_dtype(serie):
+                valores = serie.to_numpy(dtype=np.float64)
+                return np.where(np.isnan(valores), 0, valores)
+            textos = serie.fillna('').astype(str).str.strip().to_numpy()
+            valores = converter_decimais(textos)
+            vazios = textos == ''
+            invalidos[np.isnan(valores) & ~vazios] = True
+            return np.where(vazios, 0, valores)
+
+        dados = {'Data': np.full(quantidade, data_sped)}
+        for campo in ['CST_ICMS', 'CFOP', 'ALIQ_ICMS', 'VL_OPR', 'VL_BC_ICMS', 'VL_ICMS',
+                      'VL_BC_ICMS_ST', 'VL_ICMS_ST', 'VL_RED_BC', 'VL_IPI']:
+            dados[campo] = numerico(campo)
+        dados['COD_OBS'] = (df_registro['COD_OBS'].fillna('').astype(str).to_numpy()
+                            if 'COD_OBS' in df_registro.columns else np.full(quantidade, ''))
+        dados['Tipo_Registro'] = tipo_reg
+
+        df_fiscal = pd.DataFrame(dados)
+        if invalidos.any():
+            self.logger.error(f"Erro processando registro {tipo_reg}: "
+                              f"{int(invalidos.sum())} linha(s) com valores não numéricos ignorada(s)")
+            df_fiscal = df_fiscal[~invalidos].reset_index(drop=True)
+
+        df_fiscal['CST_ICMS'] = df_fiscal['CST_ICMS'].astype(np.int64)
+        df_fiscal['CFOP'] = df_fiscal['CFOP'].astype(np.int64)
+        return df_fiscal
+
+    def _escrever_dados_consolidados(self, worksheet, df_consolidado, header_format, writer, verificacao):
+        """Write consolidated data to worksheet with proper date formatting.
+
+        The verification table sits beside the data (same rows), so both are written
+        together, row by row in ascending order, as required by constant memory mode.
+        """
+        # Write headers
+        self.escritor.escrever_cabecalho(worksheet, 2, df_consolidado.columns)
+        for col_num in range(len(df_consolidado.columns)):
+            worksheet.set_column(col_num, col_num, 15)
+        col_verificacao = len(df_consolidado.columns) + 2
+        if verificacao:
+            self._escrever_cabecalho_verificacao(worksheet, 2, col_verificacao)
+
+        # Date column, text columns, numeric columns (4 to 10), text columns
+        formatos = ['data', None, None, None] + ['numero_simples'] * 7 + [None, None]
+
+        # First rows: data and verification table side by side
+        linhas_verificacao = list(verificacao.items()) if verificacao else []
+        for i, (tipo, contagem) in enumerate(linhas_verificacao):
+            self.escritor.escrever_dataframe(worksheet, 3 + i, df_consolidado.iloc[i:i + 1], formatos)
+            self._escrever_linha_verificacao(worksheet, 3 + i, col_verificacao, tipo, contagem)
+
+        # Remaining data rows
+        self.escritor.escrever_dataframe(worksheet, 3 + len(linhas_verificacao),
+                                         df_consolidado.iloc[len(linhas_verificacao):], formatos)
+
+    def _escrever_cabecalho_verificacao(self, worksheet, row, col_start):
+        """Write verification table headers and column widths"""
+        headers = ['Registro', 'Registros na Origem', 'Registros Processados', 'Status']
+        self.escritor.escrever_cabecalho(worksheet, row, headers, 'cabecalho_verificacao',
+                                         coluna_inicial=col_start)
+        for col in range(len(headers)):
+            worksheet.set_column(col_start + col, col_start + col, 20)
+
+    def _escrever_linha_verificacao(self, worksheet, row, col_start, tipo, contagem):
+        """Write one row of the verification table"""
+        status = "OK" if contagem['origem'] == contagem['processado'] else "DIVERGENTE"
+        self.escritor.escrever_linhas(
+            worksheet, row,
+            [[tipo, contagem['origem'], contagem['processado'], status]],
+            ['celula', 'celula', 'celula', 'sucesso' if status == "OK" else 'alerta'],
+            coluna_inicial=col_start
+        )
+
+    def obter_layout_registro(self, tipo_registro):
+        """Retorna uma cópia dos nomes de campos do registro no Guia Prático, ou None"""
+        return nomes_campos(tipo_registro)
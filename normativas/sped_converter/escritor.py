@@ -0,0 +1,171 @@
+"""
+Escrita em bloco das abas do Excel.
+
+Substitui os laços `df.iterrows()` + `worksheet.write(...)` das abas por uma escrita
+de linhas inteiras: os DataFrames são convertidos em listas por blocos, os formatos
+são criados uma única vez por workbook e resolvidos por coluna antes da escrita, e
+cada valor vai direto para o método do seu tipo (write_string/write_number).
+"""
+
+import os
+
+# Definição dos formatos usados pelas abas do conversor
+FORMATOS = {
+    'cabecalho': {
+        'bold': True,
+        'text_wrap': True,
+        'valign': 'top',
+        'fg_color': '#D7E4BC',
+        'border': 1
+    },
+    'cabecalho_verificacao': {
+        'bold': True,
+        'bg_color': '#D7E4BC',
+        'border': 1
+    },
+    'titulo': {
+        'bold': True,
+        'font_size': 14,
+        'bg_color': '#366092',
+        'font_color': 'white',
+        'align': 'center'
+    },
+    'numero': {'num_format': '#,##0.00', 'border': 1},
+    'numero_simples': {'num_format': '#,##0.00'},
+    'data': {'num_format': 'dd/mm/yyyy'},
+    'celula': {'border': 1},
+    'alerta': {
+        'bg_color': '#FFC7CE',
+        'font_color': '#9C0006',
+        'border': 1
+    },
+    'sucesso': {
+        'bg_color': '#C6EFCE',
+        'font_color': '#006100',
+        'border': 1
+    }
+}
+
+# Quantidade de linhas do DataFrame convertidas para listas Python de cada vez
+TAMANHO_BLOCO = 10000
+
+# Limites do formato xlsx
+LIMITE_LINHAS_EXCEL = 1048576
+TAMANHO_MAXIMO_NOME_ABA = 31
+
+
+def descartar_workbook(workbook):
+    """Descarta um workbook xlsxwriter sem gravá-lo.
+
+    No modo de memória constante cada aba guarda suas linhas em um arquivo temporário,
+    removido apenas quando o workbook é montado; aqui eles são fechados e removidos.
+    """
+    for worksheet in workbook.worksheets():
+        if worksheet.row_data_fh is None:
+            continue
+        try:
+            worksheet.row_data_fh.close()
+            os.remove(worksheet.row_data_filename)
+        except OSError:
+            pass
+    workbook.fileclosed = True
+
+
+class EscritorPlanilhas:
+    """Escreve linhas inteiras nas abas de um workbook xlsxwriter"""
+
+    def __init__(self, workbook, limite_linhas=LIMITE_LINHAS_EXCEL, progresso=None):
+        self.workbook = workbook
+        self.limite_linhas = limite_linhas
+        # Progresso opcional: recebe as linhas gravadas em cada aba
+        self.progresso = progresso
+        self._formatos = {}
+
+    def formato(self, nome):
+        """Retorna o formato `nome`, criando-o no workbook apenas na primeira vez"""
+        if nome is None:
+            return None
+        formato = self._formatos.get(nome)
+        if formato is None:
+            formato = self._formatos[nome] = self.workbook.add_format(FORMATOS[nome])
+        return formato
+
+    def particoes(self, nome, total_linhas, linhas_reservadas=1):
+        """Divide `total_linhas` de dados em abas que respeitam o limite de linhas do Excel.
+
+        `linhas_reservadas` são as linhas de título/cabeçalho repetidas em cada aba. Gera
+        tuplas (nome_aba, inicio, fim); se tudo couber em uma aba o nome é mantido, senão
+        as abas recebem os sufixos _1, _2, ...
+        """
+        capacidade = self.limite_linhas - linhas_reservadas
+        if capacidade <= 0:
+            raise ValueError(f"Limite de {self.limite_linhas} linhas não comporta o cabeçalho")
+
+        quantidade = max(1, -(-total_linhas // capacidade))
+        for numero in range(1, quantidade + 1):
+            if quantidade == 1:
+                nome_aba = nome[:TAMANHO_MAXIMO_NOME_ABA]
+            else:
+                sufixo = f'_{numero}'
+                nome_aba = nome[:TAMANHO_MAXIMO_NOME_ABA - len(sufixo)] + sufixo
+            inicio = (numero - 1) * capacidade
+            yield nome_aba, inicio, min(total_linhas, inicio + capacidade)
+
+    def escrever_cabecalho(self, worksheet, linha, colunas, formato='cabecalho', coluna_inicial=0):
+        """Escreve uma linha de cabeçalho"""
+        worksheet.write_row(linha, coluna_inicial, list(colunas), self.formato(formato))
+
+    def escrever_linhas(self, worksheet, linha_inicial, linhas, formatos=None, coluna_inicial=0):
+        """Escreve uma sequência de linhas (listas) a partir de `linha_inicial`.
+
+        `formatos` é uma lista com o nome do formato de cada coluna (ou None). Texto e
+        números vão direto para write_string/write_number, sem a detecção de tipo de
+        `worksheet.write`; células vazias sem formato não são escritas. Retorna o número
+        da próxima linha livre.
+        """
+        formatos_coluna = [self.formato(nome) for nome in formatos] if formatos else []
+        quantidade_formatos = len(formatos_coluna)
+        write_string = worksheet.write_string
+        write_number = worksheet.write_number
+        write_blank = worksheet.write_blank
+        write = worksheet.write
+
+        linha_atual = linha_inicial
+        for linha in linhas:
+            coluna = coluna_inicial
+            for indice, valor in enumerate(linha):
+                formato = formatos_coluna[indice] if indice < quantidade_formatos else None
+                tipo = type(valor)
+                if tipo is str:
+                    if valor:
+                        write_string(linha_atual, coluna, valor, formato)
+                    elif formato is not None:
+                        write_blank(linha_atual, coluna, None, formato)
+                elif tipo is float or tipo is int:
+                    if valor == valor:  # NaN fica vazio
+                        write_number(linha_atual, coluna, valor, formato)
+                    elif formato is not None:
+                        write_blank(linha_atual, coluna, None, formato)
+                elif valor is None:
+                    if formato is not None:
+                        write_blank(linha_atual, coluna, None, formato)
+                else:
+                    write(linha_atual, coluna, valor, formato)
+                coluna += 1
+            linha_atual += 1
+
+        if self.progresso is not None:
+            self.progresso.escrita(linha_atual - linha_inicial, worksheet.name)
+        return linha_atual
+
+    def escrever_dataframe(self, worksheet, linha_inicial, df, formatos=None, coluna_inicial=0):
+        """Escreve os dados de um DataFrame (sem cabeçalho), em blocos de linhas.
+
+        Valores ausentes (None/NaN) ficam como células vazias. Retorna a próxima linha livre.
+        """
+        linha_atual = linha_inicial
+        for inicio in range(0, len(df), TAMANHO_BLOCO):
+            bloco = df.iloc[inicio:inicio + TAMANHO_BLOCO].to_numpy(dtype=object, na_value=None)
+            linha_atual = self.escrever_linhas(worksheet, linha_atual, bloco.tolist(), formatos,
+                                               coluna_inicial)
+        return linha_atual
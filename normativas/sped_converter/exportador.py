@@ -0,0 +1,105 @@
+"""
+Exportação dos registros do SPED em tabelas Parquet e CSV.
+
+Cada tipo de registro vira um arquivo próprio (C170.parquet, C170.csv, ...), com os
+nomes de colunas de `obter_layout_registro` e os campos numéricos (VL_*, ALIQ_*,
+QTD...) convertidos para float. As tabelas derivadas das abas do Excel
+(Consolidado_Fiscal e os resumos por CFOP/CST/alíquota, C170_com_NCM,
+Outras_Obrigacoes_197 e o resumo do 197) são montadas pelos mesmos métodos do
+conversor, direto dos registros lidos, sem passar pelo xlsx. E110 e E111 saem como
+tabelas de registro já tipadas.
+"""
+
+import logging
+import os
+
+import pandas as pd
+
+from .colunar import NUMERICO, tipo_campo
+from .resumo_fiscal import ABAS_RESUMO, ResumoFiscal
+
+logger = logging.getLogger(__name__)
+
+FORMATOS_TABELA = ('csv', 'parquet')
+
+
+def converter_campos_numericos(df):
+    """Converte para float as colunas numéricas e para texto as colunas categóricas"""
+    for coluna in df.columns:
+        if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            # Armazém colunar: tabelas iguais às do modo padrão, em qualquer formato
+            df[coluna] = df[coluna].astype(str)
+        if tipo_campo(str(coluna)) != NUMERICO or pd.api.types.is_float_dtype(df[coluna]):
+            continue
+        df[coluna] = pd.to_numeric(
+            df[coluna].astype(str).str.replace(',', '.'),
+            errors='coerce'
+        ).astype('float64')
+    return df
+
+
+def montar_tabelas_derivadas(conversor, registros):
+    """Gera (nome, DataFrame) para cada tabela derivada disponível nos registros"""
+    df_consolidado = conversor._montar_consolidado(registros)
+    if not df_consolidado.empty:
+        yield 'Consolidado_Fiscal', df_consolidado
+
+    resumo = conversor.resumo_fiscal
+    if resumo is None:
+        resumo = ResumoFiscal.de_registros(registros)
+    if resumo.totais:
+        for nome, chaves in ABAS_RESUMO:
+            yield nome, resumo.tabela(chaves)
+
+    resultado = conversor._montar_c170_com_ncm(registros)
+    if resultado is not None:
+        df_c170, _, _ = resultado
+        yield 'C170_com_NCM', converter_campos_numericos(df_c170.copy())
+
+    df_197 = conversor._montar_outras_obrigacoes(registros)
+    if df_197 is not None:
+        yield 'Outras_Obrigacoes_197', df_197
+        yield 'Resumo_Outras_Obrigacoes', conversor._montar_resumo_197(df_197)
+
+
+def gravar_tabela(df, diretorio, nome, formato):
+    """Grava um DataFrame como `<diretorio>/<nome>.<formato>` e retorna o caminho"""
+    caminho = os.path.join(diretorio, f'{nome}.{formato}')
+    if formato == 'csv':
+        df.to_csv(caminho, index=False, encoding='utf-8')
+    elif formato == 'parquet':
+        try:
+            df.to_parquet(caminho, index=False)
+        except ImportError as e:
+            raise Exception(f"Exportação Parquet requer o pacote pyarrow: {str(e)}")
+    else:
+        raise ValueError(f"Formato de tabela inválido: {formato}")
+    return caminho
+
+
+def exportar_tabelas(conversor, registros, diretorio, formatos=FORMATOS_TABELA):
+    """Grava uma tabela por registro e as tabelas derivadas; retorna os caminhos gerados"""
+    os.makedirs(diretorio, exist_ok=True)
+    caminhos = []
+
+    selecao = conversor.selecao
+    for tipo_registro in sorted(registros):
+        linhas = registros[tipo_registro]
+        if not linhas:
+            continue
+        # Registros auxiliares da seleção são lidos apenas para as tabelas derivadas
+        if selecao is not None and not selecao.escolhido(tipo_registro):
+            continue
+        df = conversor._dataframe_registro(tipo_registro, linhas)
+        if df is None:
+            continue
+        df = converter_campos_numericos(df.copy())
+        for formato in formatos:
+            caminhos.append(gravar_tabela(df, diretorio, tipo_registro, formato))
+
+    for nome, df in montar_tabelas_derivadas(conversor, registros):
+        for formato in formatos:
+            caminhos.append(gravar_tabela(df, diretorio, nome, formato))
+
+    logger.info(f"{len(caminhos)} tabela(s) exportada(s) em {diretorio}")
+    return caminhos
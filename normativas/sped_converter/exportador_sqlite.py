@@ -0,0 +1,152 @@
+"""
+Carga de um arquivo SPED em um banco SQLite indexado.
+
+Cada tipo de registro vira uma tabela com as colunas do layout compilado do Guia
+Prático (`layouts.obter_layout`): os campos decimais são gravados como REAL e as datas
+como texto AAAA-MM-DD, pela conversão por posição do próprio layout. O arquivo é
+percorrido na ordem original, de modo que cada linha filha recebe o id da linha pai
+(C170.ID_C100, E111.ID_E110, ...), e as linhas são inseridas com `executemany`, em
+blocos, dentro de uma única transação.
+
+Exemplo de consulta:
+    SELECT C100.CHV_NFE, C170.COD_ITEM, "0200".COD_NCM
+      FROM C170
+      JOIN C100 ON C100.id = C170.ID_C100
+      LEFT JOIN "0200" ON "0200".COD_ITEM = C170.COD_ITEM
+"""
+
+import logging
+import os
+import sqlite3
+
+from .hierarquia import REGISTRO_PAI, IndiceHierarquia
+from .layouts import DECIMAL, obter_layout
+from .leitor import iterar_registros
+
+logger = logging.getLogger(__name__)
+
+# Campos indexados em todas as tabelas que os possuem
+CAMPOS_INDEXADOS = ('CFOP', 'CST_ICMS', 'COD_ITEM', 'COD_PART', 'CHV_NFE')
+
+# Linhas acumuladas por tabela antes de cada executemany
+TAMANHO_LOTE = 10000
+
+
+def _identificador(nome):
+    """Delimita um nome de tabela/coluna (registros como 0200 e campos como TP_CT-e)"""
+    return '"' + nome.replace('"', '""') + '"'
+
+
+class TabelaSqlite:
+    """Tabela de um tipo de registro sendo carregada no banco"""
+
+    def __init__(self, conexao, tipo_registro, layout):
+        self.conexao = conexao
+        self.tipo_registro = tipo_registro
+        self.layout = layout
+        self.pai = REGISTRO_PAI.get(tipo_registro)
+        campos = layout.campos if layout is not None else ()
+        self.nomes = [campo.nome for campo in campos]
+        self.numericos = [campo.tipo == DECIMAL for campo in campos]
+        self.ultimo_id = 0
+        self.lote = []
+
+        colunas = ['id INTEGER PRIMARY KEY']
+        if self.pai:
+            colunas.append(f'{_identificador("ID_" + self.pai)} INTEGER')
+        colunas += [self._definicao(nome, numerico) for nome, numerico in zip(self.nomes, self.numericos)]
+        conexao.execute(f'CREATE TABLE {_identificador(tipo_registro)} ({", ".join(colunas)})')
+        self._preparar_insercao()
+
+    def _definicao(self, nome, numerico):
+        return f'{_identificador(nome)} {"REAL" if numerico else "TEXT"}'
+
+    def _preparar_insercao(self):
+        colunas = ['id'] + (['ID_' + self.pai] if self.pai else []) + self.nomes
+        self.sql_insercao = (f'INSERT INTO {_identificador(self.tipo_registro)} '
+                             f'({", ".join(map(_identificador, colunas))}) '
+                             f'VALUES ({", ".join("?" * len(colunas))})')
+
+    def _ampliar(self, quantidade):
+        """Cria colunas Campo_N para linhas com mais campos que o layout"""
+        self.gravar()
+        while len(self.nomes) < quantidade:
+            nome = f'Campo_{len(self.nomes) + 1}'
+            self.conexao.execute(f'ALTER TABLE {_identificador(self.tipo_registro)} '
+                                 f'ADD COLUMN {self._definicao(nome, False)}')
+            self.nomes.append(nome)
+        self._preparar_insercao()
+
+    def adicionar(self, campos, id_pai):
+        """Acumula uma linha dividida (`['', 'REG', ..., '']`) e retorna o id atribuído"""
+        if len(campos) - 2 > len(self.nomes):
+            self._ampliar(len(campos) - 2)
+
+        linha = self.layout.converter_linha(campos) if self.layout is not None else campos[1:-1]
+        linha.extend([None] * (len(self.nomes) - len(linha)))
+
+        self.ultimo_id += 1
+        prefixo = [self.ultimo_id, id_pai] if self.pai else [self.ultimo_id]
+        self.lote.append(prefixo + linha)
+        if len(self.lote) >= TAMANHO_LOTE:
+            self.gravar()
+        return self.ultimo_id
+
+    def gravar(self):
+        """Insere as linhas acumuladas"""
+        if self.lote:
+            self.conexao.executemany(self.sql_insercao, self.lote)
+            self.lote = []
+
+    def criar_indices(self):
+        """Cria os índices dos campos de consulta e da chave do registro pai"""
+        campos = [nome for nome in CAMPOS_INDEXADOS if nome in self.nomes]
+        if self.pai:
+            campos.append('ID_' + self.pai)
+        for campo in campos:
+            nome_indice = _identificador(f'idx_{self.tipo_registro}_{campo}')
+            self.conexao.execute(f'CREATE INDEX {nome_indice} ON '
+                                 f'{_identificador(self.tipo_registro)} ({_identificador(campo)})')
+
+
+def exportar_sqlite(arquivo, encoding, caminho_banco):
+    """Carrega o arquivo SPED em `caminho_banco` (recriado) e retorna as linhas por tabela"""
+    if os.path.exists(caminho_banco):
+        os.remove(caminho_banco)
+
+    conexao = sqlite3.connect(caminho_banco)
+    concluido = False
+    try:
+        # Banco recém-criado e removido em caso de erro: dispensa o journal
+        conexao.execute('PRAGMA journal_mode = OFF')
+        conexao.execute('PRAGMA synchronous = OFF')
+
+        tabelas = {}
+        hierarquia = IndiceHierarquia()
+
+        with conexao:
+            for tipo_registro, campos in iterar_registros(arquivo, encoding):
+                tabela = tabelas.get(tipo_registro)
+                if tabela is None:
+                    tabela = tabelas[tipo_registro] = TabelaSqlite(conexao, tipo_registro,
+                                                                   obter_layout(tipo_registro))
+
+                # Os ids das tabelas começam em 1; os índices da hierarquia, em 0
+                indice_pai = hierarquia.registrar(tipo_registro)
+                tabela.adicionar(campos, indice_pai + 1 if indice_pai >= 0 else None)
+
+            if not tabelas:
+                raise ValueError(f"Nenhuma linha SPED válida encontrada em {arquivo}")
+            for tabela in tabelas.values():
+                tabela.gravar()
+                tabela.criar_indices()
+
+        contagens = {tipo: tabela.ultimo_id for tipo, tabela in tabelas.items()}
+        logger.info(f"Banco SQLite gerado em {caminho_banco}: {len(tabelas)} tabela(s), "
+                    f"{sum(contagens.values())} linha(s)")
+        concluido = True
+        return contagens
+    finally:
+        conexao.close()
+        if not concluido and os.path.exists(caminho_banco):
+            os.remove(caminho_banco)
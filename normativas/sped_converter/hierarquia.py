@@ -0,0 +1,118 @@
+"""
+Índice da hierarquia pai/filho dos registros do SPED.
+
+Os leitores agrupam as linhas por tipo de registro, o que perde a ordem do arquivo
+e, com ela, o vínculo entre um C170/C190 e o seu C100, ou entre um E111 e o seu E110.
+O IndiceHierarquia é alimentado na ordem original, durante a leitura, e guarda para
+cada registro filho um `array('i')` com o índice da linha pai (na lista do registro
+pai) de cada linha, ou -1 quando não há pai aberto. A consulta do pai de uma linha é
+O(1).
+"""
+
+from array import array
+
+import numpy as np
+
+# Registro pai de cada registro filho, conforme a hierarquia do Guia Prático da EFD
+REGISTRO_PAI = {
+    # Bloco 0
+    '0175': '0150', '0205': '0200', '0206': '0200', '0210': '0200', '0220': '0200',
+    '0221': '0200', '0305': '0300',
+    # Bloco C
+    'C101': 'C100', 'C105': 'C100', 'C110': 'C100', 'C111': 'C110', 'C112': 'C110',
+    'C113': 'C110', 'C114': 'C110', 'C115': 'C110', 'C116': 'C110', 'C120': 'C100',
+    'C130': 'C100', 'C140': 'C100', 'C141': 'C140', 'C160': 'C100', 'C165': 'C100',
+    'C170': 'C100', 'C171': 'C170', 'C172': 'C170', 'C173': 'C170', 'C174': 'C170',
+    'C175': 'C170', 'C176': 'C170', 'C177': 'C170', 'C178': 'C170', 'C179': 'C170',
+    'C180': 'C170', 'C181': 'C170', 'C185': 'C100', 'C186': 'C100', 'C190': 'C100',
+    'C191': 'C190', 'C195': 'C100', 'C197': 'C195',
+    'C510': 'C500', 'C590': 'C500', 'C591': 'C590', 'C595': 'C500', 'C597': 'C595',
+    # Bloco D
+    'D101': 'D100', 'D190': 'D100', 'D195': 'D100', 'D197': 'D195',
+    'D510': 'D500', 'D530': 'D500', 'D590': 'D500',
+    # Bloco E
+    'E110': 'E100', 'E111': 'E110', 'E112': 'E111', 'E113': 'E111', 'E115': 'E110',
+    'E116': 'E110', 'E210': 'E200', 'E220': 'E210', 'E230': 'E220', 'E240': 'E220',
+    'E250': 'E210', 'E310': 'E300', 'E311': 'E310', 'E312': 'E311', 'E313': 'E311',
+    'E316': 'E310', 'E510': 'E500', 'E520': 'E500', 'E530': 'E520', 'E531': 'E530',
+    # Blocos G, H e K
+    'G125': 'G110', 'G126': 'G125', 'G130': 'G125', 'G140': 'G130',
+    'H010': 'H005', 'H020': 'H010', 'H030': 'H010',
+    'K200': 'K100', 'K210': 'K100', 'K215': 'K210', 'K220': 'K100', 'K230': 'K100',
+    'K235': 'K230', 'K250': 'K100', 'K255': 'K250',
+}
+
+
+def _descendentes(tipo_registro):
+    filhos = [filho for filho, pai in REGISTRO_PAI.items() if pai == tipo_registro]
+    return filhos + [neto for filho in filhos for neto in _descendentes(filho)]
+
+
+# Registros cujo pai aberto deixa de valer quando uma nova linha do registro começa
+DESCENDENTES = {pai: tuple(_descendentes(pai)) for pai in set(REGISTRO_PAI.values())}
+
+
+class IndiceHierarquia:
+    """Índices das linhas pai de cada registro filho, montados durante a leitura"""
+
+    def __init__(self):
+        self.contagens = {}  # tipo de registro -> linhas lidas
+        self.pais = {}  # tipo de registro filho -> array('i') com o índice da linha pai
+        self._abertos = {}  # tipo de registro -> índice da última linha lida
+
+    def registrar(self, tipo_registro):
+        """Registra a próxima linha de `tipo_registro` e retorna o índice da linha pai (ou -1)"""
+        indice = self.contagens.get(tipo_registro, 0)
+        self.contagens[tipo_registro] = indice + 1
+
+        indice_pai = -1
+        pai = REGISTRO_PAI.get(tipo_registro)
+        if pai is not None:
+            indice_pai = self._abertos.get(pai, -1)
+            pais = self.pais.get(tipo_registro)
+            if pais is None:
+                pais = self.pais[tipo_registro] = array('i')
+            pais.append(indice_pai)
+
+        self._abertos[tipo_registro] = indice
+        for descendente in DESCENDENTES.get(tipo_registro, ()):
+            self._abertos.pop(descendente, None)
+        return indice_pai
+
+    def indice_pai(self, tipo_registro, indice):
+        """Retorna o índice da linha pai da linha `indice` de `tipo_registro`, ou -1"""
+        pais = self.pais.get(tipo_registro)
+        if pais is None or not 0 <= indice < len(pais):
+            return -1
+        return pais[indice]
+
+    def indices_pai(self, tipo_registro):
+        """Retorna um array NumPy (int32) com o índice pai de cada linha do registro (-1 sem pai)"""
+        pais = self.pais.get(tipo_registro)
+        if pais is None or not pais:
+            return np.empty(0, dtype=np.int32)
+        # Cópia: um buffer exportado impediria o array de crescer em leituras seguintes
+        return np.frombuffer(pais, dtype=np.int32).copy()
+
+    def linha_pai(self, registros, tipo_registro, indice):
+        """Retorna a linha pai (no formato de `linha.split('|')`) ou None"""
+        indice_pai = self.indice_pai(tipo_registro, indice)
+        if indice_pai < 0:
+            return None
+        return registros[REGISTRO_PAI[tipo_registro]][indice_pai]
+
+    def __getstate__(self):
+        # As linhas abertas só importam durante a leitura
+        return {'contagens': self.contagens, 'pais': self.pais}
+
+    def __setstate__(self, estado):
+        self.contagens = estado['contagens']
+        self.pais = estado['pais']
+        self._abertos = {}
+
+
+def registrar_hierarquia(pares, hierarquia):
+    """Repassa os pares (tipo_registro, campos), registrando cada linha em `hierarquia`"""
+    for tipo_registro, campos in pares:
+        hierarquia.registrar(tipo_registro)
+        yield tipo_registro, campos
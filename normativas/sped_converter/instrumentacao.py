@@ -0,0 +1,226 @@
+"""
+Instrumentação por etapa da conversão: tempo, linhas por segundo e memória (RSS).
+
+Cada etapa (detecção do encoding, leitura, conversão de tipos, cada aba do Excel,
+gravação do xlsx...) é medida com `Instrumentacao.etapa(nome)`; etapas podem ser
+aninhadas (a conversão de tipos acontece dentro das abas de registros) e uma etapa
+executada várias vezes tem os tempos e as linhas somados. Enquanto há etapas abertas,
+uma thread amostra o RSS do processo para obter o pico de memória de cada etapa.
+
+O relatório (`relatorio()` / `gravar_relatorio()`) é um JSON com as etapas na ordem
+do primeiro início. `perfilar()` executa um bloco sob o cProfile e grava o dump
+(pstats) para análise com `python -m pstats` ou snakeviz.
+
+A memória vem do psutil, se instalado, ou de /proc/self/statm; sem nenhum dos dois
+os campos de RSS ficam nulos.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import platform
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+VERSAO_RELATORIO = 1
+INTERVALO_AMOSTRAGEM = 0.02  # segundos entre amostras de RSS
+MB = 1024 * 1024
+
+_processo = None
+
+
+def rss_atual():
+    """Retorna o RSS atual do processo em bytes, ou None se não for possível medir"""
+    global _processo
+    if psutil is not None:
+        if _processo is None:
+            _processo = psutil.Process()
+        return _processo.memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _mb(valor):
+    return round(valor / MB, 1) if valor is not None else None
+
+
+def _maximo(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
+
+
+class Etapa:
+    """Medições de uma etapa; `linhas` é informado pelo código medido"""
+
+    __slots__ = ('nome', 'execucoes', 'segundos', 'linhas', 'rss_inicial', 'rss_final', 'pico_rss')
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.execucoes = 1
+        self.segundos = 0.0
+        self.linhas = None
+        self.rss_inicial = None
+        self.rss_final = None
+        self.pico_rss = None
+
+    def acumular(self, outra):
+        """Soma uma nova execução da mesma etapa"""
+        self.execucoes += 1
+        self.segundos += outra.segundos
+        if outra.linhas is not None:
+            self.linhas = (self.linhas or 0) + outra.linhas
+        self.rss_final = outra.rss_final
+        self.pico_rss = _maximo(self.pico_rss, outra.pico_rss)
+
+    def para_dict(self):
+        linhas_por_segundo = None
+        if self.linhas is not None and self.segundos > 0:
+            linhas_por_segundo = round(self.linhas / self.segundos, 1)
+        return {
+            'nome': self.nome,
+            'execucoes': self.execucoes,
+            'segundos': round(self.segundos, 4),
+            'linhas': self.linhas,
+            'linhas_por_segundo': linhas_por_segundo,
+            'rss_inicial_mb': _mb(self.rss_inicial),
+            'rss_final_mb': _mb(self.rss_final),
+            'pico_rss_mb': _mb(self.pico_rss),
+        }
+
+
+class Instrumentacao:
+    """Coleta os tempos e a memória das etapas de uma conversão.
+
+    Com `ativa=False` as etapas não são medidas (custo desprezível no caminho normal).
+    """
+
+    def __init__(self, ativa=True):
+        self.ativa = ativa
+        self.informacoes = {}  # dados da execução incluídos no relatório (arquivo, modo...)
+        self.etapas = {}  # nome -> Etapa acumulada, na ordem do primeiro início
+        self.inicio = None
+        self._abertas = []
+        self._parar = threading.Event()
+        self._monitor = None
+
+    @contextmanager
+    def etapa(self, nome):
+        """Mede o bloco como a etapa `nome`; o objeto retornado aceita `linhas`"""
+        registro = Etapa(nome)
+        if not self.ativa:
+            yield registro
+            return
+
+        if self.inicio is None:
+            self.inicio = datetime.now()
+        # Reserva a posição da etapa no relatório pela ordem de início
+        self.etapas.setdefault(nome, None)
+        registro.rss_inicial = registro.pico_rss = rss_atual()
+        self._abertas.append(registro)
+        self._iniciar_monitor()
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro.segundos = time.perf_counter() - inicio
+            self._abertas.remove(registro)
+            if not self._abertas:
+                self._parar_monitor()
+            registro.rss_final = rss_atual()
+            registro.pico_rss = _maximo(registro.pico_rss, registro.rss_final)
+            # O pico de uma etapa aninhada também é pico das etapas que a contêm
+            for aberta in self._abertas:
+                aberta.pico_rss = _maximo(aberta.pico_rss, registro.pico_rss)
+
+            acumulada = self.etapas.get(nome)
+            if acumulada is None:
+                self.etapas[nome] = registro
+            else:
+                acumulada.acumular(registro)
+
+    def _iniciar_monitor(self):
+        if self._monitor is not None:
+            return
+        self._parar.clear()
+        self._monitor = threading.Thread(target=self._amostrar, name='instrumentacao-rss', daemon=True)
+        self._monitor.start()
+
+    def _parar_monitor(self):
+        self._parar.set()
+        self._monitor.join()
+        self._monitor = None
+
+    def _amostrar(self):
+        while not self._parar.wait(INTERVALO_AMOSTRAGEM):
+            rss = rss_atual()
+            if rss is None:
+                return
+            for aberta in list(self._abertas):
+                if aberta.pico_rss is None or rss > aberta.pico_rss:
+                    aberta.pico_rss = rss
+
+    def relatorio(self):
+        """Retorna o relatório da execução como dicionário serializável em JSON"""
+        concluidas = [etapa for etapa in self.etapas.values() if etapa is not None]
+        etapas = [etapa.para_dict() for etapa in concluidas]
+        picos = [etapa.pico_rss for etapa in concluidas if etapa.pico_rss is not None]
+        return {
+            'versao_relatorio': VERSAO_RELATORIO,
+            'inicio': self.inicio.isoformat(timespec='seconds') if self.inicio else None,
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            **self.informacoes,
+            'pico_rss_mb': _mb(max(picos)) if picos else None,
+            'etapas': etapas,
+        }
+
+    def gravar_relatorio(self, caminho, relatorio=None):
+        """Grava o relatório (ou `relatorio`, se informado) em `caminho` como JSON"""
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(relatorio if relatorio is not None else self.relatorio(), f,
+                      ensure_ascii=False, indent=2)
+        logger.info(f"Relatório de desempenho gravado em {caminho}")
+
+    def __getstate__(self):
+        # Repassada aos processos de um lote antes de qualquer medição
+        estado = self.__dict__.copy()
+        estado['_parar'] = None
+        estado['_monitor'] = None
+        estado['_abertas'] = []
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._parar = threading.Event()
+
+
+@contextmanager
+def perfilar(caminho):
+    """Executa o bloco sob o cProfile e grava o dump em `caminho` (sem caminho, não perfila)"""
+    if not caminho:
+        yield None
+        return
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield perfil
+    finally:
+        perfil.disable()
+        perfil.dump_stats(caminho)
+        logger.info(f"Perfil (cProfile) gravado em {caminho}")
@@ -0,0 +1,532 @@
+"""
+Registro dos layouts da EFD ICMS/IPI (Guia Prático), compilado uma única vez na importação.
+
+Cada registro tem a lista ordenada de campos do Guia Prático; a posição de cada campo
+é o seu número no Guia (REG = 1), que coincide com o índice na linha dividida por
+`linha.split('|')`. O tipo de cada campo (decimal, data ou texto) segue as regras de
+nome do Guia (VL_*, ALIQ_*, QTD*, DT_*...) mais os campos decimais de nome próprio.
+
+Para cada registro é montado um LayoutRegistro com as conversões já resolvidas por
+posição, compartilhado por todos os escritores: as abas do Excel e as tabelas
+CSV/Parquet convertem por coluna (`converter_dataframe`) e o SQLite linha a linha
+(`converter_linha`), sem reconstruir dicionários de layout a cada chamada.
+"""
+
+from collections import namedtuple
+
+from .tipos import PREFIXO_DATA, converter_tipos
+
+DECIMAL = 'decimal'
+DATA = 'data'
+TEXTO = 'texto'
+
+PREFIXOS_DECIMAIS = (
+    'VL_', 'VLR_', 'ALIQ_', 'QTD', 'QUANT_', 'DEB_ESP', 'PESO_', 'SLD_', 'CRED_', 'TOT_',
+    'SOM_', 'SALDO_', 'BC_', 'ICMS_', 'VOL_', 'VAL_', 'ESTQ_', 'PROD_', 'G1_', 'G3_', 'G4_'
+)
+
+# Campos decimais cujo nome não segue os prefixos acima
+CAMPOS_DECIMAIS = {
+    'GT_FIN', 'CONS', 'PIS_IMP', 'COFINS_IMP', 'IND_PER_SAI', 'IND_RAT', 'FAT_CONV', 'PERDA',
+    'ENER_INJET', 'OUTRAS_DED', 'DED', 'VALOR', 'FECH_FISICO', 'OUTR_ENTR', 'ENT_ANID_HID',
+    'SAI_ANI_HID', 'SAIDAS', 'UTIL_MEL', 'TEMPER'
+}
+
+# Campos de cada registro, na ordem do Guia Prático
+LAYOUTS = {
+    # Bloco 0 - Abertura, Identificação e Referências
+    '0000': 'REG COD_VER COD_FIN DT_INI DT_FIN NOME CNPJ CPF UF IE COD_MUN IM SUFRAMA IND_PERFIL '
+            'IND_ATIV',
+    '0001': 'REG IND_MOV',
+    '0002': 'REG CLAS_ESTAB_IND',
+    '0005': 'REG FANTASIA CEP END NUM COMPL BAIRRO FONE FAX EMAIL',
+    '0015': 'REG UF_ST IE_ST',
+    '0100': 'REG NOME CPF CRC CNPJ CEP END NUM COMPL BAIRRO FONE FAX EMAIL COD_MUN',
+    '0150': 'REG COD_PART NOME COD_PAIS CNPJ CPF IE COD_MUN SUFRAMA END NUM COMPL BAIRRO',
+    '0175': 'REG DT_ALT NR_CAMPO CONT_ANT',
+    '0190': 'REG UNID DESCR',
+    '0200': 'REG COD_ITEM DESCR_ITEM COD_BARRA COD_ANT_ITEM UNID_INV TIPO_ITEM COD_NCM EX_IPI '
+            'COD_GEN COD_LST ALIQ_ICMS CEST',
+    '0205': 'REG DESCR_ANT_ITEM DT_INI DT_FIM COD_ANT_ITEM',
+    '0206': 'REG COD_COMB',
+    '0210': 'REG COD_ITEM_COMP QTD_COMP PERDA',
+    '0220': 'REG UNID_CONV FAT_CONV COD_BARRA',
+    '0221': 'REG COD_ITEM_ATOMICO QTD_CONTIDA',
+    '0300': 'REG COD_IND_BEM IDENT_MERC DESCR_ITEM COD_PRNC COD_CTA NR_PARC',
+    '0305': 'REG COD_CCUS FUNC VIDA_UTIL',
+    '0400': 'REG COD_NAT DESCR_NAT',
+    '0450': 'REG COD_INF TXT',
+    '0460': 'REG COD_OBS TXT',
+    '0500': 'REG DT_ALT COD_NAT_CC IND_CTA NIVEL COD_CTA NOME_CTA',
+    '0600': 'REG DT_ALT COD_CCUS CCUS',
+    '0990': 'REG QTD_LIN_0',
+
+    # Bloco B - Escrituração e Apuração do ISS
+    'B001': 'REG IND_DAD',
+    'B020': 'REG IND_OPER IND_EMIT COD_PART COD_MOD COD_SIT SER NUM_DOC CHV_NFE DT_DOC COD_MUN_SERV '
+            'VL_CONT VL_MAT_TERC VL_SUB VL_ISNT_ISS VL_DED_BC VL_BC_ISS VL_BC_ISS_RT VL_ISS_RT VL_ISS '
+            'COD_INF_OBS',
+    'B025': 'REG VL_CONT_P VL_BC_ISS_P ALIQ_ISS VL_ISS_P VL_ISNT_ISS_P COD_SERV',
+    'B030': 'REG COD_MOD SER NUM_DOC_INI NUM_DOC_FIN DT_DOC QTD_CANC VL_CONT VL_ISNT_ISS VL_BC_ISS '
+            'VL_ISS COD_INF_OBS',
+    'B035': 'REG VL_CONT_P VL_BC_ISS_P ALIQ_ISS VL_ISS_P VL_ISNT_ISS_P COD_SERV',
+    'B350': 'REG COD_CTD CTA_ISS CTA_COSIF QTD_OCOR COD_SERV VL_CONT VL_BC_ISS ALIQ_ISS VL_ISS '
+            'COD_INF_OBS',
+    'B420': 'REG VL_CONT VL_BC_ISS ALIQ_ISS VL_ISNT_ISS VL_ISS COD_SERV',
+    'B440': 'REG IND_OPER COD_PART VL_CONT_RT VL_BC_ISS_RT VL_ISS_RT',
+    'B460': 'REG IND_DED VL_DED NUM_PROC IND_PROC PROC COD_INF_OBS IND_OBR',
+    'B470': 'REG VL_CONT VL_MAT_TERC VL_MAT_PROP VL_SUB VL_ISNT VL_DED_BC VL_BC_ISS VL_BC_ISS_RT '
+            'VL_ISS VL_ISS_RT VL_DED VL_ISS_REC VL_ISS_ST VL_ISS_FIL VL_ISS_RT_REC',
+    'B500': 'REG VL_REC QTD_PROF VL_OR',
+    'B510': 'REG IND_PROF IND_ESC IND_SOC CPF NOME',
+    'B990': 'REG QTD_LIN_B',
+
+    # Bloco C - Documentos Fiscais I - Mercadorias (ICMS/IPI)
+    'C001': 'REG IND_MOV',
+    'C100': 'REG IND_OPER IND_EMIT COD_PART COD_MOD COD_SIT SER NUM_DOC CHV_NFE DT_DOC DT_E_S VL_DOC '
+            'IND_PGTO VL_DESC VL_ABAT_NT VL_MERC IND_FRT VL_FRT VL_SEG VL_OUT_DA VL_BC_ICMS VL_ICMS '
+            'VL_BC_ICMS_ST VL_ICMS_ST VL_IPI VL_PIS VL_COFINS VL_PIS_ST VL_COFINS_ST',
+    'C101': 'REG VL_FCP_UF_DEST VL_ICMS_UF_DEST VL_ICMS_UF_REM',
+    'C105': 'REG OPER UF',
+    'C110': 'REG COD_INF TXT_COMPL',
+    'C111': 'REG NUM_PROC IND_PROC',
+    'C112': 'REG COD_DA UF NUM_DA COD_AUT VL_DA DT_VCTO DT_PGTO',
+    'C113': 'REG IND_OPER IND_EMIT COD_PART COD_MOD SER SUB NUM_DOC DT_DOC CHV_DOCe',
+    'C114': 'REG COD_MOD ECF_FAB ECF_CX NUM_DOC DT_DOC',
+    'C115': 'REG IND_CARGA CNPJ_COL IE_COL CPF_COL COD_MUN_COL CNPJ_ENTG IE_ENTG CPF_ENTG '
+            'COD_MUN_ENTG',
+    'C116': 'REG COD_MOD NR_SAT CHV_CFE NUM_CFE DT_DOC',
+    'C120': 'REG COD_DOC_IMP NUM_DOC_IMP PIS_IMP COFINS_IMP NUM_ACDRAW',
+    'C130': 'REG VL_SERV_NT VL_BC_ISSQN VL_ISSQN VL_BC_IRRF VL_IRRF VL_BC_PREV VL_PREV',
+    'C140': 'REG IND_EMIT IND_TIT DESC_TIT NUM_TIT QTD_PARC VL_TIT',
+    'C141': 'REG NUM_PARC DT_VCTO VL_PARC',
+    'C160': 'REG COD_PART VEIC_ID QTD_VOL PESO_BRT PESO_LIQ UF_ID',
+    'C165': 'REG COD_PART VEIC_ID COD_AUT NR_PASSE HORA TEMPER QTD_VOL PESO_BRT PESO_LIQ NOM_MOT CPF '
+            'UF_ID',
+    'C170': 'REG NUM_ITEM COD_ITEM DESCR_COMPL QTD UNID VL_ITEM VL_DESC IND_MOV CST_ICMS CFOP COD_NAT '
+            'VL_BC_ICMS ALIQ_ICMS VL_ICMS VL_BC_ICMS_ST ALIQ_ST VL_ICMS_ST IND_APUR CST_IPI COD_ENQ '
+            'VL_BC_IPI ALIQ_IPI VL_IPI CST_PIS VL_BC_PIS ALIQ_PIS QUANT_BC_PIS ALIQ_PIS_QUANT VL_PIS '
+            'CST_COFINS VL_BC_COFINS ALIQ_COFINS QUANT_BC_COFINS ALIQ_COFINS_QUANT VL_COFINS COD_CTA '
+            'VL_ABAT_NT',
+    'C171': 'REG NUM_TANQUE QTDE',
+    'C172': 'REG VL_BC_ISSQN ALIQ_ISSQN VL_ISSQN',
+    'C173': 'REG LOTE_MED QTD_ITEM DT_FAB DT_VAL IND_MED TP_PROD VL_TAB_MAX',
+    'C174': 'REG IND_ARM NUM_ARM DESCR_COMPL',
+    'C175': 'REG IND_VEIC_OPER CNPJ UF CHASSI_VEIC',
+    'C176': 'REG COD_MOD_ULT_E NUM_DOC_ULT_E SER_ULT_E DT_ULT_E COD_PART_ULT_E QUANT_ULT_E '
+            'VL_UNIT_ULT_E VL_UNIT_BC_ST CHAVE_NFE_ULT_E NUM_ITEM_ULT_E VL_UNIT_BC_ICMS_ULT_E '
+            'ALIQ_ICMS_ULT_E VL_UNIT_LIMITE_BC_ICMS_ULT_E VL_UNIT_ICMS_ULT_E ALIQ_ST_ULT_E VL_UNIT_RES '
+            'COD_RESP_RET COD_MOT_RES CHAVE_NFE_RET COD_PART_NFE_RET SER_NFE_RET NUM_NFE_RET '
+            'ITEM_NFE_RET COD_DA NUM_DA VL_UNIT_RES_FCP_ST',
+    'C177': 'REG COD_INF_ITEM',
+    'C178': 'REG CL_ENQ VL_UNID QUANT_PAD',
+    'C179': 'REG BC_ST_ORIG_DEST ICMS_ST_REP ICMS_ST_COMPL BC_RET ICMS_RET',
+    'C180': 'REG COD_RESP_RET QUANT_CONV UNID VL_UNIT_CONV VL_UNIT_ICMS_OP_CONV '
+            'VL_UNIT_BC_ICMS_ST_ESTOQUE_CONV VL_UNIT_ICMS_ST_ESTOQUE_CONV '
+            'VL_UNIT_FCP_ST_ESTOQUE_CONV COD_DA NUM_DA',
+    'C181': 'REG COD_MOT_REST_COMPL QUANT_CONV UNID COD_MOD_SAIDA SERIE_SAIDA ECF_FAB_SAIDA '
+            'NUM_DOC_SAIDA CHV_DFE_SAIDA DT_DOC_SAIDA NUM_ITEM_SAIDA VL_UNIT_CONV_SAIDA '
+            'VL_UNIT_ICMS_OP_ESTOQUE_CONV_SAIDA VL_UNIT_ICMS_ST_ESTOQUE_CONV_SAIDA '
+            'VL_UNIT_FCP_ICMS_ST_ESTOQUE_CONV_SAIDA VL_UNIT_ICMS_NA_OPERACAO_CONV_SAIDA '
+            'VL_UNIT_ICMS_OP_CONV_SAIDA VL_UNIT_ICMS_ST_CONV_REST VL_UNIT_FCP_ST_CONV_REST '
+            'VL_UNIT_ICMS_ST_CONV_COMPL VL_UNIT_FCP_ST_CONV_COMPL',
+    'C185': 'REG NUM_ITEM COD_ITEM CST_ICMS CFOP COD_MOT_REST_COMPL QUANT_CONV UNID VL_UNIT_CONV '
+            'VL_UNIT_ICMS_NA_OPERACAO_CONV VL_UNIT_ICMS_OP_CONV VL_UNIT_ICMS_OP_ESTOQUE_CONV '
+            'VL_UNIT_ICMS_ST_ESTOQUE_CONV VL_UNIT_FCP_ICMS_ST_ESTOQUE_CONV VL_UNIT_ICMS_ST_CONV_REST '
+            'VL_UNIT_FCP_ST_CONV_REST VL_UNIT_ICMS_ST_CONV_COMPL VL_UNIT_FCP_ST_CONV_COMPL',
+    'C186': 'REG NUM_ITEM COD_ITEM CST_ICMS CFOP COD_MOT_REST_COMPL QUANT_CONV UNID COD_MOD_ENTRADA '
+            'SERIE_ENTRADA NUM_DOC_ENTRADA CHV_DFE_ENTRADA DT_DOC_ENTRADA NUM_ITEM_ENTRADA '
+            'VL_UNIT_CONV_ENTRADA VL_UNIT_ICMS_OP_CONV_ENTRADA VL_UNIT_BC_ICMS_ST_CONV_ENTRADA '
+            'VL_UNIT_ICMS_ST_CONV_ENTRADA VL_UNIT_FCP_ST_CONV_ENTRADA',
+    'C190': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ICMS VL_ICMS VL_BC_ICMS_ST VL_ICMS_ST VL_RED_BC '
+            'VL_IPI COD_OBS',
+    'C191': 'REG VL_FCP_OP VL_FCP_ST VL_FCP_RET',
+    'C195': 'REG COD_OBS TXT_COMPL',
+    'C197': 'REG COD_AJ DESCR_COMPL_AJ COD_ITEM VL_BC_ICMS ALIQ_ICMS VL_ICMS VL_OUTROS',
+    'C300': 'REG COD_MOD SER SUB NUM_DOC_INI NUM_DOC_FIN DT_DOC VL_DOC VL_PIS VL_COFINS COD_CTA',
+    'C310': 'REG NUM_DOC_CANC',
+    'C320': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ICMS VL_ICMS VL_RED_BC COD_OBS',
+    'C321': 'REG COD_ITEM QTD UNID VL_ITEM VL_DESC VL_BC_ICMS VL_ICMS VL_PIS VL_COFINS',
+    'C330': 'REG COD_MOT_REST_COMPL QUANT_CONV UNID VL_UNIT_CONV VL_UNIT_ICMS_NA_OPERACAO_CONV '
+            'VL_UNIT_ICMS_OP_CONV VL_UNIT_ICMS_OP_ESTOQUE_CONV VL_UNIT_ICMS_ST_ESTOQUE_CONV '
+            'VL_UNIT_FCP_ICMS_ST_ESTOQUE_CONV VL_UNIT_ICMS_ST_CONV_REST VL_UNIT_FCP_ST_CONV_REST '
+            'VL_UNIT_ICMS_ST_CONV_COMPL VL_UNIT_FCP_ST_CONV_COMPL',
+    'C350': 'REG SER SUB_SER NUM_DOC DT_DOC CNPJ_CPF VL_MERC VL_DOC VL_DESC VL_PIS VL_COFINS COD_CTA',
+    'C370': 'REG NUM_ITEM COD_ITEM QTD UNID VL_ITEM VL_DESC',
+    'C380': 'REG COD_MOT_REST_COMPL QUANT_CONV UNID VL_UNIT_CONV VL_UNIT_ICMS_NA_OPERACAO_CONV '
+            'VL_UNIT_ICMS_OP_CONV VL_UNIT_ICMS_OP_ESTOQUE_CONV VL_UNIT_ICMS_ST_ESTOQUE_CONV '
+            'VL_UNIT_FCP_ICMS_ST_ESTOQUE_CONV VL_UNIT_ICMS_ST_CONV_REST VL_UNIT_FCP_ST_CONV_REST '
+            'VL_UNIT_ICMS_ST_CONV_COMPL VL_UNIT_FCP_ST_CONV_COMPL',
+    'C390': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ICMS VL_ICMS VL_RED_BC COD_OBS',
+    'C400': 'REG COD_MOD ECF_MOD ECF_FAB ECF_CX',
+    'C405': 'REG DT_DOC CRO CRZ NUM_COO_FIN GT_FIN VL_BRT',
+    'C410': 'REG VL_PIS VL_COFINS',
+    'C420': 'REG COD_TOT_PAR VLR_ACUM_TOT NR_TOT DESCR_NR_TOT',
+    'C425': 'REG COD_ITEM QTD UNID VL_ITEM VL_PIS VL_COFINS',
+    'C430': 'REG COD_MOT_REST_COMPL QUANT_CONV UNID VL_UNIT_CONV VL_UNIT_ICMS_NA_OPERACAO_CONV '
+            'VL_UNIT_ICMS_OP_CONV VL_UNIT_ICMS_OP_ESTOQUE_CONV VL_UNIT_ICMS_ST_ESTOQUE_CONV '
+            'VL_UNIT_FCP_ICMS_ST_ESTOQUE_CONV VL_UNIT_ICMS_ST_CONV_REST VL_UNIT_FCP_ST_CONV_REST '
+            'VL_UNIT_ICMS_ST_CONV_COMPL VL_UNIT_FCP_ST_CONV_COMPL',
+    'C460': 'REG COD_MOD COD_SIT NUM_DOC DT_DOC VL_DOC VL_PIS VL_COFINS CPF_CNPJ NOM_ADQ',
+    'C465': 'REG CHV_CFE NUM_CCF',
+    'C470': 'REG COD_ITEM QTD QTD_CANC UNID VL_ITEM CST_ICMS CFOP ALIQ_ICMS VL_PIS VL_COFINS',
+    'C480': 'REG COD_MOT_REST_COMPL QUANT_CONV UNID VL_UNIT_CONV VL_UNIT_ICMS_NA_OPERACAO_CONV '
+            'VL_UNIT_ICMS_OP_CONV VL_UNIT_ICMS_OP_ESTOQUE_CONV VL_UNIT_ICMS_ST_ESTOQUE_CONV '
+            'VL_UNIT_FCP_ICMS_ST_ESTOQUE_CONV VL_UNIT_ICMS_ST_CONV_REST VL_UNIT_FCP_ST_CONV_REST '
+            'VL_UNIT_ICMS_ST_CONV_COMPL VL_UNIT_FCP_ST_CONV_COMPL',
+    'C490': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ICMS VL_ICMS COD_OBS',
+    'C495': 'REG ALIQ_ICMS COD_ITEM QTD QTD_CANC UNID VL_ITEM VL_DESC VL_CANC VL_ACMO VL_BC_ICMS '
+            'VL_ICMS VL_ISEN VL_NT VL_ICMS_ST',
+    'C500': 'REG IND_OPER IND_EMIT COD_PART COD_MOD COD_SIT SER SUB COD_CONS NUM_DOC DT_DOC DT_E_S '
+            'VL_DOC VL_DESC VL_FORN VL_SERV_NT VL_TERC VL_DA VL_BC_ICMS VL_ICMS VL_BC_ICMS_ST VL_ICMS_ST '
+            'COD_INF VL_PIS VL_COFINS TP_LIGACAO COD_GRUPO_TENSAO CHV_DOCe FIN_DOCe CHV_DOCe_REF '
+            'IND_DEST COD_MUN_DEST COD_CTA COD_MOD_DOC_REF HASH_DOC_REF SER_DOC_REF NUM_DOC_REF '
+            'MES_DOC_REF ENER_INJET OUTRAS_DED',
+    'C510': 'REG NUM_ITEM COD_ITEM COD_CLASS QTD UNID VL_ITEM VL_DESC CST_ICMS CFOP VL_BC_ICMS '
+            'ALIQ_ICMS VL_ICMS VL_BC_ICMS_ST ALIQ_ST VL_ICMS_ST IND_REC COD_PART VL_PIS VL_COFINS '
+            'COD_CTA',
+    'C590': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ICMS VL_ICMS VL_BC_ICMS_ST VL_ICMS_ST VL_RED_BC '
+            'COD_OBS',
+    'C591': 'REG VL_FCP_OP VL_FCP_ST',
+    'C595': 'REG COD_OBS TXT_COMPL',
+    'C597': 'REG COD_AJ DESCR_COMPL_AJ COD_ITEM VL_BC_ICMS ALIQ_ICMS VL_ICMS VL_OUTROS',
+    'C600': 'REG COD_MOD COD_MUN SER SUB COD_CONS QTD_CONS QTD_CANC DT_DOC VL_DOC VL_DESC CONS '
+            'VL_FORN VL_SERV_NT VL_TERC VL_DA VL_BC_ICMS VL_ICMS VL_BC_ICMS_ST VL_ICMS_ST VL_PIS '
+            'VL_COFINS',
+    'C601': 'REG NUM_DOC_CANC',
+    'C610': 'REG COD_CLASS COD_ITEM QTD UNID VL_ITEM VL_DESC CST_ICMS CFOP ALIQ_ICMS VL_BC_ICMS '
+            'VL_ICMS VL_BC_ICMS_ST VL_ICMS_ST VL_PIS VL_COFINS COD_CTA',
+    'C690': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ICMS VL_ICMS VL_RED_BC VL_BC_ICMS_ST VL_ICMS_ST '
+            'COD_OBS',
+    'C700': 'REG COD_MOD SER NRO_ORD_INI NRO_ORD_FIN DT_DOC_INI DT_DOC_FIN NOM_MEST CHV_COD_DIG',
+    'C790': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ICMS VL_ICMS VL_BC_ICMS_ST VL_ICMS_ST VL_RED_BC '
+            'COD_OBS',
+    'C791': 'REG UF VL_BC_ICMS_ST VL_ICMS_ST',
+    'C800': 'REG COD_MOD COD_SIT NUM_CFE DT_DOC VL_CFE VL_PIS VL_COFINS CNPJ_CPF NR_SAT CHV_CFE '
+            'VL_DESC VL_MERC VL_OUT_DA VL_ICMS VL_PIS_ST VL_COFINS_ST',
+    'C810': 'REG NUM_ITEM COD_ITEM QTD UNID VL_ITEM CST_ICMS CFOP',
+    'C815': 'REG COD_MOT_REST_COMPL QUANT_CONV UNID VL_UNIT_CONV VL_UNIT_ICMS_NA_OPERACAO_CONV '
+            'VL_UNIT_ICMS_OP_CONV VL_UNIT_ICMS_OP_ESTOQUE_CONV VL_UNIT_ICMS_ST_ESTOQUE_CONV '
+            'VL_UNIT_FCP_ICMS_ST_ESTOQUE_CONV VL_UNIT_ICMS_ST_CONV_REST VL_UNIT_FCP_ST_CONV_REST '
+            'VL_UNIT_ICMS_ST_CONV_COMPL VL_UNIT_FCP_ST_CONV_COMPL',
+    'C850': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ICMS VL_ICMS COD_OBS',
+    'C855': 'REG COD_OBS TXT_COMPL',
+    'C857': 'REG COD_AJ DESCR_COMPL_AJ COD_ITEM VL_BC_ICMS ALIQ_ICMS VL_ICMS VL_OUTROS',
+    'C860': 'REG COD_MOD NR_SAT DT_DOC DOC_INI DOC_FIN',
+    'C870': 'REG COD_ITEM QTD UNID CST_ICMS CFOP',
+    'C880': 'REG COD_MOT_REST_COMPL QUANT_CONV UNID VL_UNIT_CONV VL_UNIT_ICMS_NA_OPERACAO_CONV '
+            'VL_UNIT_ICMS_OP_CONV VL_UNIT_ICMS_OP_ESTOQUE_CONV VL_UNIT_ICMS_ST_ESTOQUE_CONV '
+            'VL_UNIT_FCP_ICMS_ST_ESTOQUE_CONV VL_UNIT_ICMS_ST_CONV_REST VL_UNIT_FCP_ST_CONV_REST '
+            'VL_UNIT_ICMS_ST_CONV_COMPL VL_UNIT_FCP_ST_CONV_COMPL',
+    'C890': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ICMS VL_ICMS COD_OBS',
+    'C895': 'REG COD_OBS TXT_COMPL',
+    'C897': 'REG COD_AJ DESCR_COMPL_AJ COD_ITEM VL_BC_ICMS ALIQ_ICMS VL_ICMS VL_OUTROS',
+    'C990': 'REG QTD_LIN_C',
+
+    # Bloco D - Documentos Fiscais II - Serviços (ICMS)
+    'D001': 'REG IND_MOV',
+    'D100': 'REG IND_OPER IND_EMIT COD_PART COD_MOD COD_SIT SER SUB NUM_DOC CHV_CTE DT_DOC DT_A_P '
+            'TP_CT-e CHV_CTE_REF VL_DOC VL_DESC IND_FRT VL_SERV VL_BC_ICMS VL_ICMS VL_NT COD_INF '
+            'COD_CTA COD_MUN_ORIG COD_MUN_DEST',
+    'D101': 'REG VL_FCP_UF_DEST VL_ICMS_UF_DEST VL_ICMS_UF_REM',
+    'D110': 'REG NUM_ITEM COD_ITEM VL_SERV VL_OUT',
+    'D120': 'REG COD_MUN_ORIG COD_MUN_DEST VEIC_ID UF_ID',
+    'D130': 'REG COD_PART_CONSG COD_PART_RED IND_FRT_RED COD_MUN_ORIG COD_MUN_DEST VEIC_ID '
+            'VL_LIQ_FRT VL_SEC_CAT VL_DESP VL_PEDG VL_OUT VL_FRT UF_ID',
+    'D140': 'REG COD_PART_CONSG COD_MUN_ORIG COD_MUN_DEST IND_VEIC VEIC_ID IND_NAV VIAGEM '
+            'VL_FRT_LIQ VL_DESP_PORT VL_DESP_CAR_DESC VL_OUT VL_FRT_BRT VL_FRT_MM',
+    'D150': 'REG COD_MUN_ORIG COD_MUN_DEST VEIC_ID VIAGEM IND_TFA VL_PESO_TX VL_TX_TERR VL_TX_RED '
+            'VL_OUT VL_TX_ADV',
+    'D160': 'REG DESPACHO CNPJ_CPF_REM IE_REM COD_MUN_ORI CNPJ_CPF_DEST IE_DEST COD_MUN_DEST',
+    'D161': 'REG IND_CARGA CNPJ_CPF_COL IE_COL COD_MUN_COL CNPJ_CPF_ENTG IE_ENTG COD_MUN_ENTG',
+    'D162': 'REG COD_MOD SER NUM_DOC DT_DOC VL_DOC VL_MERC QTD_VOL PESO_BRT PESO_LIQ',
+    'D170': 'REG COD_PART_CONSG COD_PART_RED COD_MUN_ORIG COD_MUN_DEST OTM IND_NAT_FRT VL_LIQ_FRT '
+            'VL_GRIS VL_PDG VL_OUT VL_FRT VEIC_ID UF_ID',
+    'D180': 'REG NUM_SEQ IND_EMIT CNPJ_CPF_EMIT UF_EMIT IE_EMIT COD_MUN_ORIG CNPJ_CPF_TOM UF_TOM '
+            'IE_TOM COD_MUN_DEST COD_MOD SER SUB NUM_DOC DT_DOC VL_DOC',
+    'D190': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ICMS VL_ICMS VL_RED_BC COD_OBS',
+    'D195': 'REG COD_OBS TXT_COMPL',
+    'D197': 'REG COD_AJ DESCR_COMPL_AJ COD_ITEM VL_BC_ICMS ALIQ_ICMS VL_ICMS VL_OUTROS',
+    'D300': 'REG COD_MOD SER SUB NUM_DOC_INI NUM_DOC_FIN CST_ICMS CFOP ALIQ_ICMS DT_DOC VL_OPR '
+            'VL_DESC VL_SERV VL_SEG VL_OUT_DESP VL_BC_ICMS VL_ICMS VL_RED_BC COD_OBS COD_CTA',
+    'D301': 'REG NUM_DOC_CANC',
+    'D310': 'REG COD_MUN_ORIG VL_SERV VL_BC_ICMS VL_ICMS',
+    'D350': 'REG COD_MOD ECF_MOD ECF_FAB ECF_CX',
+    'D355': 'REG DT_DOC CRO CRZ NUM_COO_FIN GT_FIN VL_BRT',
+    'D360': 'REG VL_PIS VL_COFINS',
+    'D365': 'REG COD_TOT_PAR VLR_ACUM_TOT NR_TOT DESCR_NR_TOT',
+    'D370': 'REG COD_MUN_ORIG VL_SERV QTD_BILH VL_BC_ICMS VL_ICMS',
+    'D390': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ISSQN ALIQ_ISSQN VL_ISSQN VL_BC_ICMS VL_ICMS '
+            'VL_RED_BC COD_OBS',
+    'D400': 'REG COD_PART COD_MOD COD_SIT SER SUB NUM_DOC DT_DOC VL_DOC VL_DESC VL_SERV VL_BC_ICMS '
+            'VL_ICMS VL_PIS VL_COFINS COD_CTA',
+    'D410': 'REG COD_MOD SER SUB NUM_DOC_INI NUM_DOC_FIN DT_DOC CST_ICMS CFOP ALIQ_ICMS VL_OPR '
+            'VL_DESC VL_SERV VL_BC_ICMS VL_ICMS',
+    'D411': 'REG NUM_DOC_CANC',
+    'D420': 'REG COD_MUN_ORIG VL_SERV VL_BC_ICMS VL_ICMS',
+    'D500': 'REG IND_OPER IND_EMIT COD_PART COD_MOD COD_SIT SER SUB NUM_DOC DT_DOC DT_A_P VL_DOC '
+            'VL_DESC VL_SERV VL_SERV_NT VL_TERC VL_DA VL_BC_ICMS VL_ICMS COD_INF VL_PIS VL_COFINS '
+            'COD_CTA TP_ASSINANTE',
+    'D510': 'REG NUM_ITEM COD_ITEM COD_CLASS QTD UNID VL_ITEM VL_DESC CST_ICMS CFOP VL_BC_ICMS '
+            'ALIQ_ICMS VL_ICMS VL_BC_ICMS_UF VL_ICMS_UF IND_REC COD_PART VL_PIS VL_COFINS COD_CTA',
+    'D530': 'REG IND_SERV DT_INI_SERV DT_FIN_SERV PER_FISCAL COD_AREA TERMINAL',
+    'D590': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ICMS VL_ICMS VL_BC_ICMS_ST VL_ICMS_ST VL_RED_BC '
+            'COD_OBS',
+    'D600': 'REG COD_MOD COD_MUN SER SUB COD_CONS QTD_CONS DT_DOC VL_DOC VL_DESC VL_SERV VL_SERV_NT '
+            'VL_TERC VL_DA VL_BC_ICMS VL_ICMS VL_PIS VL_COFINS',
+    'D610': 'REG COD_CLASS COD_ITEM QTD UNID VL_ITEM VL_DESC CST_ICMS CFOP ALIQ_ICMS VL_BC_ICMS '
+            'VL_ICMS VL_BC_ICMS_UF VL_ICMS_UF VL_RED_BC VL_PIS VL_COFINS COD_CTA',
+    'D690': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ICMS VL_ICMS VL_BC_ICMS_UF VL_ICMS_UF VL_RED_BC '
+            'COD_OBS',
+    'D695': 'REG COD_MOD SER NRO_ORD_INI NRO_ORD_FIN DT_DOC_INI DT_DOC_FIN NOM_MEST CHV_COD_DIG',
+    'D696': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ICMS VL_ICMS VL_BC_ICMS_UF VL_ICMS_UF VL_RED_BC '
+            'COD_OBS',
+    'D697': 'REG UF VL_BC_ICMS VL_ICMS',
+    'D700': 'REG IND_OPER IND_EMIT COD_PART COD_MOD COD_SIT SER NUM_DOC DT_DOC DT_E_S VL_DOC VL_DESC '
+            'VL_SERV VL_SERV_NT VL_TERC VL_DA VL_BC_ICMS VL_ICMS COD_INF VL_PIS VL_COFINS CHV_DOCe '
+            'FIN_DOCe TIP_FAT COD_MOD_DOC_REF CHV_DOCe_REF HASH_DOC_REF SER_DOC_REF NUM_DOC_REF '
+            'MES_DOC_REF COD_MUN_DEST DED',
+    'D730': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ICMS VL_ICMS VL_RED_BC COD_OBS',
+    'D731': 'REG VL_FCP_OP',
+    'D735': 'REG COD_OBS TXT_COMPL',
+    'D737': 'REG COD_AJ DESCR_COMPL_AJ COD_ITEM VL_BC_ICMS ALIQ_ICMS VL_ICMS VL_OUTROS',
+    'D750': 'REG COD_MOD SER DT_DOC QTD_CONS IND_PREPAGO VL_DOC VL_SERV VL_SERV_NT VL_TERC VL_DESC '
+            'VL_DA VL_BC_ICMS VL_ICMS VL_PIS VL_COFINS DED',
+    'D760': 'REG CST_ICMS CFOP ALIQ_ICMS VL_OPR VL_BC_ICMS VL_ICMS VL_RED_BC COD_OBS',
+    'D761': 'REG VL_FCP_OP',
+    'D990': 'REG QTD_LIN_D',
+
+    # Bloco E - Apuração do ICMS e do IPI
+    'E001': 'REG IND_MOV',
+    'E100': 'REG DT_INI DT_FIN',
+    'E110': 'REG VL_TOT_DEBITOS VL_AJ_DEBITOS VL_TOT_AJ_DEBITOS VL_ESTORNOS_CRED VL_TOT_CREDITOS '
+            'VL_AJ_CREDITOS VL_TOT_AJ_CREDITOS VL_ESTORNOS_DEB VL_SLD_CREDOR_ANT VL_SLD_APURADO '
+            'VL_TOT_DED VL_ICMS_RECOLHER VL_SLD_CREDOR_TRANSPORTAR DEB_ESP',
+    'E111': 'REG COD_AJ_APUR DESCR_COMPL_AJ VL_AJ_APUR',
+    'E112': 'REG NUM_DA NUM_PROC IND_PROC PROC TXT_COMPL',
+    'E113': 'REG COD_PART COD_MOD SER SUB NUM_DOC DT_DOC COD_ITEM VL_AJ_ITEM CHV_DOCe',
+    'E115': 'REG COD_INF_ADIC VL_INF_ADIC DESCR_COMPL_AJ',
+    'E116': 'REG COD_OR VL_OR DT_VCTO COD_REC NUM_PROC IND_PROC PROC TXT_COMPL MES_REF',
+    'E200': 'REG UF DT_INI DT_FIN',
+    'E210': 'REG IND_MOV_ST VL_SLD_CRED_ANT_ST VL_DEVOL_ST VL_RESSARC_ST VL_OUT_CRED_ST '
+            'VL_AJ_CREDITOS_ST VL_RETENCAO_ST VL_OUT_DEB_ST VL_AJ_DEBITOS_ST VL_SLD_DEV_ANT_ST '
+            'VL_DEDUCOES_ST VL_ICMS_RECOL_ST VL_SLD_CRED_ST_TRANSPORTAR DEB_ESP_ST',
+    'E220': 'REG COD_AJ_APUR DESCR_COMPL_AJ VL_AJ_APUR',
+    'E230': 'REG NUM_DA NUM_PROC IND_PROC PROC TXT_COMPL',
+    'E240': 'REG COD_PART COD_MOD SER SUB NUM_DOC DT_DOC COD_ITEM VL_AJ_ITEM CHV_DOCe',
+    'E250': 'REG COD_OR VL_OR DT_VCTO COD_REC NUM_PROC IND_PROC PROC TXT_COMPL MES_REF',
+    'E300': 'REG UF DT_INI DT_FIN',
+    'E310': 'REG IND_MOV_FCP_DIFAL VL_SLD_CRED_ANT_DIFAL VL_TOT_DEBITOS_DIFAL VL_OUT_DEB_DIFAL '
+            'VL_TOT_CREDITOS_DIFAL VL_OUT_CRED_DIFAL VL_SLD_DEV_ANT_DIFAL VL_DEDUCOES_DIFAL '
+            'VL_RECOL_DIFAL VL_SLD_CRED_TRANSPORTAR_DIFAL DEB_ESP_DIFAL VL_SLD_CRED_ANT_FCP '
+            'VL_TOT_DEB_FCP VL_OUT_DEB_FCP VL_TOT_CRED_FCP VL_OUT_CRED_FCP VL_SLD_DEV_ANT_FCP '
+            'VL_DEDUCOES_FCP VL_RECOL_FCP VL_SLD_CRED_TRANSPORTAR_FCP DEB_ESP_FCP',
+    'E311': 'REG COD_AJ_APUR DESCR_COMPL_AJ VL_AJ_APUR',
+    'E312': 'REG NUM_DA NUM_PROC IND_PROC PROC TXT_COMPL',
+    'E313': 'REG COD_PART COD_MOD SER SUB NUM_DOC CHV_DOCe DT_DOC COD_ITEM VL_AJ_ITEM',
+    'E316': 'REG COD_OR VL_OR DT_VCTO COD_REC NUM_PROC IND_PROC PROC TXT_COMPL MES_REF',
+    'E500': 'REG IND_APUR DT_INI DT_FIN',
+    'E510': 'REG CFOP CST_IPI VL_CONT_IPI VL_BC_IPI VL_IPI',
+    'E520': 'REG VL_SD_ANT_IPI VL_DEB_IPI VL_CRED_IPI VL_OD_IPI VL_OC_IPI VL_SC_IPI VL_SD_IPI',
+    'E530': 'REG IND_AJ VL_AJ COD_AJ IND_DOC NUM_DOC DESCR_AJ',
+    'E531': 'REG COD_PART COD_MOD SER SUB NUM_DOC DT_DOC COD_ITEM VL_AJ_ITEM CHV_NFE',
+    'E990': 'REG QTD_LIN_E',
+
+    # Bloco G - Controle do Crédito de ICMS do Ativo Permanente (CIAP)
+    'G001': 'REG IND_MOV',
+    'G110': 'REG DT_INI DT_FIN SALDO_IN_ICMS SOM_PARC VL_TRIB_EXP VL_TOTAL IND_PER_SAI ICMS_APROP '
+            'SOM_ICMS_OC',
+    'G125': 'REG COD_IND_BEM DT_MOV TIPO_MOV VL_IMOB_ICMS_OP VL_IMOB_ICMS_ST VL_IMOB_ICMS_FRT '
+            'VL_IMOB_ICMS_DIF NUM_PARC VL_PARC_PASS',
+    'G126': 'REG DT_INI DT_FIM NUM_PARC VL_PARC_PASS VL_TRIB_OC VL_TOTAL IND_PER_SAI VL_PARC_APROP',
+    'G130': 'REG IND_EMIT COD_PART COD_MOD SERIE NUM_DOC CHV_NFE_CTE DT_DOC NUM_DA',
+    'G140': 'REG NUM_ITEM COD_ITEM QTDE UNID VL_ICMS_OP_APLICADO VL_ICMS_ST_APLICADO '
+            'VL_ICMS_FRT_APLICADO VL_ICMS_DIF_APLICADO',
+    'G990': 'REG QTD_LIN_G',
+
+    # Bloco H - Inventário Físico
+    'H001': 'REG IND_MOV',
+    'H005': 'REG DT_INV VL_INV MOT_INV',
+    'H010': 'REG COD_ITEM UNID QTD VL_UNIT VL_ITEM IND_PROP COD_PART TXT_COMPL COD_CTA VL_ITEM_IR',
+    'H020': 'REG CST_ICMS BC_ICMS VL_ICMS',
+    'H030': 'REG VL_ICMS_OP VL_BC_ICMS_ST VL_ICMS_ST VL_FCP',
+    'H990': 'REG QTD_LIN_H',
+
+    # Bloco K - Controle da Produção e do Estoque
+    'K001': 'REG IND_MOV',
+    'K010': 'REG IND_TP_LEIAUTE',
+    'K100': 'REG DT_INI DT_FIN',
+    'K200': 'REG DT_EST COD_ITEM QTD IND_EST COD_PART',
+    'K210': 'REG DT_INI_OS DT_FIN_OS COD_DOC_OS COD_ITEM_ORI QTD_ORI',
+    'K215': 'REG COD_ITEM_DES QTD_DES',
+    'K220': 'REG DT_MOV COD_ITEM_ORI COD_ITEM_DEST QTD_ORI QTD_DEST',
+    'K230': 'REG DT_INI_OP DT_FIN_OP COD_DOC_OP COD_ITEM QTD_ENC',
+    'K235': 'REG DT_SAIDA COD_ITEM QTD COD_INS_SUBST',
+    'K250': 'REG DT_PROD COD_ITEM QTD',
+    'K255': 'REG DT_CONS COD_ITEM QTD COD_INS_SUBST',
+    'K260': 'REG COD_OP_OS COD_ITEM DT_SAIDA QTD_SAIDA DT_RET QTD_RET',
+    'K265': 'REG COD_ITEM QTD_CONS QTD_RET',
+    'K270': 'REG DT_INI_AP DT_FIN_AP COD_OP_OS COD_ITEM QTD_COR_POS QTD_COR_NEG ORIGEM',
+    'K275': 'REG COD_ITEM QTD_COR_POS QTD_COR_NEG COD_INS_SUBST',
+    'K280': 'REG DT_EST COD_ITEM QTD_COR_POS QTD_COR_NEG IND_EST COD_PART',
+    'K290': 'REG DT_INI_OP DT_FIN_OP COD_DOC_OP',
+    'K291': 'REG COD_ITEM QTD',
+    'K292': 'REG COD_ITEM QTD',
+    'K300': 'REG DT_PROD',
+    'K301': 'REG COD_ITEM QTD',
+    'K302': 'REG COD_ITEM QTD',
+    'K990': 'REG QTD_LIN_K',
+
+    # Bloco 1 - Outras Informações
+    '1001': 'REG IND_MOV',
+    '1010': 'REG IND_EXP IND_CCRF IND_COMB IND_USINA IND_VA IND_EE IND_CART IND_FORM IND_AER '
+            'IND_GIAF1 IND_GIAF3 IND_GIAF4 IND_REST_RESSARC_COMPL_ICMS',
+    '1100': 'REG IND_DOC NRO_DE DT_DE NAT_EXP NRO_RE DT_RE CHC_EMB DT_CHC DT_AVB TP_CHC PAIS',
+    '1105': 'REG COD_MOD SERIE NUM_DOC CHV_NFE DT_DOC COD_ITEM',
+    '1110': 'REG COD_PART COD_MOD SER NUM_DOC DT_DOC CHV_NFE NR_MEMO QTD UNID',
+    '1200': 'REG COD_AJ_APUR SLD_CRED CRED_APR CRED_RECEB CRED_UTIL SLD_CRED_FIM',
+    '1210': 'REG TIPO_UTIL NR_DOC VL_CRED_UTIL CHV_DOCe',
+    '1250': 'REG VL_CREDITO_ICMS_OP VL_ICMS_ST_REST VL_FCP_ST_REST VL_ICMS_ST_COMPL VL_FCP_ST_COMPL',
+    '1255': 'REG COD_MOT_REST_COMPL VL_CREDITO_ICMS_OP_MOT VL_ICMS_ST_REST_MOT VL_FCP_ST_REST_MOT '
+            'VL_ICMS_ST_COMPL_MOT VL_FCP_ST_COMPL_MOT',
+    '1300': 'REG COD_ITEM DT_FECH ESTQ_ABERT VOL_ENTR VOL_DISP VOL_SAIDAS VAL_AJ_PERDA VAL_AJ_GANHO '
+            'FECH_FISICO',
+    '1310': 'REG NUM_TANQUE ESTQ_ABERT VOL_ENTR VOL_DISP VOL_SAIDAS ESTQ_ESCR VAL_AJ_PERDA '
+            'VAL_AJ_GANHO FECH_FISICO',
+    '1320': 'REG NUM_BICO NR_INTERV MOT_INTERV NOM_INTERV CNPJ_INTERV CPF_INTERV VAL_FECHA VAL_ABERT '
+            'VOL_AFERI VOL_VENDAS',
+    '1350': 'REG SERIE FABRICANTE MODELO TIPO_MEDICAO',
+    '1360': 'REG NUM_LACRE DT_APLICACAO',
+    '1370': 'REG NUM_BICO COD_ITEM NUM_TANQUE',
+    '1390': 'REG COD_PROD',
+    '1391': 'REG DT_REGISTRO QTD_MOID ESTQ_INI QTD_PRODUZ ENT_ANID_HID OUTR_ENTR PERDA CONS '
+            'SAI_ANI_HID SAIDAS ESTQ_FIN ESTQ_INI_MEL PROD_DIA_MEL UTIL_MEL PROD_ALC_MEL OBS COD_ITEM '
+            'TP_RESIDUO QTD_RESIDUO',
+    '1400': 'REG COD_ITEM_IPM MUN VALOR',
+    '1500': 'REG IND_OPER IND_EMIT COD_PART COD_MOD COD_SIT SER SUB COD_CONS NUM_DOC DT_DOC DT_E_S '
+            'VL_DOC VL_DESC VL_FORN VL_SERV_NT VL_TERC VL_DA VL_BC_ICMS VL_ICMS VL_BC_ICMS_ST VL_ICMS_ST '
+            'COD_INF VL_PIS VL_COFINS TP_LIGACAO COD_GRUPO_TENSAO',
+    '1510': 'REG NUM_ITEM COD_ITEM COD_CLASS QTD UNID VL_ITEM VL_DESC CST_ICMS CFOP VL_BC_ICMS '
+            'ALIQ_ICMS VL_ICMS VL_BC_ICMS_ST ALIQ_ST VL_ICMS_ST IND_REC COD_PART VL_PIS VL_COFINS '
+            'COD_CTA',
+    '1600': 'REG COD_PART TOT_CREDITO TOT_DEBITO',
+    '1601': 'REG COD_PART_IP COD_PART_IT TOT_VS TOT_ISS TOT_OUTROS',
+    '1700': 'REG COD_DISP COD_MOD SER SUB NUM_DOC_INI NUM_DOC_FIN NUM_AUT',
+    '1710': 'REG NUM_DOC_INI NUM_DOC_FIN',
+    '1800': 'REG VL_CARGA VL_PASS VL_FAT IND_RAT VL_ICMS_ANT VL_BC_ICMS VL_ICMS_APUR VL_BC_ICMS_APUR '
+            'VL_DIF',
+    '1900': 'REG IND_APUR_ICMS DESCR_COMPL_OUT_APUR',
+    '1910': 'REG DT_INI DT_FIN',
+    '1920': 'REG VL_TOT_TRANSF_DEBITOS_OA VL_TOT_AJ_DEBITOS_OA VL_ESTORNOS_CRED_OA '
+            'VL_TOT_TRANSF_CREDITOS_OA VL_TOT_AJ_CREDITOS_OA VL_ESTORNOS_DEB_OA VL_SLD_CREDOR_ANT_OA '
+            'VL_SLD_APURADO_OA VL_TOT_DED VL_ICMS_RECOLHER_OA VL_SLD_CREDOR_TRANSP_OA DEB_ESP_OA',
+    '1921': 'REG COD_AJ_APUR DESCR_COMPL_AJ VL_AJ_APUR',
+    '1922': 'REG NUM_DA NUM_PROC IND_PROC PROC TXT_COMPL',
+    '1923': 'REG COD_PART COD_MOD SER SUB NUM_DOC DT_DOC COD_ITEM VL_AJ_ITEM CHV_DOCe',
+    '1925': 'REG COD_INF_ADIC VL_INF_ADIC DESCR_COMPL_AJ',
+    '1926': 'REG COD_OR VL_OR DT_VCTO COD_REC NUM_PROC IND_PROC PROC TXT_COMPL MES_REF',
+    '1960': 'REG IND_AP G1_01 G1_02 G1_03 G1_04 G1_05 G1_06 G1_07 G1_08 G1_09 G1_10 G1_11',
+    '1970': 'REG IND_AP G3_01 G3_02 G3_03 G3_04 G3_05 G3_06 G3_07 G3_T G3_08 G3_09',
+    '1975': 'REG ALIQ_IMP_BASE G3_10 G3_11 G3_12',
+    '1980': 'REG IND_AP G4_01 G4_02 G4_03 G4_04 G4_05 G4_06 G4_07 G4_08 G4_09 G4_10 G4_11 G4_12',
+    '1990': 'REG QTD_LIN_1',
+
+    # Bloco 9 - Controle e Encerramento do Arquivo Digital
+    '9001': 'REG IND_MOV',
+    '9900': 'REG REG_BLC QTD_REG_BLC',
+    '9990': 'REG QTD_LIN_9',
+    '9999': 'REG QTD_LIN',
+}
+
+
+Campo = namedtuple('Campo', 'nome posicao tipo')
+
+
+def tipo_por_nome(nome):
+    """Retorna o tipo (decimal, data ou texto) de um campo pelas regras de nome do Guia Prático"""
+    if nome.startswith(PREFIXO_DATA):
+        return DATA
+    if nome.startswith(PREFIXOS_DECIMAIS) or nome in CAMPOS_DECIMAIS:
+        return DECIMAL
+    return TEXTO
+
+
+def converter_decimal_texto(texto):
+    """Converte um decimal no formato do SPED em float; vazio vira None e inválido fica como texto"""
+    if not texto:
+        return None
+    try:
+        return float(texto.replace(',', '.'))
+    except ValueError:
+        return texto
+
+
+def converter_data_texto(texto):
+    """Converte uma data DDMMAAAA em AAAA-MM-DD; vazio vira None e inválido fica como texto"""
+    if not texto:
+        return None
+    if len(texto) != 8 or not texto.isdigit():
+        return texto
+    return f'{texto[4:]}-{texto[2:4]}-{texto[:2]}'
+
+
+CONVERSORES_TEXTO = {DECIMAL: converter_decimal_texto, DATA: converter_data_texto}
+
+
+class LayoutRegistro:
+    """Layout compilado de um registro: campos com posição e tipo, e as conversões por posição"""
+
+    __slots__ = ('registro', 'campos', 'nomes', 'posicoes', 'decimais', 'datas', '_conversores')
+
+    def __init__(self, registro, nomes):
+        self.registro = registro
+        self.campos = tuple(Campo(nome, posicao, tipo_por_nome(nome))
+                            for posicao, nome in enumerate(nomes, 1))
+        self.nomes = tuple(nomes)
+        self.posicoes = {campo.nome: campo.posicao for campo in self.campos}
+        self.decimais = frozenset(campo.nome for campo in self.campos if campo.tipo == DECIMAL)
+        self.datas = frozenset(campo.nome for campo in self.campos if campo.tipo == DATA)
+        # Apenas os campos que precisam de conversão, como (posição, função)
+        self._conversores = tuple((campo.posicao, CONVERSORES_TEXTO[campo.tipo])
+                                  for campo in self.campos if campo.tipo in CONVERSORES_TEXTO)
+
+    def colunas(self, quantidade):
+        """Nomes das `quantidade` primeiras colunas; campos além do layout viram Campo_N"""
+        nomes = list(self.nomes[:quantidade])
+        nomes.extend(f'Campo_{i}' for i in range(len(nomes) + 1, quantidade + 1))
+        return nomes
+
+    def converter_linha(self, campos):
+        """Converte uma linha dividida (`['', 'REG', ..., '']`) nos valores tipados dos campos"""
+        valores = campos[1:-1]
+        quantidade = len(valores)
+        for posicao, converter in self._conversores:
+            if posicao > quantidade:
+                break
+            valores[posicao - 1] = converter(valores[posicao - 1])
+        return valores
+
+    def converter_dataframe(self, df):
+        """Converte, no próprio DataFrame, os decimais em float e as datas em datetime"""
+        return converter_tipos(df, self.decimais)
+
+    def __len__(self):
+        return len(self.campos)
+
+    def __repr__(self):
+        return f'LayoutRegistro({self.registro!r}, {len(self.campos)} campos)'
+
+
+REGISTROS = {registro: LayoutRegistro(registro, campos.split())
+             for registro, campos in LAYOUTS.items()}
+
+
+def obter_layout(tipo_registro):
+    """Retorna o LayoutRegistro compilado do registro, ou None se não estiver no Guia Prático"""
+    return REGISTROS.get(tipo_registro)
+
+
+def nomes_campos(tipo_registro):
+    """Retorna uma cópia da lista de nomes de campos do registro, ou None se desconhecido"""
+    layout = REGISTROS.get(tipo_registro)
+    return list(layout.nomes) if layout is not None else None
@@ -0,0 +1,250 @@
+"""
+Leitura em passada única de arquivos SPED.
+
+O arquivo é lido em modo binário e cada linha é decodificada, validada, dividida e
+entregue ao consumidor uma única vez. Uma linha que não decodifica no encoding
+detectado é decodificada com o próximo encoding da lista, sem reler o arquivo, e a
+leitura para no registro 9999 (após ele vêm apenas os bytes da assinatura digital).
+
+Encodings em que '|' e a quebra de linha não são bytes ASCII (UTF-16, UTF-32) não
+podem ser divididos em linhas nos bytes: esses arquivos são lidos em modo texto,
+com o decodificador incremental do próprio Python.
+
+Com uma `SelecaoRegistros`, as linhas de registros não escolhidos são descartadas pelo
+prefixo `|REG|` ainda em bytes, antes de qualquer decodificação ou divisão.
+"""
+
+import codecs
+import logging
+import os
+import re
+from contextlib import closing
+
+from .progresso import LINHAS_POR_VERIFICACAO
+
+logger = logging.getLogger(__name__)
+
+# Código de registro: letra opcional do bloco seguida de 3 ou 4 dígitos (0000, C170, 9999)
+PADRAO_REGISTRO = re.compile(r'^[A-Z]?\d{3,4}$')
+
+# Encodings tentados, em ordem, quando uma linha não decodifica no encoding detectado
+ENCODINGS_ALTERNATIVOS = ('latin1', 'cp1252', 'iso-8859-1', 'utf-8')
+
+REGISTRO_ENCERRAMENTO = '9999'
+REGISTRO_ABERTURA = '0000'
+
+# Limites da leitura do cabeçalho: o 0000 é a primeira linha de um SPED válido
+LINHAS_MAXIMAS_CABECALHO = 20
+TAMANHO_MAXIMO_LINHA = 64 * 1024
+
+BLOCOS = ('0', 'B', 'C', 'D', 'E', 'G', 'H', 'K', '1', '9')
+
+# Registros lidos junto com os escolhidos porque as abas derivadas dependem deles: o
+# 0000 (empresa, período e CNPJ) e, para o C170_com_NCM, o documento C100 e o 0200
+REGISTROS_AUXILIARES = ('0000',)
+DEPENDENCIAS = {'C170': ('C100', '0200')}
+
+
+class SelecaoRegistros:
+    """Registros e blocos escolhidos para a conversão (ex.: "E110, E111, C197" ou "E").
+
+    Um bloco é indicado pela letra (ou dígito) inicial dos seus registros. Os registros
+    auxiliares são lidos, mas não ganham aba própria.
+    """
+
+    def __init__(self, itens):
+        self.registros = set()
+        self.blocos = set()
+        for item in itens:
+            item = item.strip().upper()
+            if not item:
+                continue
+            if item in BLOCOS:
+                self.blocos.add(item)
+            elif PADRAO_REGISTRO.match(item):
+                self.registros.add(item)
+            else:
+                raise ValueError(f"Registro ou bloco inválido na seleção: {item}")
+        if not self.registros and not self.blocos:
+            raise ValueError("Seleção de registros vazia")
+
+        self.auxiliares = set(REGISTROS_AUXILIARES)
+        for registro, dependencias in DEPENDENCIAS.items():
+            if self.escolhido(registro):
+                self.auxiliares.update(dependencias)
+        self.auxiliares -= self.registros
+        self._lidos = {}
+
+    @classmethod
+    def de_texto(cls, texto):
+        """Cria a seleção de um texto separado por vírgulas ou espaços; None se vazio"""
+        itens = texto.replace(',', ' ').split() if texto else []
+        return cls(itens) if itens else None
+
+    def escolhido(self, tipo_registro):
+        """Indica se o registro foi escolhido (ganha aba e entra nas tabelas)"""
+        return tipo_registro in self.registros or tipo_registro[:1] in self.blocos
+
+    def contem(self, tipo_registro):
+        """Indica se o registro deve ser lido (escolhido ou auxiliar)"""
+        lido = self._lidos.get(tipo_registro)
+        if lido is None:
+            lido = self._lidos[tipo_registro] = (self.escolhido(tipo_registro) or
+                                                 tipo_registro in self.auxiliares)
+        return lido
+
+    def prefixos(self):
+        """Prefixos em bytes das linhas a ler; o 9999 entra para encerrar a leitura"""
+        codigos = self.registros | self.auxiliares | {REGISTRO_ENCERRAMENTO}
+        return (tuple(f'|{codigo}|'.encode('ascii') for codigo in sorted(codigos)) +
+                tuple(f'|{bloco}'.encode('ascii') for bloco in sorted(self.blocos)))
+
+    def __repr__(self):
+        return f"SelecaoRegistros({', '.join(sorted(self.blocos | self.registros))})"
+
+
+def criar_selecao(valor):
+    """Normaliza a seleção: None, SelecaoRegistros, texto ("E110,E111") ou lista de itens"""
+    if valor is None or isinstance(valor, SelecaoRegistros):
+        return valor
+    if isinstance(valor, str):
+        return SelecaoRegistros.de_texto(valor)
+    return SelecaoRegistros(valor)
+
+
+def compativel_ascii(encoding):
+    """Indica se o encoding grava '|' e a quebra de linha como os bytes ASCII (leitura binária)"""
+    try:
+        codificador = codecs.getincrementalencoder(encoding)()
+    except LookupError:
+        # Encoding desconhecido: a leitura binária recorre aos encodings alternativos
+        return True
+    codificador.encode('|')  # descarta o BOM inicial (utf-8-sig, utf-16...)
+    return codificador.encode('|\n') == b'|\n'
+
+
+def abrir_texto(arquivo, encoding):
+    """Abre em modo texto um arquivo de encoding não compatível com ASCII (UTF-16, UTF-32)"""
+    return open(arquivo, 'r', encoding=encoding, errors='replace', newline=None)
+
+
+def decodificar_linha(linha_bytes, encoding):
+    """Decodifica uma linha, recorrendo aos encodings alternativos se necessário.
+
+    Retorna a tupla (texto, usou_alternativo).
+    """
+    try:
+        return linha_bytes.decode(encoding), False
+    except (UnicodeDecodeError, LookupError):
+        pass
+
+    for enc in ENCODINGS_ALTERNATIVOS:
+        try:
+            return linha_bytes.decode(enc), True
+        except UnicodeDecodeError:
+            continue
+
+    return linha_bytes.decode('latin1', errors='replace'), True
+
+
+def dividir_linha(linha):
+    """Valida e divide uma linha do SPED; retorna a lista de campos ou None se inválida"""
+    # Remove espaços em branco e caracteres de controle (inclusive o fim de linha)
+    linha = linha.strip()
+
+    # A linha deve começar e terminar com pipe
+    if not linha or linha[0] != '|' or linha[-1] != '|':
+        return None
+
+    campos = linha.split('|')
+
+    # Uma linha SPED válida deve ter pelo menos 3 campos e um código de registro válido
+    if len(campos) < 3 or not PADRAO_REGISTRO.match(campos[1]):
+        return None
+
+    return campos
+
+
+def ler_registro_abertura(arquivo, encoding):
+    """Lê apenas as primeiras linhas do arquivo e retorna os campos do registro 0000, ou None"""
+    encoding = encoding or 'utf-8'
+    binario = compativel_ascii(encoding)
+    with (open(arquivo, 'rb') if binario else abrir_texto(arquivo, encoding)) as f:
+        for _ in range(LINHAS_MAXIMAS_CABECALHO):
+            linha = f.readline(TAMANHO_MAXIMO_LINHA)
+            if not linha:
+                break
+            if binario:
+                linha = decodificar_linha(linha, encoding)[0]
+            campos = dividir_linha(linha)
+            if campos is not None and campos[1] == REGISTRO_ABERTURA:
+                return campos
+    return None
+
+
+def iterar_registros(arquivo, encoding, progresso=None, selecao=None):
+    """Gera (tipo_registro, campos) para cada linha válida do SPED, em uma única passada.
+
+    `campos` segue o formato de `linha.split('|')`: o primeiro e o último elementos são
+    vazios e o tipo de registro está na posição 1. Com `progresso` (Progresso), os bytes
+    lidos são informados a cada bloco de linhas; com `selecao` (SelecaoRegistros), só
+    os registros selecionados são gerados.
+    """
+    encoding = encoding or 'utf-8'
+    linhas_alternativas = 0
+    tamanho = os.path.getsize(arquivo) if progresso is not None else 0
+    prefixos = selecao.prefixos() if selecao is not None else None
+
+    if compativel_ascii(encoding):
+        linhas = _linhas_binarias(arquivo, encoding, prefixos, progresso, tamanho)
+    else:
+        linhas = _linhas_texto(arquivo, encoding, prefixos, progresso, tamanho)
+
+    with closing(linhas):
+        for linha, alternativo in linhas:
+            campos = dividir_linha(linha)
+            if campos is None:
+                continue
+
+            tipo_registro = campos[1]
+            if selecao is not None and not selecao.contem(tipo_registro):
+                if tipo_registro == REGISTRO_ENCERRAMENTO:
+                    break
+                continue
+
+            if alternativo:
+                linhas_alternativas += 1
+
+            yield tipo_registro, campos
+
+            if tipo_registro == REGISTRO_ENCERRAMENTO:
+                break
+
+    if linhas_alternativas:
+        logger.info(f"{linhas_alternativas} linha(s) decodificada(s) com encoding alternativo "
+                    f"(encoding detectado: {encoding})")
+
+
+def _linhas_binarias(arquivo, encoding, prefixos, progresso, tamanho):
+    """Gera (texto, usou_alternativo) de cada linha, lida em bytes e decodificada sozinha"""
+    with open(arquivo, 'rb') as f:
+        for numero, linha_bytes in enumerate(f, 1):
+            if progresso is not None and not numero % LINHAS_POR_VERIFICACAO:
+                progresso.leitura(f.tell(), tamanho)
+            # Linhas fora da seleção são descartadas ainda em bytes; as que não começam
+            # com '|' (BOM, espaços) seguem a validação normal
+            if prefixos is not None and linha_bytes[:1] == b'|' and not linha_bytes.startswith(prefixos):
+                continue
+            yield decodificar_linha(linha_bytes, encoding)
+
+
+def _linhas_texto(arquivo, encoding, prefixos, progresso, tamanho):
+    """Gera (texto, False) de cada linha de um arquivo UTF-16/UTF-32, lido em modo texto"""
+    prefixos = tuple(prefixo.decode('ascii') for prefixo in prefixos) if prefixos else None
+    with abrir_texto(arquivo, encoding) as f:
+        for numero, linha in enumerate(f, 1):
+            if progresso is not None and not numero % LINHAS_POR_VERIFICACAO:
+                progresso.leitura(f.buffer.tell(), tamanho)
+            if prefixos is not None and linha[:1] == '|' and not linha.startswith(prefixos):
+                continue
+            yield linha, False
@@ -0,0 +1,232 @@
+"""
+Leitura de arquivos SPED por mapeamento de memória (mmap), com decodificação preguiçosa.
+
+Em vez de transformar cada linha em `str` e depois em `list` de `str`, o arquivo é
+mapeado em memória e a varredura guarda apenas os deslocamentos (em bytes) de início
+e fim de cada linha, agrupados por tipo de registro em arrays compactos. Os campos de
+uma linha só são divididos e decodificados quando uma aba ou cálculo os acessa; as
+abas montadas por coluna (`RegistrosMapeados.colunas_texto`) decodificam cada linha
+uma vez, sem guardar as linhas divididas.
+
+O armazém resultante se comporta como o dicionário devolvido por `ler_arquivo_sped`
+(tipo de registro -> lista de linhas divididas), de modo que as abas existentes
+funcionam sem alteração.
+"""
+
+import codecs
+import mmap
+import re
+from array import array
+from collections.abc import Sequence
+from itertools import zip_longest
+
+from .leitor import REGISTRO_ENCERRAMENTO, compativel_ascii, decodificar_linha
+from .progresso import LINHAS_POR_VERIFICACAO
+from .resumo_fiscal import REGISTROS_RESUMO
+
+# Mesmo padrão de leitor.PADRAO_REGISTRO, aplicado diretamente sobre bytes
+PADRAO_REGISTRO_BYTES = re.compile(rb'^[A-Z]?\d{3,4}$')
+
+# Marca do 9999 fora da seleção: encerra a varredura sem guardar a linha
+FORA_DA_SELECAO = object()
+
+
+class LinhaMapeada(Sequence):
+    """Linha do SPED cujos campos são decodificados apenas quando acessados.
+
+    Equivale a `linha.split('|')`: o primeiro e o último elementos são vazios e o tipo
+    de registro está na posição 1.
+    """
+
+    __slots__ = ('_mm', '_inicio', '_fim', '_encoding', '_campos')
+
+    def __init__(self, mm, inicio, fim, encoding):
+        self._mm = mm
+        self._inicio = inicio
+        self._fim = fim
+        self._encoding = encoding
+        self._campos = None
+
+    def campos_bytes(self):
+        """Retorna os campos da linha ainda em bytes"""
+        if self._campos is None:
+            self._campos = self._mm[self._inicio:self._fim].split(b'|')
+        return self._campos
+
+    def _decodificar(self, campo):
+        return decodificar_linha(campo, self._encoding)[0]
+
+    def __getitem__(self, indice):
+        campos = self.campos_bytes()
+        if isinstance(indice, slice):
+            return [self._decodificar(campo) for campo in campos[indice]]
+        return self._decodificar(campos[indice])
+
+    def __len__(self):
+        return len(self.campos_bytes())
+
+    def __repr__(self):
+        return f"LinhaMapeada({self._mm[self._inicio:self._fim]!r})"
+
+
+class RegistrosMapeados(Sequence):
+    """Linhas de um tipo de registro, guardadas como pares de deslocamentos (início, fim)"""
+
+    __slots__ = ('_armazem', 'deslocamentos')
+
+    def __init__(self, armazem):
+        self._armazem = armazem
+        self.deslocamentos = array('Q')
+
+    def posicao(self, indice):
+        """Retorna os deslocamentos (início, fim) em bytes da linha `indice`"""
+        if indice < 0:
+            indice += len(self)
+        return self.deslocamentos[2 * indice], self.deslocamentos[2 * indice + 1]
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+        if not -len(self) <= indice < len(self):
+            raise IndexError('índice fora do intervalo')
+        inicio, fim = self.posicao(indice)
+        return LinhaMapeada(self._armazem.mm, inicio, fim, self._armazem.encoding)
+
+    def colunas_texto(self, posicoes=None, vazio=''):
+        """Textos dos campos nas `posicoes` de `linha.split('|')` (todos, se None), coluna a coluna.
+
+        Cada linha é decodificada direto dos bytes mapeados e descartada após a divisão;
+        só os campos pedidos são guardados. Campos ausentes em linhas curtas valem `vazio`.
+        """
+        mm = self._armazem.mm
+        encoding = self._armazem.encoding
+        deslocamentos = self.deslocamentos
+        colunas = [] if posicoes is None else [[] for _ in posicoes]
+        for indice in range(len(self)):
+            campos = decodificar_linha(mm[deslocamentos[2 * indice]:deslocamentos[2 * indice + 1]],
+                                       encoding)[0].split('|')
+            if posicoes is None:
+                while len(colunas) < len(campos):
+                    colunas.append([vazio] * indice)
+                for coluna, campo in zip_longest(colunas, campos, fillvalue=vazio):
+                    coluna.append(campo)
+            else:
+                quantidade = len(campos)
+                for coluna, posicao in zip(colunas, posicoes):
+                    coluna.append(campos[posicao] if posicao < quantidade else vazio)
+        return colunas
+
+    def __len__(self):
+        return len(self.deslocamentos) // 2
+
+
+class ArmazemMapeado(dict):
+    """Dicionário tipo de registro -> RegistrosMapeados, apoiado em um arquivo mapeado"""
+
+    def __init__(self, arquivo, encoding):
+        super().__init__()
+        self.arquivo = arquivo
+        self.encoding = encoding or 'utf-8'
+        self._handle = None
+        self.mm = None
+
+    def abrir(self):
+        """Abre e mapeia o arquivo em memória (somente leitura)"""
+        self._handle = open(self.arquivo, 'rb')
+        try:
+            self.mm = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Arquivo vazio não pode ser mapeado
+            self.mm = b''
+        return self
+
+    def fechar(self):
+        """Libera o mapeamento e o arquivo"""
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self.mm = None
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+
+
+def ler_arquivo_sped_mmap(arquivo, encoding, hierarquia=None, progresso=None, selecao=None,
+                         resumo=None):
+    """Varre o arquivo mapeado e retorna um ArmazemMapeado com os deslocamentos por registro.
+
+    Se `hierarquia` (IndiceHierarquia) for informada, cada linha é registrada nela na
+    ordem do arquivo; com `progresso`, a posição da varredura é informada a cada bloco
+    de linhas; com `selecao` (SelecaoRegistros), só os registros selecionados são guardados;
+    com `resumo` (ResumoFiscal), as linhas de C190/C590/D190/D590 são decodificadas e somadas.
+    """
+    if encoding and not compativel_ascii(encoding):
+        raise ValueError(f"Leitura mmap não suporta o encoding {encoding}: "
+                         f"as linhas não podem ser localizadas nos bytes")
+    armazem = ArmazemMapeado(arquivo, encoding).abrir()
+    encoding = armazem.encoding
+    mm = armazem.mm
+    tamanho = len(mm)
+    codigos = {}  # cache bytes -> str dos códigos de registro
+    # O BOM do UTF-8 não é removido pelo strip() e esconderia o '|' inicial do 0000
+    pos = len(codecs.BOM_UTF8) if mm[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0
+    linhas = 0
+
+    try:
+        while pos < tamanho:
+            if progresso is not None:
+                linhas += 1
+                if not linhas % LINHAS_POR_VERIFICACAO:
+                    progresso.leitura(pos, tamanho)
+            fim = mm.find(b'\n', pos)
+            if fim == -1:
+                fim = tamanho
+
+            bruto = mm[pos:fim]
+            linha = bruto.strip()
+
+            if len(linha) > 1 and linha[0] == 0x7C and linha[-1] == 0x7C:  # '|'
+                separador = linha.find(b'|', 1)
+                codigo = linha[1:separador]
+                if codigo in codigos:
+                    tipo_registro = codigos[codigo]
+                else:
+                    tipo_registro = codigos[codigo] = (
+                        codigo.decode('ascii') if PADRAO_REGISTRO_BYTES.match(codigo) else None)
+                    if (tipo_registro is not None and selecao is not None and
+                            not selecao.contem(tipo_registro)):
+                        # Fora da seleção: descartado pelo código, sem decodificar a linha
+                        tipo_registro = codigos[codigo] = (
+                            FORA_DA_SELECAO if tipo_registro == REGISTRO_ENCERRAMENTO else None)
+
+                if tipo_registro is FORA_DA_SELECAO:
+                    break
+                if tipo_registro is not None:
+                    inicio = pos + len(bruto) - len(bruto.lstrip())
+                    registros = armazem.get(tipo_registro)
+                    if registros is None:
+                        registros = armazem[tipo_registro] = RegistrosMapeados(armazem)
+                    registros.deslocamentos.append(inicio)
+                    registros.deslocamentos.append(inicio + len(linha))
+                    if hierarquia is not None:
+                        hierarquia.registrar(tipo_registro)
+                    if resumo is not None and tipo_registro in REGISTROS_RESUMO:
+                        resumo.adicionar(tipo_registro,
+                                         decodificar_linha(linha, encoding)[0].split('|'))
+
+                    if tipo_registro == REGISTRO_ENCERRAMENTO:
+                        break
+
+            pos = fim + 1
+    except BaseException:
+        # Inclui ConversaoCancelada e KeyboardInterrupt: o mapeamento e o arquivo são fechados
+        armazem.fechar()
+        raise
+
+    return armazem
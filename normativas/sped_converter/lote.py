@@ -0,0 +1,167 @@
+"""
+Conversão em lote de vários arquivos SPED, em paralelo.
+
+Cada arquivo é convertido em um processo separado (ProcessPoolExecutor) pelo mesmo
+`SpedConverter.processar_sped` da conversão individual, de modo que as planilhas,
+tabelas e bancos gerados são idênticos. O progresso é informado a cada arquivo
+concluído e o resultado final traz sucessos, falhas, tempos e quantidade de linhas
+lidas.
+"""
+
+import glob
+import logging
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .conversor import SpedConverter
+from .exportador import FORMATOS_TABELA
+
+logger = logging.getLogger(__name__)
+
+
+def listar_arquivos(entrada):
+    """Retorna os arquivos SPED de um diretório (*.txt) ou de um padrão glob, ordenados"""
+    if os.path.isdir(entrada):
+        padrao = os.path.join(entrada, '*.txt')
+    else:
+        padrao = entrada
+    return sorted(caminho for caminho in glob.glob(padrao) if os.path.isfile(caminho))
+
+
+def caminho_saida_lote(arquivo, diretorio_saida=None):
+    """Retorna o xlsx de um arquivo do lote: mesmo nome, no diretório de saída ou no da entrada"""
+    base = os.path.splitext(os.path.basename(arquivo))[0]
+    return os.path.join(diretorio_saida or os.path.dirname(arquivo), base + '.xlsx')
+
+
+def caminhos_saida_lote(arquivos, diretorio_saida=None):
+    """Retorna o xlsx de cada arquivo do lote, sem repetir caminhos.
+
+    Entradas de mesmo nome em diretórios diferentes gravadas no mesmo diretório de
+    saída recebem o nome do diretório de origem (x_jan.xlsx, x_fev.xlsx) e, se ainda
+    assim coincidirem com outra saída, um número (x_jan_2.xlsx).
+    """
+    def chave(caminho):
+        return os.path.normcase(os.path.abspath(caminho))
+
+    caminhos = [caminho_saida_lote(arquivo, diretorio_saida) for arquivo in arquivos]
+    repetidos = Counter(chave(caminho) for caminho in caminhos)
+    usados = set()
+    resultado = []
+    for arquivo, caminho in zip(arquivos, caminhos):
+        base, extensao = os.path.splitext(caminho)
+        if repetidos[chave(caminho)] > 1:
+            origem = os.path.basename(os.path.dirname(os.path.abspath(arquivo)))
+            base = f'{base}_{origem}' if origem else base
+        candidato = base + extensao
+        numero = 2
+        while chave(candidato) in usados:
+            candidato = f'{base}_{numero}{extensao}'
+            numero += 1
+        usados.add(chave(candidato))
+        resultado.append(candidato)
+    return resultado
+
+
+def converter_arquivo(arquivo, caminho_saida, opcoes=None, formatos=None):
+    """Converte um arquivo do lote; executado no processo trabalhador.
+
+    `formatos` segue o -f da conversão individual (padrão: xlsx): o banco SQLite e o
+    diretório das tabelas Parquet/CSV ficam ao lado do xlsx (x.sqlite, x_tabelas/).
+    Retorna um dicionário com arquivo, saida, sucesso, erro, segundos e linhas; com
+    uma `instrumentacao` ativa nas opções, inclui também o relatório das etapas. Um
+    arquivo sem linhas SPED ou sem o registro 0000 conta como falha.
+    """
+    formatos = formatos or ['xlsx']
+    base = os.path.splitext(caminho_saida)[0]
+    saida_excel = caminho_saida if 'xlsx' in formatos else None
+    formatos_tabelas = [formato for formato in FORMATOS_TABELA if formato in formatos]
+    banco = base + '.sqlite' if 'sqlite' in formatos else None
+
+    inicio = time.perf_counter()
+    resultado = {'arquivo': arquivo, 'saida': saida_excel, 'sucesso': False,
+                 'erro': None, 'segundos': 0.0, 'linhas': 0}
+    conversor = None
+    try:
+        conversor = SpedConverter(**(opcoes or {}))
+        tabelas = conversor.processar_sped(arquivo, saida_excel, base + '_tabelas',
+                                           formatos_tabelas, banco)
+        if not conversor.linhas_por_registro.get('0000'):
+            # Sem o registro de abertura o arquivo não é um SPED: as saídas são descartadas
+            for caminho in [saida_excel, banco] + list(tabelas):
+                if caminho and os.path.exists(caminho):
+                    os.remove(caminho)
+            if os.path.isdir(base + '_tabelas') and not os.listdir(base + '_tabelas'):
+                os.rmdir(base + '_tabelas')
+            raise ValueError(f"Registro 0000 não encontrado em {arquivo}")
+        resultado['sucesso'] = True
+        resultado['linhas'] = sum(conversor.linhas_por_registro.values())
+    except Exception as e:
+        resultado['erro'] = str(e)
+    resultado['segundos'] = time.perf_counter() - inicio
+    if conversor is not None and conversor.instrumentacao.ativa:
+        resultado['relatorio'] = conversor.instrumentacao.relatorio()
+    return resultado
+
+
+def converter_lote(arquivos, diretorio_saida=None, processos=None, opcoes=None, ao_concluir=None,
+                   formatos=None):
+    """Converte `arquivos` em paralelo com até `processos` trabalhadores.
+
+    `opcoes` são repassadas ao SpedConverter de cada arquivo e `formatos` (xlsx, parquet,
+    csv, sqlite) a `converter_arquivo`. `ao_concluir(resultado,
+    concluidos, total)` é chamado à medida que cada arquivo termina. Retorna os
+    resultados na ordem de `arquivos`.
+    """
+    if diretorio_saida:
+        os.makedirs(diretorio_saida, exist_ok=True)
+
+    # Cada trabalhador grava em um caminho próprio, mesmo com nomes de entrada repetidos
+    caminhos_saida = caminhos_saida_lote(arquivos, diretorio_saida)
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        futuros = {
+            executor.submit(converter_arquivo, arquivo, caminho_saida, opcoes, formatos): arquivo
+            for arquivo, caminho_saida in zip(arquivos, caminhos_saida)
+        }
+        for futuro in as_completed(futuros):
+            arquivo = futuros[futuro]
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                # Falha do próprio processo trabalhador (ex.: encerrado pelo sistema)
+                resultado = {'arquivo': arquivo, 'saida': None, 'sucesso': False,
+                             'erro': str(e), 'segundos': 0.0, 'linhas': 0}
+            resultados[arquivo] = resultado
+
+            if resultado['sucesso']:
+                logger.info(f"Lote: {arquivo} convertido em {resultado['segundos']:.1f}s")
+            else:
+                logger.error(f"Lote: erro ao converter {arquivo}: {resultado['erro']}")
+            if ao_concluir:
+                ao_concluir(resultado, len(resultados), len(futuros))
+
+    return [resultados[arquivo] for arquivo in arquivos]
+
+
+def resumir_lote(resultados, segundos_total=None):
+    """Monta o texto do resumo final de um lote"""
+    sucessos = [r for r in resultados if r['sucesso']]
+    falhas = [r for r in resultados if not r['sucesso']]
+
+    linhas = [f"Arquivos: {len(resultados)} | Sucessos: {len(sucessos)} | Falhas: {len(falhas)}"]
+    if sucessos:
+        tempo_conversao = sum(r['segundos'] for r in sucessos)
+        linhas.append(f"Linhas lidas: {sum(r['linhas'] for r in sucessos)} | "
+                      f"Tempo de conversão: {tempo_conversao:.1f}s "
+                      f"(média {tempo_conversao / len(sucessos):.1f}s por arquivo)")
+        mais_lento = max(sucessos, key=lambda r: r['segundos'])
+        linhas.append(f"Mais lento: {os.path.basename(mais_lento['arquivo'])} "
+                      f"({mais_lento['segundos']:.1f}s)")
+    if segundos_total is not None:
+        linhas.append(f"Tempo total: {segundos_total:.1f}s")
+    for r in falhas:
+        linhas.append(f"FALHA {r['arquivo']}: {r['erro']}")
+    return '\n'.join(linhas)
@@ -0,0 +1,324 @@
+"""
+Consolidação de vários períodos (arquivos SPED mensais) em uma única planilha.
+
+Análises de incentivos (FOMENTAR, ProGoiás...) precisam de 12 a 60 meses de C190 e
+E110/E111 lado a lado. Cada arquivo é lido em um processo separado e resumido
+enquanto as linhas passam: do E110 ficam apenas os valores e o E111 é somado por
+código de ajuste. Os C190/C590/D190/D590 são somados por CST/CFOP/alíquota no mesmo
+ResumoFiscal usado na conversão de um arquivo. Nenhuma linha de registro fica em
+memória, só os totais de cada período.
+
+A planilha gerada traz:
+    Arquivos            situação de cada arquivo (consolidado, substituído, falha)
+    Consolidado_Fiscal  totais por CNPJ, período, CST, CFOP e alíquota
+    Serie_VL_OPR / Serie_VL_ICMS
+                        os mesmos totais com um período por coluna
+    E110_Periodos       apuração de cada mês e a verificação do saldo credor: o
+                        VL_SLD_CREDOR_ANT do mês deve ser o VL_SLD_CREDOR_TRANSPORTAR
+                        do mês anterior
+    Serie_E111          ajustes da apuração por código, um período por coluna
+
+Se houver mais de um arquivo para o mesmo CNPJ e período, vale o substituto (COD_FIN 1)
+ou, entre arquivos de mesma finalidade, o último da lista.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from .conversor import SpedConverter
+from .escritor import EscritorPlanilhas
+from .layouts import obter_layout
+from .leitor import iterar_registros
+from .resumo_fiscal import REGISTROS_RESUMO, ResumoFiscal
+from .tipos import converter_decimais
+
+logger = logging.getLogger(__name__)
+
+CHAVES_CONSOLIDADO = ['CST_ICMS', 'CFOP', 'ALIQ_ICMS']
+SERIES_CONSOLIDADO = ('VL_OPR', 'VL_ICMS')
+
+# Diferença (R$) aceita entre o saldo transportado e o saldo credor anterior
+TOLERANCIA_SALDO = 0.01
+
+VERIFICACAO_OK = 'OK'
+VERIFICACAO_DIVERGENTE = 'DIVERGENTE'
+VERIFICACAO_PRIMEIRO = 'PRIMEIRO PERÍODO'
+VERIFICACAO_LACUNA = 'MÊS ANTERIOR AUSENTE'
+VERIFICACAO_SEM_E110 = 'SEM E110 NO MÊS ANTERIOR'
+
+SAIDA_PADRAO = 'SPED_periodos.xlsx'
+
+
+class ResumoPeriodo:
+    """Totais de um arquivo SPED, acumulados à medida que as linhas são lidas"""
+
+    def __init__(self):
+        self.cabecalho = {}
+        self.e110 = None
+        self.e111 = {}
+        self.linhas = 0
+        self.fiscal = ResumoFiscal()
+        self._layout_e110 = obter_layout('E110')
+        self._posicoes_e111 = obter_layout('E111').posicoes
+
+    def adicionar(self, tipo_registro, campos):
+        self.linhas += 1
+        if tipo_registro in REGISTROS_RESUMO:
+            self.fiscal.adicionar(tipo_registro, campos)
+        elif tipo_registro == 'E111':
+            codigo = self._campo(campos, self._posicoes_e111['COD_AJ_APUR'])
+            valor = converter_decimais([self._campo(campos, self._posicoes_e111['VL_AJ_APUR'])])[0]
+            self.e111[codigo] = self.e111.get(codigo, 0.0) + np.nan_to_num(valor)
+        elif tipo_registro == 'E110' and self.e110 is None:
+            posicoes = self._layout_e110.posicoes
+            nomes = [nome for nome in self._layout_e110.nomes if nome != 'REG']
+            valores = converter_decimais([self._campo(campos, posicoes[nome]) for nome in nomes])
+            self.e110 = dict(zip(nomes, np.nan_to_num(valores).tolist()))
+        elif tipo_registro == '0000' and not self.cabecalho:
+            posicoes = obter_layout('0000').posicoes
+            self.cabecalho = {nome: self._campo(campos, posicoes[nome])
+                              for nome in ('COD_FIN', 'DT_INI', 'DT_FIN', 'NOME', 'CNPJ', 'CPF')}
+
+    def _campo(self, campos, posicao):
+        return campos[posicao].strip() if len(campos) > posicao else ''
+
+    def finalizar(self):
+        """Retorna o resumo do período como dicionário (enviado de volta ao processo principal)"""
+        consolidado = self.fiscal.tabela(CHAVES_CONSOLIDADO)
+
+        cabecalho = self.cabecalho
+        data_inicial = cabecalho.get('DT_INI', '')
+        return {
+            'cnpj': cabecalho.get('CNPJ') or cabecalho.get('CPF') or '',
+            'nome': cabecalho.get('NOME', ''),
+            'cod_fin': cabecalho.get('COD_FIN', ''),
+            'periodo': chave_periodo(data_inicial),
+            'consolidado': consolidado,
+            'e110': self.e110,
+            'e111': self.e111,
+        }
+
+
+def chave_periodo(data_inicial):
+    """Converte a DT_INI (DDMMAAAA) em (ano, mês), ou None se inválida"""
+    if len(data_inicial) != 8 or not data_inicial.isdigit():
+        return None
+    return int(data_inicial[4:]), int(data_inicial[2:4])
+
+
+def rotulo_periodo(periodo):
+    """Rótulo MM/AAAA de um período (ano, mês)"""
+    return f'{periodo[1]:02d}/{periodo[0]}'
+
+
+def resumir_arquivo(arquivo):
+    """Lê um arquivo SPED e retorna os totais do período; executado no processo trabalhador"""
+    inicio = time.perf_counter()
+    resultado = {'arquivo': arquivo, 'sucesso': False, 'erro': None, 'segundos': 0.0, 'linhas': 0}
+    try:
+        encoding = SpedConverter().detectar_encoding(arquivo)
+        resumo = ResumoPeriodo()
+        adicionar = resumo.adicionar
+        for tipo_registro, campos in iterar_registros(arquivo, encoding):
+            adicionar(tipo_registro, campos)
+        resultado.update(resumo.finalizar())
+        resultado['linhas'] = resumo.linhas
+        if resultado['periodo'] is None:
+            raise ValueError("registro 0000 ausente ou com DT_INI inválida")
+        resultado['sucesso'] = True
+    except Exception as e:
+        resultado['erro'] = str(e)
+    resultado['segundos'] = time.perf_counter() - inicio
+    return resultado
+
+
+def resumir_arquivos(arquivos, processos=None, ao_concluir=None):
+    """Resume `arquivos` em paralelo; retorna os resultados na ordem de `arquivos`"""
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        futuros = {executor.submit(resumir_arquivo, arquivo): arquivo for arquivo in arquivos}
+        for futuro in as_completed(futuros):
+            arquivo = futuros[futuro]
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                # Falha do próprio processo trabalhador (ex.: encerrado pelo sistema)
+                resultado = {'arquivo': arquivo, 'sucesso': False, 'erro': str(e),
+                             'segundos': 0.0, 'linhas': 0}
+            resultados[arquivo] = resultado
+
+            if resultado['sucesso']:
+                logger.info(f"Períodos: {arquivo} resumido em {resultado['segundos']:.1f}s")
+            else:
+                logger.error(f"Períodos: erro ao ler {arquivo}: {resultado['erro']}")
+            if ao_concluir:
+                ao_concluir(resultado, len(resultados), len(futuros))
+
+    return [resultados[arquivo] for arquivo in arquivos]
+
+
+def selecionar_periodos(resultados):
+    """Escolhe um arquivo por CNPJ e período; retorna os resumos ordenados por CNPJ e período.
+
+    Os arquivos preteridos recebem `substituido_por` com o arquivo escolhido.
+    """
+    escolhidos = {}
+    for resultado in resultados:
+        if not resultado['sucesso']:
+            continue
+        chave = (resultado['cnpj'], resultado['periodo'])
+        atual = escolhidos.get(chave)
+        if atual is not None and atual['cod_fin'] == '1' and resultado['cod_fin'] != '1':
+            resultado['substituido_por'] = atual['arquivo']
+            continue
+        if atual is not None:
+            atual['substituido_por'] = resultado['arquivo']
+            logger.warning(f"Períodos: {os.path.basename(atual['arquivo'])} substituído por "
+                           f"{os.path.basename(resultado['arquivo'])} "
+                           f"({rotulo_periodo(resultado['periodo'])})")
+        escolhidos[chave] = resultado
+    return [escolhidos[chave] for chave in sorted(escolhidos)]
+
+
+def montar_consolidado_periodos(resumos):
+    """Totais de C190/C590/D190/D590 por CNPJ, período, CST, CFOP e alíquota"""
+    partes = []
+    for resumo in resumos:
+        if resumo['consolidado'].empty:
+            continue
+        parte = resumo['consolidado'].copy()
+        parte.insert(0, 'Periodo', rotulo_periodo(resumo['periodo']))
+        parte.insert(0, 'CNPJ', resumo['cnpj'])
+        parte['_ordem'] = resumo['periodo'][0] * 12 + resumo['periodo'][1]
+        partes.append(parte)
+    if not partes:
+        return pd.DataFrame()
+    df = pd.concat(partes, ignore_index=True)
+    df = df.sort_values(['CNPJ', 'CFOP', 'CST_ICMS', 'ALIQ_ICMS', '_ordem'], kind='stable')
+    return df.drop(columns='_ordem').reset_index(drop=True)
+
+
+def montar_serie(df, chaves, valor, periodos):
+    """Tabela de `valor` com uma linha por `chaves` e uma coluna por período, mais o total"""
+    serie = df.pivot_table(index=chaves, columns='Periodo', values=valor, aggfunc='sum', fill_value=0)
+    colunas = [rotulo_periodo(periodo) for periodo in periodos]
+    serie = serie.reindex(columns=colunas, fill_value=0)
+    serie['TOTAL'] = serie.sum(axis=1)
+    serie.columns.name = None
+    return serie.reset_index()
+
+
+def montar_e110_periodos(resumos):
+    """E110 de cada período com a verificação do saldo credor em relação ao mês anterior"""
+    nomes = [nome for nome in obter_layout('E110').nomes if nome != 'REG']
+    linhas = []
+    anterior = None
+    for resumo in resumos:
+        if anterior is not None and anterior['cnpj'] != resumo['cnpj']:
+            anterior = None
+        e110 = resumo['e110']
+        if e110 is not None:
+            saldo_transportado = None
+            if anterior is None:
+                verificacao = VERIFICACAO_PRIMEIRO
+            elif (resumo['periodo'][0] * 12 + resumo['periodo'][1] -
+                  anterior['periodo'][0] * 12 - anterior['periodo'][1]) != 1:
+                verificacao = VERIFICACAO_LACUNA
+            elif anterior['e110'] is None:
+                verificacao = VERIFICACAO_SEM_E110
+            else:
+                saldo_transportado = anterior['e110']['VL_SLD_CREDOR_TRANSPORTAR']
+                diferenca = e110['VL_SLD_CREDOR_ANT'] - saldo_transportado
+                verificacao = (VERIFICACAO_OK if abs(diferenca) < TOLERANCIA_SALDO
+                               else VERIFICACAO_DIVERGENTE)
+            linhas.append([resumo['cnpj'], rotulo_periodo(resumo['periodo'])] +
+                          [e110[nome] for nome in nomes] +
+                          [saldo_transportado,
+                           None if saldo_transportado is None
+                           else round(e110['VL_SLD_CREDOR_ANT'] - saldo_transportado, 2),
+                           verificacao])
+        anterior = resumo
+    return pd.DataFrame(linhas, columns=['CNPJ', 'Periodo'] + nomes +
+                        ['SLD_TRANSPORTAR_MES_ANTERIOR', 'DIFERENCA_SLD_CREDOR', 'VERIFICACAO_SALDO'])
+
+
+def montar_e111_periodos(resumos):
+    """Ajustes E111 somados por CNPJ, período e código de ajuste"""
+    linhas = [(resumo['cnpj'], rotulo_periodo(resumo['periodo']), codigo, valor)
+              for resumo in resumos for codigo, valor in resumo['e111'].items()]
+    return pd.DataFrame(linhas, columns=['CNPJ', 'Periodo', 'COD_AJ_APUR', 'VL_AJ_APUR'])
+
+
+def montar_arquivos(resultados):
+    """Situação de cada arquivo lido"""
+    linhas = []
+    for resultado in resultados:
+        if not resultado['sucesso']:
+            situacao = f"FALHA: {resultado['erro']}"
+        elif resultado.get('substituido_por'):
+            situacao = f"SUBSTITUÍDO POR {os.path.basename(resultado['substituido_por'])}"
+        else:
+            situacao = 'CONSOLIDADO'
+        periodo = resultado.get('periodo')
+        linhas.append([resultado['arquivo'], resultado.get('cnpj', ''), resultado.get('nome', ''),
+                       rotulo_periodo(periodo) if periodo else '', resultado.get('cod_fin', ''),
+                       resultado['linhas'], situacao])
+    return pd.DataFrame(linhas, columns=['Arquivo', 'CNPJ', 'Nome', 'Periodo', 'COD_FIN',
+                                         'Linhas', 'Situacao'])
+
+
+def escrever_aba(escritor, writer, nome, df, larguras=None):
+    """Escreve `df` com cabeçalho (dividido em abas se passar do limite); números com formato"""
+    if df.empty:
+        return
+    formatos = ['numero' if pd.api.types.is_float_dtype(df[coluna]) else None for coluna in df.columns]
+    for nome_aba, inicio, fim in escritor.particoes(nome, len(df)):
+        worksheet = writer.book.add_worksheet(nome_aba)
+        escritor.escrever_cabecalho(worksheet, 0, df.columns)
+        escritor.escrever_dataframe(worksheet, 1, df.iloc[inicio:fim], formatos)
+        for coluna, cabecalho in enumerate(df.columns):
+            largura = (larguras or {}).get(cabecalho, max(len(str(cabecalho)) + 2, 14))
+            worksheet.set_column(coluna, coluna, largura)
+
+
+def gerar_planilha_periodos(resultados, caminho_saida):
+    """Grava a planilha multiperíodo a partir dos resultados de `resumir_arquivos`"""
+    resumos = selecionar_periodos(resultados)
+    periodos = sorted({resumo['periodo'] for resumo in resumos})
+
+    consolidado = montar_consolidado_periodos(resumos)
+    e110 = montar_e110_periodos(resumos)
+    e111 = montar_e111_periodos(resumos)
+    divergentes = int((e110['VERIFICACAO_SALDO'] == VERIFICACAO_DIVERGENTE).sum()) if not e110.empty else 0
+
+    with pd.ExcelWriter(caminho_saida, engine='xlsxwriter') as writer:
+        escritor = EscritorPlanilhas(writer.book)
+        escrever_aba(escritor, writer, 'Arquivos', montar_arquivos(resultados),
+                     {'Arquivo': 60, 'Nome': 40, 'Situacao': 40})
+        escrever_aba(escritor, writer, 'Consolidado_Fiscal', consolidado)
+        if not consolidado.empty:
+            for valor in SERIES_CONSOLIDADO:
+                escrever_aba(escritor, writer, f'Serie_{valor}',
+                             montar_serie(consolidado, ['CNPJ'] + CHAVES_CONSOLIDADO, valor, periodos))
+        escrever_aba(escritor, writer, 'E110_Periodos', e110, {'VERIFICACAO_SALDO': 26})
+        if not e111.empty:
+            escrever_aba(escritor, writer, 'Serie_E111',
+                         montar_serie(e111, ['CNPJ', 'COD_AJ_APUR'], 'VL_AJ_APUR', periodos))
+
+    logger.info(f"Planilha de períodos gravada em {caminho_saida}: {len(resumos)} período(s), "
+                f"{divergentes} divergência(s) de saldo credor")
+    return {'periodos': len(resumos), 'divergencias_saldo': divergentes}
+
+
+def consolidar_periodos(arquivos, caminho_saida, processos=None, ao_concluir=None):
+    """Lê os arquivos em paralelo e grava a planilha multiperíodo; retorna os resultados"""
+    resultados = resumir_arquivos(arquivos, processos, ao_concluir)
+    if not any(resultado['sucesso'] for resultado in resultados):
+        raise Exception("Nenhum arquivo SPED pôde ser lido")
+    gerar_planilha_periodos(resultados, caminho_saida)
+    return resultados
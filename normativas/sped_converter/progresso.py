@@ -0,0 +1,119 @@
+"""
+Progresso e cancelamento de conversões longas.
+
+O motor informa o avanço por eventos colocados em uma fila thread-safe: bytes lidos do
+arquivo, linhas gravadas nas abas e o início da gravação final do xlsx. A interface
+consome a fila no próprio laço (no Tk, com `root.after`), sem tocar nos widgets a
+partir da thread de conversão. Cada evento traz a fração da conversão inteira: a
+leitura ocupa o primeiro trecho da barra, a escrita das abas o segundo e a gravação
+do arquivo o restante.
+
+`cancelar()` pode ser chamado de qualquer thread. A conversão é interrompida no
+próximo ponto de verificação (a cada bloco de linhas lidas ou gravadas e entre as
+etapas) com `ConversaoCancelada`, e o xlsx parcial é removido.
+"""
+
+import queue
+import threading
+import time
+from collections import namedtuple
+
+LEITURA = 'leitura'
+ESCRITA = 'escrita'
+GRAVACAO = 'gravacao'
+# Eventos finais, enviados pela thread de conversão ao terminar
+CONCLUIDO = 'concluido'
+CANCELADO = 'cancelado'
+ERRO = 'erro'
+
+# Trecho (início, fim) da barra de progresso ocupado por cada etapa
+FAIXAS = {
+    LEITURA: (0.0, 0.3),
+    ESCRITA: (0.3, 0.85),
+    GRAVACAO: (0.85, 1.0),
+}
+
+# Linhas lidas entre duas verificações de progresso/cancelamento na leitura
+LINHAS_POR_VERIFICACAO = 16384
+
+# Intervalo mínimo entre dois eventos da mesma etapa (a fila não precisa de mais)
+INTERVALO_EVENTOS = 0.1
+
+# `total` None indica etapa sem medida (ex.: gravação do xlsx): barra indeterminada
+EventoProgresso = namedtuple('EventoProgresso', 'etapa atual total fracao detalhe')
+
+
+class ConversaoCancelada(BaseException):
+    """Conversão interrompida por `Progresso.cancelar()`.
+
+    Deriva de BaseException, como KeyboardInterrupt, para não ser absorvida pelos
+    `except Exception` que isolam a falha de uma aba das demais.
+    """
+
+
+class Progresso:
+    """Canal de progresso e cancelamento entre a thread de conversão e a interface"""
+
+    def __init__(self, fila=None):
+        self.fila = fila if fila is not None else queue.Queue()
+        self._cancelado = threading.Event()
+        self._etapa = None
+        self._ultimo_evento = 0.0
+        self.total_linhas = 0
+        self.linhas_escritas = 0
+
+    def cancelar(self):
+        """Pede o cancelamento; atendido no próximo ponto de verificação"""
+        self._cancelado.set()
+
+    @property
+    def cancelado(self):
+        return self._cancelado.is_set()
+
+    def verificar(self):
+        """Levanta ConversaoCancelada se o cancelamento foi pedido"""
+        if self._cancelado.is_set():
+            raise ConversaoCancelada("Conversão cancelada pelo usuário")
+
+    def leitura(self, bytes_lidos, total_bytes):
+        """Informa os bytes do arquivo já lidos"""
+        self._informar(LEITURA, bytes_lidos, total_bytes, forcar=bytes_lidos >= total_bytes)
+
+    def iniciar_escrita(self, total_linhas):
+        """Inicia a contagem de linhas das abas; `total_linhas` é a estimativa do total"""
+        self.total_linhas = total_linhas
+        self.linhas_escritas = 0
+        self._informar(ESCRITA, 0, total_linhas, forcar=True)
+
+    def escrita(self, linhas, aba=''):
+        """Soma `linhas` gravadas na aba `aba`"""
+        self.linhas_escritas += linhas
+        self._informar(ESCRITA, self.linhas_escritas, self.total_linhas, aba)
+
+    def gravacao(self):
+        """Informa o início da gravação final do arquivo (sem medida de avanço)"""
+        self._informar(GRAVACAO, 0, None, forcar=True)
+
+    def finalizar(self, etapa=CONCLUIDO, detalhe=''):
+        """Envia o evento final (CONCLUIDO, CANCELADO ou ERRO, com a mensagem em `detalhe`)"""
+        self.fila.put(EventoProgresso(etapa, 0, None, 1.0 if etapa == CONCLUIDO else None, detalhe))
+
+    def _informar(self, etapa, atual, total, detalhe='', forcar=False):
+        self.verificar()
+        agora = time.monotonic()
+        if not forcar and etapa == self._etapa and agora - self._ultimo_evento < INTERVALO_EVENTOS:
+            return
+        self._etapa = etapa
+        self._ultimo_evento = agora
+
+        inicio, fim = FAIXAS[etapa]
+        parcial = min(atual / total, 1.0) if total else 0.0
+        self.fila.put(EventoProgresso(etapa, atual, total, inicio + (fim - inicio) * parcial, detalhe))
+
+    def eventos(self):
+        """Retira da fila os eventos pendentes, sem bloquear"""
+        while True:
+            try:
+                yield self.fila.get_nowait()
+            except queue.Empty:
+                return
@@ -0,0 +1,133 @@
+"""
+Totais fiscais por direção, CFOP, CST e alíquota, acumulados durante a leitura.
+
+Os registros analíticos C190/C590/D190/D590 são somados linha a linha à medida que
+passam pelo leitor (`registrar_resumo`, no mesmo fluxo de `registrar_hierarquia`): o
+`ResumoFiscal` guarda apenas um vetor de totais por chave (direção, CFOP, CST_ICMS,
+ALIQ_ICMS), e não as linhas. As abas de resumo e a tabela de verificação do
+Consolidado_Fiscal saem desses totais, sem reler os registros nem agrupar o
+detalhe com o pandas; agrupamentos mais largos (por CFOP, por direção) somam os
+próprios totais.
+
+A direção vem do primeiro dígito do CFOP: 1, 2 e 3 são entradas; 5, 6 e 7, saídas.
+"""
+
+import pandas as pd
+
+from .layouts import obter_layout
+
+REGISTROS_RESUMO = ('C190', 'C590', 'D190', 'D590')
+CHAVES_RESUMO = ('DIRECAO', 'CFOP', 'CST_ICMS', 'ALIQ_ICMS')
+VALORES_RESUMO = ('VL_OPR', 'VL_BC_ICMS', 'VL_ICMS', 'VL_BC_ICMS_ST', 'VL_ICMS_ST',
+                  'VL_RED_BC', 'VL_IPI')
+
+# Abas de resumo: (nome da aba, chaves do agrupamento)
+ABAS_RESUMO = (
+    ('Resumo_CFOP_CST_ALIQ', CHAVES_RESUMO),
+    ('Resumo_CFOP', ('DIRECAO', 'CFOP')),
+    ('Resumo_Direcao', ('DIRECAO',)),
+)
+
+ENTRADA = 'ENTRADA'
+SAIDA = 'SAÍDA'
+INDEFINIDA = 'INDEFINIDA'
+DIRECOES = {'1': ENTRADA, '2': ENTRADA, '3': ENTRADA, '5': SAIDA, '6': SAIDA, '7': SAIDA}
+ORDEM_DIRECOES = {ENTRADA: 0, SAIDA: 1, INDEFINIDA: 2}
+
+CASAS_DECIMAIS = 2
+
+
+def _posicoes(tipo_registro):
+    """Posição (em `linha.split('|')`) de cada campo somado; None se o registro não o tem"""
+    posicoes = obter_layout(tipo_registro).posicoes
+    # Só o C190 tem VL_IPI; o D190 não tem os campos de ST
+    nomes = ('CST_ICMS', 'CFOP', 'ALIQ_ICMS') + VALORES_RESUMO
+    return tuple(posicoes.get(nome) if nome != 'VL_IPI' or tipo_registro == 'C190' else None
+                 for nome in nomes)
+
+
+def _decimal(campos, posicao):
+    """Valor decimal do campo ('1234,56'); vazio ou ausente vale 0 e inválido levanta ValueError"""
+    if posicao is None or posicao >= len(campos):
+        return 0.0
+    texto = campos[posicao].strip()
+    return float(texto.replace(',', '.')) if texto else 0.0
+
+
+class ResumoFiscal:
+    """Totais de C190/C590/D190/D590 por (direção, CFOP, CST_ICMS, ALIQ_ICMS)"""
+
+    def __init__(self):
+        self.totais = {}  # chave -> [quantidade de linhas, VL_OPR, VL_BC_ICMS, ...]
+        self.origem = dict.fromkeys(REGISTROS_RESUMO, 0)  # linhas lidas
+        self.processados = dict.fromkeys(REGISTROS_RESUMO, 0)  # linhas somadas
+        self._posicoes = {tipo: _posicoes(tipo) for tipo in REGISTROS_RESUMO}
+
+    @classmethod
+    def de_registros(cls, registros):
+        """Monta o resumo a partir de registros já lidos (ex.: entrada do cache)"""
+        resumo = cls()
+        for tipo_registro in REGISTROS_RESUMO:
+            for campos in registros.get(tipo_registro, ()):
+                resumo.adicionar(tipo_registro, campos)
+        return resumo
+
+    def adicionar(self, tipo_registro, campos):
+        """Soma uma linha de C190/C590/D190/D590; com valor não numérico, só conta na origem"""
+        self.origem[tipo_registro] += 1
+        try:
+            valores = [_decimal(campos, posicao) for posicao in self._posicoes[tipo_registro]]
+            cst, cfop = int(valores[0]), int(valores[1])
+        except (ValueError, OverflowError):
+            return
+        chave = (DIRECOES.get(str(cfop)[:1], INDEFINIDA), cfop, cst, valores[2])
+        totais = self.totais.get(chave)
+        if totais is None:
+            totais = self.totais[chave] = [0] + [0.0] * len(VALORES_RESUMO)
+        totais[0] += 1
+        for i, valor in enumerate(valores[3:], 1):
+            totais[i] += valor
+        self.processados[tipo_registro] += 1
+
+    @property
+    def linhas(self):
+        """Linhas de C190/C590/D190/D590 lidas"""
+        return sum(self.origem.values())
+
+    def verificacao(self):
+        """Contagens da tabela de verificação do Consolidado_Fiscal, por registro"""
+        return {tipo: {'origem': self.origem[tipo], 'processado': self.processados[tipo]}
+                for tipo in ('C190', 'D190', 'C590', 'D590')}
+
+    def agrupar(self, chaves=CHAVES_RESUMO):
+        """Soma os totais pelas `chaves` (subconjunto de CHAVES_RESUMO); retorna {chave: totais}"""
+        indices = [CHAVES_RESUMO.index(chave) for chave in chaves]
+        grupos = {}
+        for chave, totais in self.totais.items():
+            grupo = tuple(chave[i] for i in indices)
+            acumulado = grupos.get(grupo)
+            if acumulado is None:
+                grupos[grupo] = list(totais)
+            else:
+                for i, valor in enumerate(totais):
+                    acumulado[i] += valor
+        return grupos
+
+    def tabela(self, chaves=CHAVES_RESUMO):
+        """DataFrame dos totais agrupados por `chaves`, ordenado por direção e chaves"""
+        grupos = self.agrupar(chaves)
+        ordem = sorted(grupos, key=lambda grupo: (ORDEM_DIRECOES[grupo[0]],) + grupo[1:]
+                       if chaves[0] == 'DIRECAO' else grupo)
+        colunas = list(chaves) + ['QTD_REGISTROS'] + list(VALORES_RESUMO)
+        df = pd.DataFrame([list(grupo) + grupos[grupo] for grupo in ordem], columns=colunas)
+        df[list(VALORES_RESUMO)] = df[list(VALORES_RESUMO)].astype('float64').round(CASAS_DECIMAIS)
+        return df
+
+
+def registrar_resumo(pares, resumo):
+    """Repassa os pares (tipo_registro, campos), somando os registros analíticos em `resumo`"""
+    adicionar = resumo.adicionar
+    for tipo_registro, campos in pares:
+        if tipo_registro in REGISTROS_RESUMO:
+            adicionar(tipo_registro, campos)
+        yield tipo_registro, campos
@@ -0,0 +1,359 @@
+"""
+Gerador determinístico de arquivos SPED EFD ICMS/IPI sintéticos, para testes de carga.
+
+`gerar_sped` grava um arquivo com as quantidades pedidas de C100, C170, C190, C197,
+0200 e E111, com a estrutura de um arquivo real: blocos abertos e encerrados
+(X001/X990 com a contagem de linhas), 0150/0190/0200 referenciados pelos documentos,
+C190 com a soma dos itens de cada combinação CST/CFOP/alíquota da nota, E110 apurado
+a partir dos C190 e E111 e o bloco 9 com a contagem por registro. Os campos seguem a
+quantidade do layout do Guia Prático (`layouts`).
+
+O conteúdo depende apenas dos parâmetros e da semente, e as linhas são geradas e
+gravadas nota a nota, de modo que arquivos com dezenas de milhões de linhas são
+gerados sem mantê-los em memória.
+
+Uso:
+    python -m sped_converter.sintetico saida.txt --c100 100000 --c170 1000000
+"""
+
+import argparse
+import calendar
+import random
+import sys
+from collections import Counter
+
+ENCODING = 'latin-1'
+FIM_LINHA = '\r\n'
+
+# Linhas acumuladas antes de cada gravação no arquivo
+LINHAS_POR_GRAVACAO = 10000
+
+CSTS = ('000', '020', '040', '060', '090')
+CFOPS_ENTRADA = ('1101', '1102', '1556', '1910', '2101', '2102', '2556', '2910')
+CFOPS_SAIDA = ('5101', '5102', '5405', '5910', '6101', '6102', '6108', '6910')
+ALIQUOTAS = (4, 7, 12, 17, 19)
+CSTS_SEM_ICMS = ('040', '060')
+UNIDADES = (('UN', 'UNIDADE'), ('KG', 'QUILOGRAMA'), ('CX', 'CAIXA'))
+TIPOS_ITEM = ('00', '01', '04')
+
+# 4º caractere do COD_AJ_APUR: 0 outros débitos, 1 estorno de créditos,
+# 2 outros créditos, 3 estorno de débitos
+TIPOS_AJUSTE_E111 = (0, 1, 2, 3)
+DESCRICOES_AJUSTE_E111 = ('OUTROS DEBITOS', 'ESTORNO DE CREDITOS', 'OUTROS CREDITOS',
+                          'ESTORNO DE DEBITOS')
+
+ALIQ_PIS = 165  # 1,65%
+ALIQ_COFINS = 760  # 7,6%
+
+
+def valor(centavos):
+    """Formata um valor em centavos no padrão do SPED (1234,56)"""
+    return f'{centavos // 100},{centavos % 100:02d}'
+
+
+def _distribuir(total, partes, indice):
+    """Quantidade da parte `indice` ao dividir `total` igualmente entre `partes`"""
+    return total * (indice + 1) // partes - total * indice // partes
+
+
+def _combinacoes(entrada):
+    """Combinações (CST, CFOP, alíquota) possíveis para as notas de entrada ou de saída"""
+    cfops = CFOPS_ENTRADA if entrada else CFOPS_SAIDA
+    combinacoes = []
+    for cst in CSTS:
+        aliquotas = (0,) if cst in CSTS_SEM_ICMS else ALIQUOTAS
+        for cfop in cfops:
+            for aliquota in aliquotas:
+                combinacoes.append((cst, cfop, aliquota))
+    return combinacoes
+
+
+class GeradorSped:
+    """Gera as linhas de um arquivo sintético; use `gerar_sped` para gravá-lo"""
+
+    def __init__(self, c100=1000, c170=5000, c190=1500, produtos_0200=500, e111=10, c197=100,
+                 participantes=50, ano=2025, mes=7, cnpj='11222333000181',
+                 saldo_credor_anterior=0, semente=0):
+        if c100 <= 0 and (c170 or c190 or c197):
+            raise ValueError("C170, C190 e C197 exigem ao menos um C100")
+        self.c100 = c100
+        self.c170 = c170
+        self.c190 = c190
+        self.produtos_0200 = produtos_0200
+        self.e111 = e111
+        self.c197 = c197
+        self.participantes = max(participantes, 1)
+        self.ano = ano
+        self.mes = mes
+        self.cnpj = cnpj
+        self.saldo_credor_anterior = saldo_credor_anterior  # em centavos
+        self.rng = random.Random(semente)
+
+        self.dias = calendar.monthrange(ano, mes)[1]
+        self.dt_ini = f'01{mes:02d}{ano}'
+        self.dt_fin = f'{self.dias:02d}{mes:02d}{ano}'
+        self.combinacoes = {True: _combinacoes(True), False: _combinacoes(False)}
+        # Linhas por registro e por bloco, para os registros X990 e o bloco 9
+        self.contagem = Counter()
+        self.linhas_bloco = Counter()
+        # Totais da apuração (centavos)
+        self.debitos = 0
+        self.creditos = 0
+
+    def _linha(self, *campos):
+        registro = campos[0]
+        self.contagem[registro] += 1
+        self.linhas_bloco[registro[0]] += 1
+        return '|' + '|'.join(campos) + '|' + FIM_LINHA
+
+    def _encerrar_bloco(self, bloco):
+        registro = f'{bloco}990'
+        return self._linha(registro, str(self.linhas_bloco[bloco] + 1))
+
+    def linhas(self):
+        """Gera as linhas do arquivo, em lotes (listas de str)"""
+        yield list(self._bloco_0())
+        yield list(self._abrir_bloco('B', '1'))
+        yield from self._bloco_c()
+        for bloco in ('D',):
+            yield list(self._abrir_bloco(bloco, '1'))
+        yield list(self._bloco_e())
+        for bloco in ('G', 'H', 'K'):
+            yield list(self._abrir_bloco(bloco, '1'))
+        yield list(self._bloco_1())
+        yield list(self._bloco_9())
+
+    def _abrir_bloco(self, bloco, indicador):
+        """Bloco sem dados: apenas abertura (indicador 1) e encerramento"""
+        yield self._linha(f'{bloco}001', indicador)
+        yield self._encerrar_bloco(bloco)
+
+    def _bloco_0(self):
+        rng = self.rng
+        yield self._linha('0000', '019', '0', self.dt_ini, self.dt_fin, 'EMPRESA SINTETICA LTDA',
+                          self.cnpj, '', 'GO', '101501668', '5208707', '', '', 'A', '0')
+        yield self._linha('0001', '0')
+        yield self._linha('0005', 'EMPRESA SINTETICA', '74000000', 'RUA SINTETICA', '1', '',
+                          'CENTRO', '6230000000', '', 'FISCAL@EMPRESA.COM.BR')
+        yield self._linha('0100', 'CONTADOR SINTETICO', '00000000191', 'GO000000', '',
+                          '74000000', 'RUA SINTETICA', '1', '', 'CENTRO', '6230000000', '',
+                          'CONTADOR@EMPRESA.COM.BR', '5208707')
+        for indice in range(self.participantes):
+            yield self._linha('0150', f'F{indice + 1:06d}', f'PARTICIPANTE SINTETICO {indice + 1}',
+                              '1058', f'{10000000 + indice:08d}000100', '', '', '5208707', '',
+                              'RUA SINTETICA', 'S/N', '', 'CENTRO')
+        for unidade, descricao in UNIDADES:
+            yield self._linha('0190', unidade, descricao)
+        for indice in range(self.produtos_0200):
+            yield self._linha('0200', self._codigo_item(indice), f'PRODUTO SINTETICO {indice + 1}',
+                              '', '', UNIDADES[indice % len(UNIDADES)][0],
+                              TIPOS_ITEM[indice % len(TIPOS_ITEM)],
+                              f'{rng.randrange(10000000, 100000000)}', '', '', '', '', '')
+        if self.c197:
+            yield self._linha('0460', 'OBS1', 'OBSERVACAO DO LANCAMENTO FISCAL')
+        yield self._encerrar_bloco('0')
+
+    def _codigo_item(self, indice):
+        return f'P{indice + 1:07d}'
+
+    def _bloco_c(self):
+        yield [self._linha('C001', '0' if self.c100 else '1')]
+        lote = []
+        for nota in range(self.c100):
+            lote.extend(self._nota(nota))
+            if len(lote) >= LINHAS_POR_GRAVACAO:
+                yield lote
+                lote = []
+        lote.append(self._encerrar_bloco('C'))
+        yield lote
+
+    def _nota(self, nota):
+        """Linhas de uma nota: C100, C170, C190 (somas por combinação), C195/C197"""
+        rng = self.rng
+        saida = nota % 3 != 0
+        itens = _distribuir(self.c170, self.c100, nota)
+        quantidade_c190 = _distribuir(self.c190, self.c100, nota)
+        ajustes = _distribuir(self.c197, self.c100, nota)
+        combinacoes = self.combinacoes[not saida]
+        deslocamento = rng.randrange(len(combinacoes))
+        combinacoes_nota = [combinacoes[(deslocamento + i) % len(combinacoes)]
+                            for i in range(quantidade_c190)]
+        produtos = max(self.produtos_0200, 1)
+        aleatorio = rng.random
+
+        linhas_itens = []
+        totais = [[0, 0, 0] for _ in combinacoes_nota]  # VL_OPR, VL_BC_ICMS, VL_ICMS
+        total_itens = total_bc = total_icms = total_pis = total_cofins = 0
+        for item in range(itens):
+            if combinacoes_nota:
+                posicao = item % len(combinacoes_nota)
+                cst, cfop, aliquota = combinacoes_nota[posicao]
+            else:
+                posicao = None
+                cst, cfop, aliquota = combinacoes[(deslocamento + item) % len(combinacoes)]
+            quantidade = 1 + int(aleatorio() * 199)
+            vl_item = 100 + int(aleatorio() * 499900)
+            vl_bc = vl_item if aliquota else 0
+            vl_icms = vl_bc * aliquota // 100
+            vl_pis = vl_item * ALIQ_PIS // 10000
+            vl_cofins = vl_item * ALIQ_COFINS // 10000
+            total_itens += vl_item
+            total_bc += vl_bc
+            total_icms += vl_icms
+            total_pis += vl_pis
+            total_cofins += vl_cofins
+            if posicao is not None:
+                soma = totais[posicao]
+                soma[0] += vl_item
+                soma[1] += vl_bc
+                soma[2] += vl_icms
+            # Linha montada diretamente (caminho mais quente do gerador); contada ao final
+            texto_item = valor(vl_item)
+            texto_bc = texto_item if vl_bc else '0,00'
+            linhas_itens.append(
+                f'|C170|{item + 1}|{self._codigo_item(int(aleatorio() * produtos))}||{quantidade}|UN|'
+                f'{texto_item}|0|0|{cst}|{cfop}||{texto_bc}|{aliquota}|{valor(vl_icms)}|0|0|0|0|||'
+                f'0|0|0|01|{texto_item}|1,65|||{valor(vl_pis)}|01|{texto_item}|7,6|||'
+                f'{valor(vl_cofins)}||0|{FIM_LINHA}')
+        self.contagem['C170'] += itens
+        self.linhas_bloco['C'] += itens
+
+        icms_c190 = 0
+        linhas_c190 = []
+        for (cst, cfop, aliquota), (vl_opr, vl_bc, vl_icms) in zip(combinacoes_nota, totais):
+            icms_c190 += vl_icms
+            linhas_c190.append(self._linha('C190', cst, cfop, str(aliquota), valor(vl_opr),
+                                           valor(vl_bc), valor(vl_icms), '0', '0', '0', '0', ''))
+        if saida:
+            self.debitos += icms_c190
+        else:
+            self.creditos += icms_c190
+
+        dia = nota % self.dias + 1
+        data = f'{dia:02d}{self.mes:02d}{self.ano}'
+        numero = nota + 1
+        chave = (f'52{self.ano % 100:02d}{self.mes:02d}{self.cnpj}55001{numero:09d}1'
+                 f'{numero * 7919 % 100000000:08d}{numero % 10}')
+        linhas = [self._linha(
+            'C100', '1' if saida else '0', '0' if saida else '1',
+            f'F{nota % self.participantes + 1:06d}', '55', '00', '001', str(numero), chave,
+            data, data, valor(total_itens), '0', '0', '0', valor(total_itens), '9', '0', '0',
+            '0', valor(total_bc), valor(total_icms), '0', '0', '0', valor(total_pis),
+            valor(total_cofins), '0', '0')]
+        linhas.extend(linhas_itens)
+        linhas.extend(linhas_c190)
+
+        if ajustes:
+            linhas.append(self._linha('C195', 'OBS1', ''))
+            for ajuste in range(ajustes):
+                vl_bc = rng.randrange(1000, 2000000)
+                linhas.append(self._linha('C197', f'GO4{ajuste % 100 + 1:07d}', '',
+                                          self._codigo_item(rng.randrange(produtos)),
+                                          valor(vl_bc), '12', valor(vl_bc * 12 // 100), '0'))
+        return linhas
+
+    def _bloco_e(self):
+        rng = self.rng
+        yield self._linha('E001', '0')
+        yield self._linha('E100', self.dt_ini, self.dt_fin)
+
+        ajustes = []
+        totais = Counter()
+        for indice in range(self.e111):
+            tipo = TIPOS_AJUSTE_E111[indice % len(TIPOS_AJUSTE_E111)]
+            vl_ajuste = rng.randrange(100, 1000000)
+            totais[tipo] += vl_ajuste
+            ajustes.append((f'GO0{tipo}{indice % 9999 + 1:04d}',
+                            DESCRICOES_AJUSTE_E111[tipo], vl_ajuste))
+
+        # Apuração do ICMS próprio (campos 02 a 14 do E110)
+        debitos = self.debitos + totais[0] + totais[1]
+        creditos = self.creditos + totais[2] + totais[3] + self.saldo_credor_anterior
+        saldo_apurado = max(debitos - creditos, 0)
+        saldo_credor = max(creditos - debitos, 0)
+        yield self._linha('E110', valor(self.debitos), '0', valor(totais[0]), valor(totais[1]),
+                          valor(self.creditos), '0', valor(totais[2]), valor(totais[3]),
+                          valor(self.saldo_credor_anterior), valor(saldo_apurado), '0',
+                          valor(saldo_apurado), valor(saldo_credor), '0')
+        for codigo, descricao, vl_ajuste in ajustes:
+            yield self._linha('E111', codigo, descricao, valor(vl_ajuste))
+        if saldo_apurado:
+            vencimento = f'10{self.mes % 12 + 1:02d}{self.ano + self.mes // 12}'
+            yield self._linha('E116', '000', valor(saldo_apurado), vencimento, '108', '', '', '',
+                              '', f'{self.mes:02d}{self.ano}')
+        yield self._encerrar_bloco('E')
+
+    def _bloco_1(self):
+        yield self._linha('1001', '0')
+        yield self._linha('1010', *(['N'] * 13))
+        yield self._encerrar_bloco('1')
+
+    def _bloco_9(self):
+        yield self._linha('9001', '0')
+        # 9900 de cada registro gravado, do próprio 9900 e dos 9990/9999
+        registros = list(self.contagem) + ['9900', '9990', '9999']
+        quantidade_9900 = len(registros)
+        for registro in registros:
+            if registro == '9900':
+                quantidade = quantidade_9900
+            elif registro in ('9990', '9999'):
+                quantidade = 1
+            else:
+                quantidade = self.contagem[registro]
+            yield self._linha('9900', registro, str(quantidade))
+        yield self._linha('9990', str(self.linhas_bloco['9'] + 2))
+        yield self._linha('9999', str(sum(self.contagem.values()) + 1))
+
+
+def gerar_sped(destino, **parametros):
+    """Grava em `destino` um arquivo SPED sintético; retorna {registro: quantidade de linhas}.
+
+    Os parâmetros são os de `GeradorSped` (c100, c170, c190, produtos_0200, e111, c197,
+    participantes, ano, mes, cnpj, saldo_credor_anterior, semente).
+    """
+    gerador = GeradorSped(**parametros)
+    with open(destino, 'w', encoding=ENCODING, newline='') as f:
+        for lote in gerador.linhas():
+            f.write(''.join(lote))
+    return dict(gerador.contagem)
+
+
+def criar_parser():
+    """Cria o parser de argumentos do gerador"""
+    parser = argparse.ArgumentParser(
+        prog='python -m sped_converter.sintetico',
+        description='Gera um arquivo SPED EFD ICMS/IPI sintético e determinístico para testes de carga.'
+    )
+    parser.add_argument('destino', help='arquivo .txt a gerar')
+    parser.add_argument('--c100', type=int, default=1000, help='notas fiscais (padrão: %(default)s)')
+    parser.add_argument('--c170', type=int, default=5000,
+                        help='itens, distribuídos entre as notas (padrão: %(default)s)')
+    parser.add_argument('--c190', type=int, default=1500,
+                        help='registros analíticos, distribuídos entre as notas (padrão: %(default)s)')
+    parser.add_argument('--c197', type=int, default=100,
+                        help='ajustes de documento fiscal (padrão: %(default)s)')
+    parser.add_argument('--produtos', type=int, default=500, help='itens do 0200 (padrão: %(default)s)')
+    parser.add_argument('--e111', type=int, default=10, help='ajustes da apuração (padrão: %(default)s)')
+    parser.add_argument('--participantes', type=int, default=50, help='registros 0150 (padrão: %(default)s)')
+    parser.add_argument('--periodo', default='072025', help='mês de referência MMAAAA (padrão: %(default)s)')
+    parser.add_argument('--cnpj', default='11222333000181', help='CNPJ do contribuinte')
+    parser.add_argument('--semente', type=int, default=0, help='semente dos valores (padrão: %(default)s)')
+    return parser
+
+
+def main(argv=None):
+    """Ponto de entrada do gerador"""
+    args = criar_parser().parse_args(argv)
+    if len(args.periodo) != 6 or not args.periodo.isdigit():
+        print(f"Período inválido: {args.periodo} (use MMAAAA)", file=sys.stderr)
+        return 2
+    contagem = gerar_sped(args.destino, c100=args.c100, c170=args.c170, c190=args.c190,
+                          produtos_0200=args.produtos, e111=args.e111, c197=args.c197,
+                          participantes=args.participantes, mes=int(args.periodo[:2]),
+                          ano=int(args.periodo[2:]), cnpj=args.cnpj, semente=args.semente)
+    print(f"{args.destino}: {sum(contagem.values())} linhas")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
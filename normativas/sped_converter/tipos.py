@@ -0,0 +1,100 @@
+"""
+Conversão vetorizada de campos do SPED para tipos nativos.
+
+Os decimais no formato brasileiro (`1234,56`) e as datas `DDMMAAAA` são convertidos
+por coluna inteira, em vez de `float(valor.replace(',', '.'))` e `datetime(...)` a
+cada célula: a vírgula decimal é trocada em uma única operação sobre o texto da
+coluna, os valores são convertidos por `map` direto para um array NumPy e as datas
+são montadas com aritmética de datetime64 sobre a coluna. A conversão é dirigida
+pelo esquema: os campos decimais do layout de cada registro (`layouts`) viram float64
+e todo campo DT_* vira data.
+"""
+
+import numpy as np
+import pandas as pd
+
+PREFIXO_DATA = 'DT_'
+
+# Separador usado para tratar a coluna como um único texto (não ocorre em campos do SPED)
+SEPARADOR = '\x1f'
+VAZIO = SEPARADOR * 2
+NAN = SEPARADOR + 'nan' + SEPARADOR
+
+
+def _textos(valores):
+    """Normaliza a coluna para uma lista de str (None/NaN viram '')"""
+    return ['' if valor is None or valor != valor else valor for valor in valores]
+
+
+def converter_decimais(valores):
+    """Converte uma coluna de decimais '1234,56' em array float64 (vazio/inválido -> NaN)"""
+    if len(valores) == 0:
+        return np.empty(0, dtype=np.float64)
+    try:
+        texto = SEPARADOR.join(valores)
+    except TypeError:
+        texto = SEPARADOR.join(_textos(valores))
+
+    # Vírgula decimal e campos vazios ('nan') tratados sobre o texto da coluna inteira
+    texto = (SEPARADOR + texto + SEPARADOR).replace(',', '.')
+    texto = texto.replace(VAZIO, NAN).replace(VAZIO, NAN)
+    textos = texto[1:-1].split(SEPARADOR)
+    try:
+        return np.fromiter(map(float, textos), dtype=np.float64, count=len(textos))
+    except ValueError:
+        # Há valores fora do padrão: tratar valor a valor
+        return np.array([_float_ou_nan(texto) for texto in textos], dtype=np.float64)
+
+
+def _float_ou_nan(texto):
+    if not texto:
+        return np.nan
+    try:
+        return float(texto)
+    except ValueError:
+        return np.nan
+
+
+def converter_datas(valores):
+    """Converte uma coluna de datas DDMMAAAA em array datetime64[D] (vazio/inválido -> NaT)"""
+    textos = _textos(valores)
+    if not textos:
+        return np.empty(0, dtype='datetime64[D]')
+    try:
+        numeros = np.fromiter(map(int, textos), dtype=np.int64, count=len(textos))
+        validas = np.fromiter(map(len, textos), dtype=np.int64, count=len(textos)) == 8
+    except ValueError:
+        # Há vazios ou valores fora do padrão: tratar valor a valor
+        validas = np.array([len(texto) == 8 and texto.isdigit() for texto in textos])
+        numeros = np.array([int(texto) if valida else 0 for texto, valida in zip(textos, validas)],
+                           dtype=np.int64)
+
+    dia = numeros // 1000000
+    mes = numeros // 10000 % 100
+    ano = numeros % 10000
+    validas &= (mes >= 1) & (mes <= 12) & (dia >= 1) & (ano >= 1)
+
+    # Primeiro dia do mês + (dia - 1); dias que "transbordam" o mês (ex.: 31/02) são inválidos
+    inicio_mes = (np.where(validas, (ano - 1970) * 12 + mes - 1, 0)).astype('datetime64[M]')
+    datas = inicio_mes.astype('datetime64[D]') + np.where(validas, dia - 1, 0)
+    validas &= datas.astype('datetime64[M]') == inicio_mes
+
+    return np.where(validas, datas, np.datetime64('NaT', 'D'))
+
+
+def converter_tipos(df, campos_numericos=()):
+    """Converte, no próprio DataFrame, os `campos_numericos` em float e os campos DT_* em datas.
+
+    Colunas que já estão tipadas (ex.: armazém colunar) são mantidas.
+    """
+    for coluna in df.columns:
+        if not isinstance(coluna, str):
+            continue
+        serie = df[coluna]
+        if coluna in campos_numericos:
+            if not pd.api.types.is_numeric_dtype(serie):
+                df[coluna] = converter_decimais(serie.tolist())
+        elif coluna.startswith(PREFIXO_DATA):
+            if not pd.api.types.is_datetime64_any_dtype(serie):
+                df[coluna] = converter_datas(serie.tolist())
+    return df
@@ -0,0 +1,175 @@
+"""
+Transbordo para disco dos registros que excedem um orçamento de memória.
+
+No modo de leitura padrão cada linha vira uma lista de `str`, o que custa cerca de
+60 bytes por campo: um C170 de dezenas de milhões de linhas não cabe na memória de
+uma máquina de 8 GB. Com um orçamento configurado, a leitura acumula os registros em
+um `ArmazemTransbordo`, que estima o tamanho em memória de cada registro; quando o
+total passa do orçamento, o maior registro é transferido para segmentos em um arquivo
+temporário (`RegistrosEmDisco`) e as linhas seguintes desse registro vão direto para
+o disco. Registros pequenos (0000, 0200, E110...) continuam em memória.
+
+`RegistrosEmDisco` se comporta como a lista de linhas divididas (len, iteração,
+índice), mas as abas o leem sequencialmente, em blocos (`iterar_blocos`), sem
+carregar o registro inteiro. Os arquivos temporários são removidos em `fechar()`.
+"""
+
+import logging
+import tempfile
+from array import array
+from collections.abc import Sequence
+
+logger = logging.getLogger(__name__)
+
+# Estimativa do custo em memória de uma linha dividida: lista + um str por campo
+CUSTO_LINHA = 56
+CUSTO_CAMPO = 64
+
+# Linhas por segmento no arquivo temporário (unidade de leitura e de acesso por índice)
+LINHAS_POR_SEGMENTO = 16384
+
+# Registros com menos linhas que isso nunca são transferidos para o disco
+LINHAS_MINIMAS_TRANSBORDO = 10000
+
+SEPARADOR = '|'
+CODIFICACAO = 'utf-8'
+ERROS_CODIFICACAO = 'surrogatepass'
+
+
+class RegistrosEmDisco(Sequence):
+    """Linhas de um registro gravadas em segmentos de um arquivo temporário.
+
+    Cada linha é gravada como o texto original (`'|'.join(campos)`), de modo que a
+    leitura devolve exatamente as mesmas listas de campos.
+    """
+
+    def __init__(self, diretorio=None):
+        self._arquivo = tempfile.TemporaryFile(prefix='sped_transbordo_', dir=diretorio)
+        self._inicios = array('q')  # deslocamento de cada segmento gravado
+        self._pendentes = []  # linhas do segmento em formação
+        self._gravadas = 0
+        self._segmento_cache = (-1, None)
+
+    def append(self, campos):
+        self._pendentes.append(SEPARADOR.join(campos))
+        if len(self._pendentes) >= LINHAS_POR_SEGMENTO:
+            self._gravar_pendentes()
+
+    def extend(self, linhas):
+        for campos in linhas:
+            self.append(campos)
+
+    def _gravar_pendentes(self):
+        if not self._pendentes:
+            return
+        self._arquivo.seek(0, 2)
+        self._inicios.append(self._arquivo.tell())
+        texto = '\n'.join(self._pendentes) + '\n'
+        self._arquivo.write(texto.encode(CODIFICACAO, ERROS_CODIFICACAO))
+        self._gravadas += len(self._pendentes)
+        self._pendentes = []
+
+    def _ler_segmento(self, numero):
+        """Retorna as linhas (listas de campos) do segmento `numero`"""
+        if self._segmento_cache[0] == numero:
+            return self._segmento_cache[1]
+        inicio = self._inicios[numero]
+        if numero + 1 < len(self._inicios):
+            fim = self._inicios[numero + 1]
+        else:
+            self._arquivo.seek(0, 2)
+            fim = self._arquivo.tell()
+        self._arquivo.seek(inicio)
+        texto = self._arquivo.read(fim - inicio).decode(CODIFICACAO, ERROS_CODIFICACAO)
+        linhas = [linha.split(SEPARADOR) for linha in texto.split('\n')[:-1]]
+        self._segmento_cache = (numero, linhas)
+        return linhas
+
+    def iterar_blocos(self, inicio=0, fim=None):
+        """Gera as linhas de `inicio` a `fim` em blocos (listas) de até um segmento"""
+        self._gravar_pendentes()
+        fim = self._gravadas if fim is None else min(fim, self._gravadas)
+        posicao = inicio
+        while posicao < fim:
+            numero, deslocamento = divmod(posicao, LINHAS_POR_SEGMENTO)
+            linhas = self._ler_segmento(numero)
+            bloco = linhas[deslocamento:deslocamento + (fim - posicao)]
+            posicao += len(bloco)
+            yield bloco
+
+    def __iter__(self):
+        for bloco in self.iterar_blocos():
+            yield from bloco
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError(indice)
+        self._gravar_pendentes()
+        numero, deslocamento = divmod(indice, LINHAS_POR_SEGMENTO)
+        return self._ler_segmento(numero)[deslocamento]
+
+    def __len__(self):
+        return self._gravadas + len(self._pendentes)
+
+    def __repr__(self):
+        return f'RegistrosEmDisco({len(self)} linhas)'
+
+    def fechar(self):
+        """Remove o arquivo temporário"""
+        self._arquivo.close()
+        self._segmento_cache = (-1, None)
+
+
+class ArmazemTransbordo(dict):
+    """Dicionário tipo -> linhas que transfere os maiores registros para o disco.
+
+    `orcamento` é o tamanho estimado (bytes) que os registros podem ocupar em memória.
+    """
+
+    def __init__(self, orcamento, diretorio=None):
+        super().__init__()
+        self.orcamento = orcamento
+        self.diretorio = diretorio
+        self._estimativas = {}
+        self._total = 0
+        self.transbordados = []
+
+    def adicionar(self, tipo_registro, campos):
+        linhas = self.get(tipo_registro)
+        if linhas is None:
+            linhas = self[tipo_registro] = []
+            self._estimativas[tipo_registro] = 0
+        linhas.append(campos)
+        if type(linhas) is list:
+            custo = CUSTO_LINHA + CUSTO_CAMPO * len(campos)
+            self._estimativas[tipo_registro] += custo
+            self._total += custo
+            if self._total > self.orcamento:
+                self._transbordar()
+
+    def _transbordar(self):
+        """Transfere para o disco os maiores registros até o total caber no orçamento"""
+        while self._total > self.orcamento:
+            candidatos = [(estimativa, tipo) for tipo, estimativa in self._estimativas.items()
+                          if len(self[tipo]) >= LINHAS_MINIMAS_TRANSBORDO]
+            if not candidatos:
+                return
+            estimativa, tipo = max(candidatos)
+            em_disco = RegistrosEmDisco(self.diretorio)
+            em_disco.extend(self[tipo])
+            self[tipo] = em_disco
+            del self._estimativas[tipo]
+            self._total -= estimativa
+            self.transbordados.append(tipo)
+            logger.info(f"Transbordo: registro {tipo} ({len(em_disco)} linhas, "
+                        f"~{estimativa / (1024 * 1024):.0f} MB) transferido para o disco")
+
+    def fechar(self):
+        """Remove os arquivos temporários dos registros transferidos"""
+        for linhas in self.values():
+            if isinstance(linhas, RegistrosEmDisco):
+                linhas.fechar()
@@ -0,0 +1,50 @@
+"""Fixtures dos testes: arquivos SPED sintéticos gerados por sped_converter.sintetico"""
+
+import os
+import sys
+
+import openpyxl
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sped_converter.sintetico import gerar_sped  # noqa: E402
+
+PARAMETROS_PEQUENO = dict(c100=60, c170=300, c190=90, produtos_0200=40, e111=5, c197=10,
+                          participantes=20, semente=7)
+
+
+def ler_planilha(caminho):
+    """Conteúdo do xlsx: {aba: [linhas]}, sem as células vazias do fim de cada linha"""
+    workbook = openpyxl.load_workbook(caminho, read_only=True)
+    try:
+        abas = {}
+        for nome in workbook.sheetnames:
+            linhas = []
+            for linha in workbook[nome].iter_rows(values_only=True):
+                linha = list(linha)
+                while linha and linha[-1] is None:
+                    linha.pop()
+                linhas.append(tuple(linha))
+            abas[nome] = linhas
+        return abas
+    finally:
+        workbook.close()
+
+
+@pytest.fixture(scope='session')
+def sped_pequeno(tmp_path_factory):
+    """Arquivo SPED sintético pequeno, com C100/C170/C190, E110/E111 e C197"""
+    caminho = str(tmp_path_factory.mktemp('sped') / 'sped_pequeno.txt')
+    gerar_sped(caminho, **PARAMETROS_PEQUENO)
+    return caminho
+
+
+@pytest.fixture(scope='session')
+def planilha_padrao(sped_pequeno, tmp_path_factory):
+    """Planilha de referência do arquivo pequeno, gerada no modo de leitura padrão"""
+    from sped_converter.conversor import SpedConverter
+
+    caminho = str(tmp_path_factory.mktemp('referencia') / 'padrao.xlsx')
+    SpedConverter().processar_sped(sped_pequeno, caminho)
+    return ler_planilha(caminho)
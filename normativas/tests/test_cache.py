@@ -0,0 +1,106 @@
+"""Cache de leitura: chave, acerto x falha, limite de tamanho e entradas inválidas"""
+
+import os
+import shutil
+
+import pytest
+
+from conftest import ler_planilha
+from sped_converter.cache import ASSINATURA, EXTENSAO, CacheLeitura
+from sped_converter.conversor import SpedConverter
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheLeitura(str(tmp_path / 'cache'))
+
+
+def entradas(cache):
+    return sorted(nome for nome in os.listdir(cache.diretorio))
+
+
+def test_chave_depende_apenas_do_conteudo(cache, sped_pequeno, tmp_path):
+    copia = str(tmp_path / 'outro_nome.txt')
+    shutil.copyfile(sped_pequeno, copia)
+    assert cache.chave(copia) == cache.chave(sped_pequeno)
+
+    with open(copia, 'ab') as f:
+        f.write(b'|9999|1|\r\n')
+    assert cache.chave(copia) != cache.chave(sped_pequeno)
+
+
+@pytest.mark.parametrize('modo_gravacao,modo_leitura', [
+    ('padrao', 'padrao'), ('colunar', 'colunar'), ('padrao', 'colunar'), ('colunar', 'padrao'),
+])
+def test_acerto_gera_a_mesma_planilha_da_falha(modo_gravacao, modo_leitura, cache, sped_pequeno,
+                                               planilha_padrao, tmp_path):
+    falha = str(tmp_path / 'falha.xlsx')
+    SpedConverter(modo_leitura=modo_gravacao, cache=cache).processar_sped(sped_pequeno, falha)
+    assert (cache.acertos, cache.falhas) == (0, 1)
+
+    acerto = str(tmp_path / 'acerto.xlsx')
+    SpedConverter(modo_leitura=modo_leitura, cache=cache).processar_sped(sped_pequeno, acerto)
+    assert (cache.acertos, cache.falhas) == (1, 1)
+
+    assert ler_planilha(falha) == planilha_padrao
+    assert ler_planilha(acerto) == planilha_padrao
+
+
+def test_acerto_com_selecao(cache, sped_pequeno, planilha_padrao, tmp_path):
+    SpedConverter(cache=cache).carregar_registros(sped_pequeno)
+    caminho = str(tmp_path / 'selecao.xlsx')
+    SpedConverter(cache=cache, selecao='E110,E111').processar_sped(sped_pequeno, caminho)
+    assert cache.acertos == 1
+    planilha = ler_planilha(caminho)
+    assert sorted(planilha) == ['E110', 'E111']
+    assert all(planilha[aba] == planilha_padrao[aba] for aba in planilha)
+
+
+def test_leitura_com_selecao_nao_grava_entrada(cache, sped_pequeno):
+    SpedConverter(cache=cache, selecao='E110').carregar_registros(sped_pequeno)
+    assert entradas(cache) == []
+
+
+def test_gravacao_atomica_nao_deixa_temporarios(cache, sped_pequeno):
+    encoding, registros = SpedConverter().carregar_registros(sped_pequeno)
+    chave = cache.chave(sped_pequeno)
+    cache.gravar(chave, encoding, registros, None)
+    cache.gravar(chave, encoding, registros, None)
+    assert entradas(cache) == [chave + EXTENSAO]
+
+    encoding_cache, registros_cache, _ = cache.obter(chave)
+    assert encoding_cache == encoding
+    assert dict(registros_cache) == dict(registros)
+
+
+def test_limite_remove_as_entradas_usadas_ha_mais_tempo(cache):
+    registros = {'C170': [['', 'C170', str(indice), 'x' * 40, ''] for indice in range(200)]}
+    for numero, chave in enumerate(['a', 'b', 'c']):
+        cache.gravar(chave, 'latin-1', registros, None)
+        os.utime(cache._caminho(chave), (1000 + numero, 1000 + numero))
+
+    # 'a' é a mais antiga, mas a leitura a torna a mais recente
+    assert cache.obter('a') is not None
+    tamanhos = {chave: os.path.getsize(cache._caminho(chave)) for chave in 'abc'}
+    cache.tamanho_maximo = tamanhos['a'] + tamanhos['c']
+    cache.limitar_tamanho()
+    assert entradas(cache) == ['a' + EXTENSAO, 'c' + EXTENSAO]
+
+    cache.tamanho_maximo = tamanhos['a']
+    cache.limitar_tamanho()
+    assert entradas(cache) == ['a' + EXTENSAO]
+
+
+@pytest.mark.parametrize('conteudo', [b'', b'LIXO', ASSINATURA + b'nao e zlib'])
+def test_entrada_invalida_e_descartada(conteudo, cache, sped_pequeno, planilha_padrao, tmp_path):
+    chave = cache.chave(sped_pequeno)
+    with open(cache._caminho(chave), 'wb') as f:
+        f.write(conteudo)
+    assert cache.obter(chave) is None
+    assert cache.falhas == 1
+    assert entradas(cache) == []
+
+    caminho = str(tmp_path / 'sped.xlsx')
+    SpedConverter(cache=cache).processar_sped(sped_pequeno, caminho)
+    assert ler_planilha(caminho) == planilha_padrao
+    assert entradas(cache) == [chave + EXTENSAO]
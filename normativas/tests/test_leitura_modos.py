@@ -0,0 +1,132 @@
+"""Modos de leitura (padrao, mmap, colunar), seleção de registros e transbordo"""
+
+import logging
+import os
+
+import pytest
+
+from conftest import ler_planilha
+from sped_converter import transbordo
+from sped_converter.colunar import TabelaRegistro
+from sped_converter.conversor import MODOS_LEITURA, SpedConverter
+from sped_converter.layouts import obter_layout
+from sped_converter.leitor_mmap import ArmazemMapeado
+from sped_converter.transbordo import ArmazemTransbordo, RegistrosEmDisco
+
+
+def linhas_por_tipo(registros):
+    return {tipo: [list(campos) for campos in linhas] for tipo, linhas in registros.items() if len(linhas)}
+
+
+@pytest.mark.parametrize('modo_leitura', MODOS_LEITURA)
+def test_modos_geram_planilhas_identicas(modo_leitura, sped_pequeno, planilha_padrao, tmp_path):
+    caminho = str(tmp_path / f'{modo_leitura}.xlsx')
+    SpedConverter(modo_leitura=modo_leitura).processar_sped(sped_pequeno, caminho)
+    assert ler_planilha(caminho) == planilha_padrao
+
+
+def test_memoria_constante_gera_planilha_identica(sped_pequeno, planilha_padrao, tmp_path):
+    caminho = str(tmp_path / 'constante.xlsx')
+    SpedConverter(memoria_constante=True).processar_sped(sped_pequeno, caminho)
+    assert ler_planilha(caminho) == planilha_padrao
+
+
+def test_modos_leem_os_mesmos_registros(sped_pequeno):
+    _, padrao = SpedConverter().carregar_registros(sped_pequeno)
+    esperado = linhas_por_tipo(padrao)
+
+    _, colunar = SpedConverter(modo_leitura='colunar').carregar_registros(sped_pequeno)
+    assert all(isinstance(tabela, TabelaRegistro) for tabela in colunar.values())
+    assert linhas_por_tipo(colunar) == esperado
+
+    conversor = SpedConverter(modo_leitura='mmap')
+    _, mapeados = conversor.carregar_registros(sped_pequeno)
+    try:
+        assert linhas_por_tipo(mapeados) == esperado
+    finally:
+        if isinstance(mapeados, ArmazemMapeado):
+            mapeados.fechar()
+
+
+def test_colunas_texto_reconstroem_os_campos(sped_pequeno):
+    _, padrao = SpedConverter().carregar_registros(sped_pequeno)
+    _, colunar = SpedConverter(modo_leitura='colunar').carregar_registros(sped_pequeno)
+    posicoes = obter_layout('C170').posicoes
+    campos = [posicoes['COD_ITEM'], posicoes['QTD'], posicoes['VL_ITEM'], posicoes['CFOP'], 200]
+
+    colunas = colunar['C170'].colunas_texto(campos)
+    for posicao, coluna in zip(campos, colunas):
+        esperado = [linha[posicao] if len(linha) > posicao else '' for linha in padrao['C170']]
+        assert list(coluna) == esperado
+
+
+def test_tabela_registro_preserva_valores_fora_do_padrao():
+    tabela = TabelaRegistro('C170', obter_layout('C170').nomes)
+    linha = ['', 'C170', '1', 'P0000001', '', '1,50000', 'UN', 'ABC', '0,00'] + [''] * 3
+    tabela.adicionar(linha)
+    assert tabela[0][:len(linha) - 1] == linha[:-1]
+    assert tabela[0][7] == 'ABC'
+
+
+def test_selecao_gera_apenas_abas_escolhidas(sped_pequeno, planilha_padrao, tmp_path):
+    caminho = str(tmp_path / 'selecao.xlsx')
+    SpedConverter(selecao='E110,E111').processar_sped(sped_pequeno, caminho)
+    planilha = ler_planilha(caminho)
+    assert sorted(planilha) == ['E110', 'E111']
+    assert all(planilha[aba] == planilha_padrao[aba] for aba in planilha)
+
+
+@pytest.mark.parametrize('encoding', ['utf-16', 'utf-32', 'utf-8-sig'])
+@pytest.mark.parametrize('modo_leitura', ['padrao', 'colunar'])
+def test_arquivos_unicode_geram_a_mesma_planilha(encoding, modo_leitura, sped_pequeno,
+                                                 planilha_padrao, tmp_path):
+    with open(sped_pequeno, encoding='latin-1', newline='') as f:
+        texto = f.read()
+    arquivo = str(tmp_path / 'sped.txt')
+    with open(arquivo, 'w', encoding=encoding, newline='') as f:
+        f.write(texto)
+
+    caminho = str(tmp_path / 'sped.xlsx')
+    SpedConverter(modo_leitura=modo_leitura).processar_sped(arquivo, caminho)
+    assert ler_planilha(caminho) == planilha_padrao
+
+
+@pytest.fixture
+def transbordo_pequeno(monkeypatch):
+    """Transbordo a partir de 50 linhas, em segmentos de 64 linhas"""
+    monkeypatch.setattr(transbordo, 'LINHAS_MINIMAS_TRANSBORDO', 50)
+    monkeypatch.setattr(transbordo, 'LINHAS_POR_SEGMENTO', 64)
+
+
+def test_armazem_transbordo_transfere_o_maior_registro(transbordo_pequeno, tmp_path):
+    armazem = ArmazemTransbordo(20000, str(tmp_path))
+    grandes = [['', 'C170', str(indice), f'P{indice:07d}', 'DESCRIÇÃO', ''] for indice in range(300)]
+    pequenos = [['', '0200', str(indice), ''] for indice in range(40)]
+    for campos in pequenos[:20] + grandes + pequenos[20:]:
+        armazem.adicionar(campos[1], campos)
+    try:
+        assert armazem.transbordados == ['C170']
+        assert isinstance(armazem['C170'], RegistrosEmDisco)
+        assert type(armazem['0200']) is list
+        assert list(armazem['C170']) == grandes
+        assert armazem['C170'][130] == grandes[130]
+        assert armazem['C170'][-1] == grandes[-1]
+        assert armazem['C170'][60:70] == grandes[60:70]
+        blocos = list(armazem['C170'].iterar_blocos(10, 200))
+        assert max(len(bloco) for bloco in blocos) <= 64
+        assert [campos for bloco in blocos for campos in bloco] == grandes[10:200]
+    finally:
+        armazem.fechar()
+
+
+def test_orcamento_de_memoria_gera_planilha_identica(transbordo_pequeno, sped_pequeno,
+                                                     planilha_padrao, tmp_path, caplog):
+    caplog.set_level(logging.INFO, logger=transbordo.__name__)
+    temporarios = tmp_path / 'temporarios'
+    temporarios.mkdir()
+    caminho = str(tmp_path / 'transbordo.xlsx')
+    SpedConverter(orcamento_memoria=0.01,
+                  diretorio_temporario=str(temporarios)).processar_sped(sped_pequeno, caminho)
+    assert 'Transbordo: registro C170' in caplog.text
+    assert ler_planilha(caminho) == planilha_padrao
+    assert os.listdir(temporarios) == []
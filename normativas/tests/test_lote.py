@@ -0,0 +1,62 @@
+"""Conversão em lote: saídas, formatos e contagem de falhas"""
+
+import os
+import shutil
+
+from conftest import ler_planilha
+from sped_converter.lote import caminhos_saida_lote, converter_lote, listar_arquivos, resumir_lote
+
+
+def test_caminhos_de_saida_nao_se_repetem(tmp_path):
+    arquivos = [os.path.join('jan', 'x.txt'), os.path.join('fev', 'x.txt'), 'y.txt',
+                os.path.join('jan', 'sub', 'x.txt'), os.path.join('jan', 'x_fev.txt')]
+    saida = str(tmp_path)
+    caminhos = caminhos_saida_lote(arquivos, saida)
+    assert [os.path.basename(caminho) for caminho in caminhos] == [
+        'x_jan.xlsx', 'x_fev.xlsx', 'y.xlsx', 'x_sub.xlsx', 'x_fev_2.xlsx']
+    assert all(os.path.dirname(caminho) == saida for caminho in caminhos)
+
+
+def test_sem_diretorio_de_saida_grava_ao_lado_da_entrada():
+    arquivos = [os.path.join('jan', 'x.txt'), os.path.join('fev', 'x.txt')]
+    assert caminhos_saida_lote(arquivos) == [os.path.join('jan', 'x.xlsx'),
+                                             os.path.join('fev', 'x.xlsx')]
+
+
+def test_lote_conta_falhas_e_descarta_saidas(sped_pequeno, planilha_padrao, tmp_path):
+    entrada = tmp_path / 'entrada'
+    entrada.mkdir()
+    shutil.copyfile(sped_pequeno, entrada / 'bom.txt')
+    with open(sped_pequeno, 'rb') as f:
+        linhas = f.read().split(b'\r\n')
+    (entrada / 'sem0000.txt').write_bytes(b'\r\n'.join(linhas[1:]))
+    (entrada / 'lixo.txt').write_bytes(b'nao e um arquivo SPED\r\noutra linha\r\n')
+
+    arquivos = listar_arquivos(str(entrada))
+    saida = tmp_path / 'saida'
+    resultados = converter_lote(arquivos, str(saida), processos=2,
+                                formatos=['xlsx', 'csv', 'sqlite'])
+    por_nome = {os.path.basename(resultado['arquivo']): resultado for resultado in resultados}
+
+    assert [resultado['arquivo'] for resultado in resultados] == arquivos
+    assert por_nome['bom.txt']['sucesso']
+    assert por_nome['bom.txt']['linhas'] > 0
+    assert not por_nome['sem0000.txt']['sucesso']
+    assert '0000' in por_nome['sem0000.txt']['erro']
+    assert not por_nome['lixo.txt']['sucesso']
+    assert por_nome['lixo.txt']['erro']
+
+    assert sorted(os.listdir(saida)) == ['bom.sqlite', 'bom.xlsx', 'bom_tabelas']
+    assert ler_planilha(str(saida / 'bom.xlsx')) == planilha_padrao
+    assert 'C170.csv' in os.listdir(saida / 'bom_tabelas')
+
+    resumo = resumir_lote(resultados, 1.0)
+    assert 'Arquivos: 3 | Sucessos: 1 | Falhas: 2' in resumo
+    assert f"FALHA {por_nome['sem0000.txt']['arquivo']}" in resumo
+
+
+def test_lote_sem_xlsx(sped_pequeno, tmp_path):
+    resultados = converter_lote([sped_pequeno], str(tmp_path), processos=1, formatos=['sqlite'])
+    assert resultados[0]['sucesso']
+    assert resultados[0]['saida'] is None
+    assert os.listdir(tmp_path) == ['sped_pequeno.sqlite']
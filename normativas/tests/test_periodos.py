@@ -0,0 +1,177 @@
+"""Planilha multiperíodo: seleção dos arquivos e verificação do saldo credor (E110)"""
+
+import pandas as pd
+import pytest
+
+from sped_converter.periodos import (VERIFICACAO_DIVERGENTE, VERIFICACAO_LACUNA, VERIFICACAO_OK,
+                                     VERIFICACAO_PRIMEIRO, VERIFICACAO_SEM_E110,
+                                     consolidar_periodos, montar_e110_periodos, resumir_arquivo,
+                                     selecionar_periodos)
+from sped_converter.sintetico import gerar_sped
+
+# Saldo credor inicial (centavos) acima dos débitos de alguns meses: o saldo é transportado
+SALDO_INICIAL = 10 ** 9
+PARAMETROS_MES = dict(c100=20, c170=60, c190=30, produtos_0200=20, e111=3, c197=0, participantes=5)
+
+
+def centavos(valor):
+    return int(round(valor * 100))
+
+
+def gerar_mes(diretorio, nome, mes, saldo_credor_anterior=0, **parametros):
+    """Gera o SPED de `mes`/2025 e retorna (caminho, VL_SLD_CREDOR_TRANSPORTAR em centavos)"""
+    caminho = str(diretorio / nome)
+    gerar_sped(caminho, **dict(PARAMETROS_MES, ano=2025, mes=mes, semente=mes,
+                               saldo_credor_anterior=saldo_credor_anterior, **parametros))
+    resultado = resumir_arquivo(caminho)
+    assert resultado['sucesso'], resultado['erro']
+    return caminho, centavos(resultado['e110']['VL_SLD_CREDOR_TRANSPORTAR'])
+
+
+def marcar_substituto(caminho):
+    """Muda o COD_FIN do 0000 para 1 (remessa de arquivo substituto)"""
+    with open(caminho, 'rb') as f:
+        conteudo = f.read()
+    assert conteudo.startswith(b'|0000|019|0|')
+    with open(caminho, 'wb') as f:
+        f.write(b'|0000|019|1|' + conteudo[len(b'|0000|019|0|'):])
+
+
+def gerar_meses(diretorio, meses, saldo_inicial=0):
+    """Meses encadeados: o saldo credor anterior de cada mês é o transportado do anterior"""
+    arquivos = []
+    saldo = saldo_inicial
+    for mes in meses:
+        caminho, saldo = gerar_mes(diretorio, f'sped_{mes:02d}.txt', mes, saldo)
+        arquivos.append(caminho)
+    return arquivos
+
+
+def ler_aba(caminho, aba):
+    return pd.read_excel(caminho, sheet_name=aba, dtype={'CNPJ': str, 'COD_FIN': str})
+
+
+@pytest.fixture
+def saida(tmp_path):
+    return str(tmp_path / 'periodos.xlsx')
+
+
+def test_saldo_credor_transportado_entre_meses(tmp_path, saida):
+    arquivos = gerar_meses(tmp_path, [1, 2, 3], saldo_inicial=SALDO_INICIAL)
+    resultados = consolidar_periodos(arquivos, saida, processos=2)
+    assert all(resultado['sucesso'] for resultado in resultados)
+
+    e110 = ler_aba(saida, 'E110_Periodos')
+    assert list(e110['Periodo']) == ['01/2025', '02/2025', '03/2025']
+    assert list(e110['VERIFICACAO_SALDO']) == [VERIFICACAO_PRIMEIRO, VERIFICACAO_OK, VERIFICACAO_OK]
+    assert e110['VL_SLD_CREDOR_ANT'].iloc[0] == SALDO_INICIAL / 100
+    assert (e110['VL_SLD_CREDOR_TRANSPORTAR'] > 0).all()
+    assert list(e110['SLD_TRANSPORTAR_MES_ANTERIOR'].iloc[1:]) == \
+        list(e110['VL_SLD_CREDOR_TRANSPORTAR'].iloc[:-1])
+    assert list(e110['DIFERENCA_SLD_CREDOR'].iloc[1:]) == [0.0, 0.0]
+
+    arquivos_lidos = ler_aba(saida, 'Arquivos')
+    assert list(arquivos_lidos['Situacao']) == ['CONSOLIDADO'] * 3
+
+
+@pytest.mark.parametrize('substituto_primeiro', [True, False])
+def test_substituto_prevalece_sobre_o_original(substituto_primeiro, tmp_path, saida):
+    janeiro, saldo = gerar_mes(tmp_path, 'jan.txt', 1, SALDO_INICIAL)
+    # O substituto tem outro saldo; lido antes ou depois do original, é ele que vale
+    substituto, saldo_substituto = gerar_mes(tmp_path, 'fev_substituto.txt', 2, saldo, e111=4)
+    marcar_substituto(substituto)
+    original, _ = gerar_mes(tmp_path, 'fev_original.txt', 2, saldo + 12345)
+    marco, _ = gerar_mes(tmp_path, 'mar.txt', 3, saldo_substituto)
+    assert saldo_substituto != saldo
+
+    fevereiro = [substituto, original] if substituto_primeiro else [original, substituto]
+    consolidar_periodos([janeiro] + fevereiro + [marco], saida, processos=2)
+
+    e110 = ler_aba(saida, 'E110_Periodos')
+    assert list(e110['Periodo']) == ['01/2025', '02/2025', '03/2025']
+    assert list(e110['VERIFICACAO_SALDO']) == [VERIFICACAO_PRIMEIRO, VERIFICACAO_OK, VERIFICACAO_OK]
+    assert centavos(e110['VL_SLD_CREDOR_TRANSPORTAR'].iloc[1]) == saldo_substituto
+
+    arquivos = ler_aba(saida, 'Arquivos').set_index('Arquivo')
+    assert arquivos.loc[substituto, 'COD_FIN'] == '1'
+    assert arquivos.loc[substituto, 'Situacao'] == 'CONSOLIDADO'
+    assert arquivos.loc[original, 'Situacao'] == 'SUBSTITUÍDO POR fev_substituto.txt'
+
+
+def test_arquivo_posterior_substitui_o_anterior_de_mesma_finalidade(tmp_path):
+    primeiro, _ = gerar_mes(tmp_path, 'fev_1.txt', 2)
+    segundo, _ = gerar_mes(tmp_path, 'fev_2.txt', 2)
+    resultados = [resumir_arquivo(primeiro), resumir_arquivo(segundo)]
+
+    resumos = selecionar_periodos(resultados)
+    assert [resumo['arquivo'] for resumo in resumos] == [segundo]
+    assert resultados[0]['substituido_por'] == segundo
+
+
+def test_mes_ausente_nao_e_comparado(tmp_path, saida):
+    janeiro, saldo = gerar_mes(tmp_path, 'jan.txt', 1, SALDO_INICIAL)
+    marco, _ = gerar_mes(tmp_path, 'mar.txt', 3, saldo + 50000)
+
+    consolidar_periodos([marco, janeiro], saida, processos=1)
+
+    e110 = ler_aba(saida, 'E110_Periodos')
+    assert list(e110['Periodo']) == ['01/2025', '03/2025']
+    assert list(e110['VERIFICACAO_SALDO']) == [VERIFICACAO_PRIMEIRO, VERIFICACAO_LACUNA]
+    assert e110['SLD_TRANSPORTAR_MES_ANTERIOR'].isna().all()
+
+
+def test_saldo_credor_divergente(tmp_path, saida):
+    janeiro, saldo = gerar_mes(tmp_path, 'jan.txt', 1, SALDO_INICIAL)
+    fevereiro, saldo_fevereiro = gerar_mes(tmp_path, 'fev.txt', 2, saldo + 250)
+    marco, _ = gerar_mes(tmp_path, 'mar.txt', 3, saldo_fevereiro)
+
+    resultados = consolidar_periodos([janeiro, fevereiro, marco], saida, processos=2)
+    assert all(resultado['sucesso'] for resultado in resultados)
+
+    e110 = ler_aba(saida, 'E110_Periodos')
+    assert list(e110['VERIFICACAO_SALDO']) == [VERIFICACAO_PRIMEIRO, VERIFICACAO_DIVERGENTE,
+                                               VERIFICACAO_OK]
+    assert e110['DIFERENCA_SLD_CREDOR'].iloc[1] == 2.5
+
+
+def test_cnpjs_diferentes_nao_sao_comparados(tmp_path, saida):
+    janeiro, saldo = gerar_mes(tmp_path, 'jan.txt', 1, SALDO_INICIAL)
+    outra_empresa, _ = gerar_mes(tmp_path, 'fev_outra.txt', 2, saldo + 100, cnpj='33000167000101')
+
+    consolidar_periodos([janeiro, outra_empresa], saida, processos=1)
+
+    e110 = ler_aba(saida, 'E110_Periodos')
+    assert list(e110['CNPJ']) == ['11222333000181', '33000167000101']
+    assert list(e110['VERIFICACAO_SALDO']) == [VERIFICACAO_PRIMEIRO, VERIFICACAO_PRIMEIRO]
+
+
+def resumo_e110(periodo, saldo_anterior, saldo_transportar, cnpj='11222333000181'):
+    e110 = None
+    if saldo_anterior is not None:
+        e110 = {nome: 0.0 for nome in ('VL_TOT_DEBITOS', 'VL_AJ_DEBITOS', 'VL_TOT_AJ_DEBITOS',
+                                       'VL_ESTORNOS_CRED', 'VL_TOT_CREDITOS', 'VL_AJ_CREDITOS',
+                                       'VL_TOT_AJ_CREDITOS', 'VL_ESTORNOS_DEB', 'VL_SLD_APURADO',
+                                       'VL_TOT_DED', 'VL_ICMS_RECOLHER', 'DEB_ESP')}
+        e110.update(VL_SLD_CREDOR_ANT=saldo_anterior, VL_SLD_CREDOR_TRANSPORTAR=saldo_transportar)
+    return {'cnpj': cnpj, 'periodo': periodo, 'e110': e110}
+
+
+@pytest.mark.parametrize('saldo_anterior,verificacao', [
+    (100.0, VERIFICACAO_OK),
+    (100.009, VERIFICACAO_OK),
+    (99.991, VERIFICACAO_OK),
+    (100.02, VERIFICACAO_DIVERGENTE),
+    (99.98, VERIFICACAO_DIVERGENTE),
+])
+def test_tolerancia_do_saldo_credor(saldo_anterior, verificacao):
+    e110 = montar_e110_periodos([resumo_e110((2025, 12), 0.0, 100.0),
+                                 resumo_e110((2026, 1), saldo_anterior, 0.0)])
+    assert list(e110['VERIFICACAO_SALDO']) == [VERIFICACAO_PRIMEIRO, verificacao]
+
+
+def test_mes_anterior_sem_e110():
+    e110 = montar_e110_periodos([resumo_e110((2025, 1), 0.0, 10.0),
+                                 resumo_e110((2025, 2), None, None),
+                                 resumo_e110((2025, 3), 10.0, 0.0)])
+    assert list(e110['Periodo']) == ['01/2025', '03/2025']
+    assert list(e110['VERIFICACAO_SALDO']) == [VERIFICACAO_PRIMEIRO, VERIFICACAO_SEM_E110]